@@ -1,18 +1,30 @@
-import re
 import json
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from scipy.spatial import cKDTree
+from rsi_apt import ARC, as_toolpath, read_apt
+from rsi_path import SegmentIndex, build_kdtree, query_kdtree
+from rsi_tcp import TCP_COLUMNS, load_tcp_columns
 
 # ==============================================================================
 # 1. CONFIGURATION
 # ==============================================================================
 APT_FILE_PATH = 'apt_source/test.aptsource'
+# JSON historique ou trajectoire .npy exportée par rsi_tcp.py / logviewer.py (bien plus rapide à charger)
 RSI_JSON_PATH = 'jsonOK/kuka_log_cleancdis01v10.json'
 ORIGIN_OFFSET = (0, 0, 0)
 ORIGIN_ROTATION_DEG = (0, 0, 0)
 INTERPOLATION_STEP_MM = 0.01
+# Nombre de points du parcours densifié calculés à la fois (borne la mémoire des tableaux intermédiaires)
+DENSIFY_CHUNK_POINTS = 1_000_000
+# 'kdtree' : parcours densifié au pas INTERPOLATION_STEP_MM, chaque point apparié à la mesure la plus proche
+# 'exact' : chaque point mesuré projeté sur les segments APT (distance exacte, sans densification)
+# 'monotonic' : comme 'exact', en suivant le parcours dans l'ordre des mesures (parcours qui repassent au même endroit)
+COMPARISON_MODE = 'kdtree'
+# Vitesse maximale du suivi 'monotonic' quand le programme n'a aucune vitesse programmée ni de vitesse mesurée (mm/s)
+DEFAULT_MAX_SPEED_MM_S = 2000.0
+# Recadrage en mode 'monotonic' : premier passage à moins de cette distance du plus proche point du départ
+TRIM_TOLERANCE_MM = 1.0
 # --- Seuils de tolérance (ces valeurs ne serviront plus que pour le titre) ---
 POSITION_TOLERANCE_MM = 0.5
 SPEED_TOLERANCE_MM_S = 5.0
@@ -21,53 +33,84 @@ SPEED_TOLERANCE_MM_S = 5.0
 # FONCTIONS 1 à 5 (INCHANGÉES)
 # ==============================================================================
 def parse_and_transform_apt(filepath, offset_translation, offset_rotation_deg):
-    path_segments = []
-    rz, ry, rx = offset_rotation_deg
-    alpha, beta, gamma = np.radians([rz, ry, rx])
-    Rz = np.array([[np.cos(alpha), -np.sin(alpha), 0], [np.sin(alpha), np.cos(alpha), 0], [0, 0, 1]])
-    Ry = np.array([[np.cos(beta), 0, np.sin(beta)], [0, 1, 0], [-np.sin(beta), 0, np.cos(beta)]])
-    Rx = np.array([[1, 0, 0], [0, np.cos(gamma), -np.sin(gamma)], [0, np.sin(gamma), np.cos(gamma)]])
-    rotation_matrix = Rz @ Ry @ Rx
-    translation_vector = np.array(offset_translation)
-    rapid_speed = 12000.0
-    last_point_transformed = None; is_rapid_mode = False; current_feedrate = None
+    """Parcours APT (ToolPath de rsi_apt : tableaux des mouvements, arcs CIRCLE compris) dans le repère de mesure,
+    None si le fichier est introuvable."""
     try:
-        with open(filepath, 'r') as f:
-            for line in f:
-                if "RAPID" in line: is_rapid_mode = True
-                elif "FEDRAT" in line:
-                    is_rapid_mode = False
-                    match = re.search(r'FEDRAT\s*/\s*(-?\d+\.?\d*)', line)
-                    if match: current_feedrate = float(match.group(1))
-                elif "GOTO" in line:
-                    match = re.search(r'GOTO\s*/\s*(-?\d+\.?\d*)\s*,\s*(-?\d+\.?\d*)\s*,\s*(-?\d+\.?\d*)', line)
-                    if match:
-                        original_point = np.array([float(m) for m in match.groups()])
-                        transformed_point = (rotation_matrix @ original_point) + translation_vector
-                        if last_point_transformed is not None:
-                            path_segments.append({"start": last_point_transformed, "end": transformed_point.tolist(), "feedrate": rapid_speed if is_rapid_mode else current_feedrate})
-                        last_point_transformed = transformed_point.tolist()
+        return read_apt(filepath, offset_translation, offset_rotation_deg)
     except FileNotFoundError: return None
-    return path_segments
 
-def densify_theoretical_path(path_segments, step_mm=1.0):
-    dense_points = []
+def _segment_geometry(path_segments, step_mm):
+    # Mouvements en tableaux : origine, pas entre points, premier point et nombre de points, vitesse (mm/s), RAPID
+    path = as_toolpath(path_segments)
+    delta = path.ends - path.starts
+    # Même découpage que np.linspace(start, end, int(longueur / pas), endpoint=False), segment par segment
+    # (longueur le long de l'arc pour les arcs)
+    counts = (path.lengths / step_mm).astype(np.int64)
+    steps = np.divide(delta, counts[:, None], out=np.zeros_like(delta), where=counts[:, None] > 0)
+    first = np.concatenate(([0], np.cumsum(counts)))
+    return {"path": path, "starts": path.starts, "ends": path.ends, "steps": steps, "counts": counts, "first": first,
+            "speeds": path.speeds, "rapid": path.rapid, "arc": path.motion == ARC}
+
+
+def _dense_chunk(geometry, p0, p1, last):
+    # Points p0 à p1 (exclu) du parcours densifié, plus le point final du parcours si last
+    first, counts = geometry["first"], geometry["counts"]
+    s0 = int(np.searchsorted(first, p0, side='right')) - 1 if p1 > p0 else 0
+    s1 = int(np.searchsorted(first, p1, side='left')) if p1 > p0 else 0
+    # Nombre de points de chaque segment compris dans [p0, p1), puis un index de segment par point
+    taken = np.minimum(first[s0 + 1:s1 + 1], p1) - np.maximum(first[s0:s1], p0)
+    segment = np.repeat(np.arange(s0, s1, dtype=np.int32), taken)
+    k = np.arange(p0, p1) - first[segment]
+    xyz = k[:, None] * geometry["steps"][segment] + geometry["starts"][segment]
+    on_arc = geometry["arc"][segment]
+    if on_arc.any():
+        # Points des arcs répartis le long de l'arc
+        xyz[on_arc] = geometry["path"].arc_points(segment[on_arc], k[on_arc] / geometry["counts"][segment[on_arc]])
+    if last:
+        segment = np.append(segment, np.int32(len(counts) - 1))
+        xyz = np.vstack((xyz, geometry["ends"][-1]))
+    return {
+        'X': xyz[:, 0], 'Y': xyz[:, 1], 'Z': xyz[:, 2], 'Theoretical_Speed_mm_s': geometry["speeds"][segment],
+        'Segment': segment, 'Rapid': geometry["rapid"][segment],
+    }
+
+
+def iter_dense_path(path_segments, step_mm=1.0, chunk_points=DENSIFY_CHUNK_POINTS):
+    """Parcours densifié par DataFrames successifs d'au plus chunk_points points (le dernier porte en plus le point final),
+    pour traiter les programmes trop longs pour être densifiés d'un bloc."""
+    if not path_segments:
+        return
+    geometry = _segment_geometry(path_segments, step_mm)
+    total = int(geometry["first"][-1])
+    for p0 in range(0, max(total, 1), chunk_points):
+        p1 = min(p0 + chunk_points, total)
+        yield pd.DataFrame(_dense_chunk(geometry, p0, p1, p1 == total), copy=False)
+
+
+def densify_theoretical_path(path_segments, step_mm=1.0, chunk_points=DENSIFY_CHUNK_POINTS):
+    """Points du parcours théorique tous les ~step_mm : X, Y, Z, vitesse programmée (mm/s), index du segment
+    dans path_segments (Segment) et déplacement rapide (Rapid). Calcul vectorisé par blocs de chunk_points points."""
     if not path_segments: return pd.DataFrame()
-    for segment in path_segments:
-        start_point, end_point = np.array(segment['start']), np.array(segment['end'])
-        length = np.linalg.norm(end_point - start_point)
-        if length == 0: continue
-        num_points = int(length / step_mm)
-        points = np.linspace(start_point, end_point, num_points, endpoint=False)
-        for point in points:
-            dense_points.append({'X': point[0], 'Y': point[1], 'Z': point[2], 'Theoretical_Speed_mm_s': segment['feedrate'] / 60.0})
-    last_seg = path_segments[-1]
-    dense_points.append({'X': last_seg['end'][0], 'Y': last_seg['end'][1], 'Z': last_seg['end'][2], 'Theoretical_Speed_mm_s': last_seg['feedrate'] / 60.0})
-    return pd.DataFrame(dense_points)
-
-def load_rsi_data(json_filepath):
+    geometry = _segment_geometry(path_segments, step_mm)
+    total = int(geometry["first"][-1])
+    columns = None
+    for p0 in range(0, max(total, 1), chunk_points):
+        p1 = min(p0 + chunk_points, total)
+        chunk = _dense_chunk(geometry, p0, p1, p1 == total)
+        if columns is None:
+            # Colonnes finales allouées une fois, remplies bloc par bloc
+            columns = {name: np.empty(total + 1, dtype=values.dtype) for name, values in chunk.items()}
+        for name, values in chunk.items():
+            columns[name][p0:p0 + len(values)] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_rsi_data(filepath):
+    # Trajectoire en colonnes (.npy) : memory-map, aucun travail ligne par ligne
+    if str(filepath).endswith('.npy'):
+        return load_rsi_columns(filepath)
     try:
-        with open(json_filepath, 'r') as f:
+        with open(filepath, 'r') as f:
             data = json.load(f)
         timeseries_data = data.get('timeseries')
         positions_data = data.get('tcp_positions')
@@ -102,21 +145,48 @@ def load_rsi_data(json_filepath):
         return None
 
 
-def trim_rsi_data(rsi_df, theoretical_start_point):
+def load_rsi_columns(npy_filepath):
+    try:
+        array = load_tcp_columns(npy_filepath)
+    except (OSError, ValueError):
+        return None
+    if not len(array):
+        return None
+    # Tableau rangé par colonne : le DataFrame réutilise le memory-map sans copie
+    df = pd.DataFrame(array, columns=list(TCP_COLUMNS), copy=False)
+    if not df['Timestamp'].is_monotonic_increasing:
+        df = df.sort_values(by='Timestamp').reset_index(drop=True)
+    return df
+
+
+def trim_rsi_data(rsi_df, theoretical_start_point, first_pass=False):
     if rsi_df is None or theoretical_start_point is None: return None
-    real_coords = rsi_df[['X', 'Y', 'Z']].values
-    kdtree = cKDTree(real_coords)
-    distance, start_index = kdtree.query(theoretical_start_point)
+    # Un seul point cherché : un parcours vectorisé coûte moins que la construction d'un arbre
+    distances = np.linalg.norm(rsi_df[['X', 'Y', 'Z']].values - np.asarray(theoretical_start_point, dtype=np.float64), axis=1)
+    if first_pass:
+        # Premier passage au point de départ, et non le plus proche (le programme finit souvent là où il commence)
+        near = np.flatnonzero(distances <= distances.min() + TRIM_TOLERANCE_MM)
+        first_run = near[:np.argmax(np.diff(np.append(near, near[-1] + 2)) > 1) + 1]
+        start_index = int(first_run[distances[first_run].argmin()])
+    else:
+        start_index = int(distances.argmin())
+    distance = distances[start_index]
     trimmed_df = rsi_df.iloc[start_index:].copy().reset_index(drop=True)
     print(f"-> Point de départ trouvé (distance: {distance:.3f} mm). {len(rsi_df) - len(trimmed_df)} points d'approche supprimés.")
     return trimmed_df
 
-def synchronize_and_compare(theoretical_df, real_df):
+def build_real_index(real_df):
+    """Arbre de recherche des points mesurés, réutilisable par synchronize_and_compare d'une comparaison à l'autre."""
+    return build_kdtree(real_df[['X', 'Y', 'Z']].values)
+
+def synchronize_and_compare(theoretical_df, real_df, kdtree=None, progress=None):
+    """Apparie chaque point théorique au point mesuré le plus proche (kdtree : build_real_index(real_df) déjà construit),
+    recherche par blocs sur tous les cœurs ; progress(faits, total) après chaque bloc."""
     if theoretical_df.empty or real_df is None or real_df.empty: return None
-    real_coords = real_df[['X', 'Y', 'Z']].values
-    kdtree = cKDTree(real_coords)
+    if kdtree is None:
+        kdtree = build_real_index(real_df)
     theoretical_coords = theoretical_df[['X', 'Y', 'Z']].values
-    distances, indices = kdtree.query(theoretical_coords)
+    distances, indices = query_kdtree(kdtree, theoretical_coords, progress=progress)
     results_df = theoretical_df.copy(); results_df.rename(columns={'X': 'X_th', 'Y': 'Y_th', 'Z': 'Z_th'}, inplace=True)
     real_closest_data = real_df.iloc[indices]
     results_df['X_real'], results_df['Y_real'], results_df['Z_real'] = real_closest_data['X'].values, real_closest_data['Y'].values, real_closest_data['Z'].values
@@ -124,6 +194,48 @@ def synchronize_and_compare(theoretical_df, real_df):
     results_df['Speed_Error'] = results_df['RealSpeed_mm_s'] - results_df['Theoretical_Speed_mm_s']
     return results_df
 
+def _max_speed(programmed, measured):
+    # Vitesse maximale programmée, à défaut (aucun FEDRAT) mesurée, à défaut DEFAULT_MAX_SPEED_MM_S
+    for speeds in (programmed, measured):
+        speeds = speeds[np.isfinite(speeds)]
+        if len(speeds) and speeds.max() > 0:
+            return float(speeds.max())
+    return DEFAULT_MAX_SPEED_MM_S
+
+def compare_to_segments(path_segments, real_df, index=None, monotonic=False, progress=None):
+    """Distance exacte de chaque point mesuré au parcours APT, avec le segment le plus proche (Segment)
+    et l'abscisse curviligne du pied de la perpendiculaire (Abscissa_mm).
+
+    Avec monotonic, les points sont appariés dans l'ordre des mesures en progressant le long du parcours
+    (voir SegmentIndex.track) : pas d'appariement à une autre passe là où le parcours repasse au même endroit.
+    Les arcs sont comparés à leurs cordes à moins de ARC_CHORD_TOLERANCE_MM (rsi_apt).
+    index : SegmentIndex.from_segments(path_segments) déjà construit, réutilisable d'une comparaison à l'autre."""
+    if not path_segments or real_df is None or real_df.empty: return None
+    path = as_toolpath(path_segments)
+    if index is None:
+        index = SegmentIndex.from_segments(path)
+    speeds = path.speeds
+    if monotonic:
+        projection = index.track(real_df[['X', 'Y', 'Z']].values, real_df['Timestamp'].values,
+                                 _max_speed(speeds, real_df['RealSpeed_mm_s'].values), progress=progress)
+    else:
+        projection = index.project(real_df[['X', 'Y', 'Z']].values, progress=progress)
+    segment = projection['segment']
+    rapid = path.rapid
+    foot = projection['foot']
+    results_df = pd.DataFrame({
+        'Timestamp': real_df['Timestamp'].values,
+        'X_th': foot[:, 0], 'Y_th': foot[:, 1], 'Z_th': foot[:, 2], 'Theoretical_Speed_mm_s': speeds[segment],
+        'Segment': segment, 'Rapid': rapid[segment], 'Abscissa_mm': projection['abscissa'],
+        'X_real': real_df['X'].values, 'Y_real': real_df['Y'].values, 'Z_real': real_df['Z'].values,
+        'RealSpeed_mm_s': real_df['RealSpeed_mm_s'].values, 'Positional_Error': projection['distance'],
+    })
+    results_df['Speed_Error'] = results_df['RealSpeed_mm_s'] - results_df['Theoretical_Speed_mm_s']
+    return results_df
+
+def print_progress(done, total):
+    print(f"\r   {100 * done / total:5.1f} % ({done}/{total} points)", end="\n" if done >= total else "", flush=True)
+
 def display_summary_statistics(results_df):
     if results_df is None or results_df.empty:
         return
@@ -292,14 +404,23 @@ if __name__ == "__main__":
     print("--- DÉBUT DU SCRIPT DE COMPARAISON DE TRAJECTOIRE ---")
     apt_segments = parse_and_transform_apt(APT_FILE_PATH, ORIGIN_OFFSET, ORIGIN_ROTATION_DEG)
     if apt_segments:
-        dense_theoretical_df = densify_theoretical_path(apt_segments, step_mm=INTERPOLATION_STEP_MM)
         full_rsi_df = load_rsi_data(RSI_JSON_PATH)
         if full_rsi_df is not None:
             print("\nRecadrage des données RSI au point de départ...")
-            theoretical_start_point = dense_theoretical_df[['X', 'Y', 'Z']].iloc[0].values
-            trimmed_rsi_df = trim_rsi_data(full_rsi_df, theoretical_start_point)
+            theoretical_start_point = apt_segments.starts[0]
+            trimmed_rsi_df = trim_rsi_data(full_rsi_df, theoretical_start_point, first_pass=COMPARISON_MODE == 'monotonic')
             print("\nSynchronisation des parcours et calcul des erreurs...")
-            comparison_df = synchronize_and_compare(dense_theoretical_df, trimmed_rsi_df)
+            # Arbre de recherche construit une fois et passé à la comparaison (réutilisable pour d'autres mesures
+            # du même programme, ou d'autres parcours théoriques pour la même mesure)
+            if COMPARISON_MODE in ('exact', 'monotonic'):
+                segment_index = SegmentIndex.from_segments(apt_segments)
+                comparison_df = compare_to_segments(apt_segments, trimmed_rsi_df, index=segment_index,
+                                                    monotonic=COMPARISON_MODE == 'monotonic', progress=print_progress)
+            else:
+                dense_theoretical_df = densify_theoretical_path(apt_segments, step_mm=INTERPOLATION_STEP_MM)
+                real_index = build_real_index(trimmed_rsi_df)
+                comparison_df = synchronize_and_compare(dense_theoretical_df, trimmed_rsi_df, kdtree=real_index,
+                                                        progress=print_progress)
             
             if comparison_df is not None and not comparison_df.empty:
                 display_summary_statistics(comparison_df)
@@ -1,18 +1,27 @@
+import time
+# Référence du temps de démarrage (mesuré jusqu'à l'apparition de la fenêtre)
+STARTUP_T0 = time.perf_counter()
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
-import re
-import xml.etree.ElementTree as ET
-from collections import defaultdict
-import plotly.express as px
-import plotly.io as pio
-from tkinterhtml import HtmlFrame  # Assurez-vous d'installer tkinterhtml
 import webbrowser
 import os
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from collections import Counter
-import numpy as np
-import json
+import queue
+import threading
+# NumPy (modules rsi_*), plotly et tkinterhtml ne sont importés qu'une fois la fenêtre affichée (voir _finish_startup),
+# puis dans les fonctions qui s'en servent
+
+# Profil cProfile du chargement écrit dans ce fichier si la variable d'environnement est définie
+PROFILE_ENV = "RSI_LOGVIEWER_PROFILE"
+
+# Modules nécessaires au chargement d'un log, importés en arrière-plan avant l'activation du bouton de chargement
+STARTUP_MODULES = ("rsi_store", "rsi_cache", "rsi_downsample")
+# Modules lourds importés ensuite dans le même thread, pour que le premier graphique soit immédiat
+PRELOAD_MODULES = ("plotly.graph_objects", "plotly.subplots", "rsi_parser", "rsi_export", "rsi_query", "rsi_stats",
+                   "rsi_tcp", "rsi_timing")
+
+# Mode suivi : période de lecture du fichier et intervalle minimal entre deux rafraîchissements du graphique
+FOLLOW_POLL_MS = 500
+FOLLOW_REFRESH_S = 2.0
 
 class KukaRsiLogViewer(tk.Tk):
     def __init__(self):
@@ -21,13 +30,24 @@ class KukaRsiLogViewer(tk.Tk):
         self.geometry("800x600")
         self.selectedLogFile = ""
 
-        self.data = defaultdict(list)
+        # FrameStore du log chargé, cache disque et nombre de points maximal d'une courbe : créés par _finish_startup
+        self.data = None
+        # Sélection issue de la barre de requête (None : log entier), utilisée par les tracés et exports
+        self.view = None
+        # Analyse rapide par gabarit de trame appris (repli ElementTree sinon)
+        self.fast_parse = True
+        # Cache disque des logs déjà analysés (None pour le désactiver)
+        self.cache = None
+        # Nombre de points maximal d'une courbe (réduction min/max au-delà)
+        self.max_plot_points = None
 
         # Frame pour les contrôles
         controls_frame = tk.Frame(self)
         controls_frame.pack(pady=10, padx=10, fill=tk.X)
 
-        self.load_button = tk.Button(controls_frame, text="Charger un fichier de log", command=self.load_file)
+        # Activé par _finish_startup, une fois les modules d'analyse importés
+        self.load_button = tk.Button(controls_frame, text="Charger un fichier de log", command=self.load_file,
+                                     state=tk.DISABLED)
         self.load_button.pack(side=tk.LEFT, padx=(0, 10))
 
         self.tag_label = tk.Label(controls_frame, text="Tag à afficher :")
@@ -37,7 +57,98 @@ class KukaRsiLogViewer(tk.Tk):
         self.tag_selector.pack(side=tk.LEFT, expand=True, fill=tk.X)
         #self.tag_selector.bind("<<ComboboxSelected>>", self.export_to_html_interactif)
 
-        # Frame pour afficher le graphique Plotly
+        # Nombre de processus pour l'analyse des gros fichiers (1 = séquentiel)
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        tk.Label(controls_frame, text="Processus :").pack(side=tk.LEFT, padx=(10, 0))
+        self.workers_spinbox = ttk.Spinbox(controls_frame, from_=1, to=os.cpu_count() or 1, width=4, textvariable=self.workers_var)
+        self.workers_spinbox.pack(side=tk.LEFT)
+
+        self.timing_button = tk.Button(controls_frame, text="Analyse des cycles", command=self.show_timing_report)
+        self.timing_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        self.diagnostics_button = tk.Button(controls_frame, text="Diagnostic", command=self.show_parse_diagnostics)
+        self.diagnostics_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        # Trajectoire du TCP (temps, X, Y, Z, vitesse) pour comparaison.py
+        self.tcp_button = tk.Button(controls_frame, text="Exporter trajectoire", command=self.export_tcp)
+        self.tcp_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        # Suivi d'un log en cours d'écriture
+        self.follow_var = tk.BooleanVar(value=False)
+        self.follow_check = tk.Checkbutton(controls_frame, text="Suivre", variable=self.follow_var, command=self.toggle_follow)
+        self.follow_check.pack(side=tk.LEFT, padx=(10, 0))
+        self.follower = None
+        self.current_filepath = None
+        self.plotted_tag = None
+        self.last_plot_refresh = 0.0
+
+        # Requête : motifs de tags, fenêtre (frames=a:b, time=a:b) et filtres (ex. Rob/Delay@D>0 margin=50)
+        query_frame = tk.Frame(self)
+        query_frame.pack(padx=10, pady=(0, 10), fill=tk.X)
+        tk.Label(query_frame, text="Requête :").pack(side=tk.LEFT)
+        self.query_var = tk.StringVar()
+        self.query_entry = tk.Entry(query_frame, textvariable=self.query_var)
+        self.query_entry.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.query_entry.bind("<Return>", self.apply_query)
+        self.query_button = tk.Button(query_frame, text="Appliquer", command=self.apply_query)
+        self.query_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        # Frame pour la progression du chargement
+        status_frame = tk.Frame(self)
+        status_frame.pack(padx=10, fill=tk.X)
+
+        self.progress_bar = ttk.Progressbar(status_frame, mode="determinate", maximum=100)
+        self.progress_bar.pack(side=tk.LEFT, expand=True, fill=tk.X)
+
+        self.cancel_button = tk.Button(status_frame, text="Annuler", state=tk.DISABLED, command=self.cancel_loading)
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+
+        self.status_label = tk.Label(self, text="", anchor="w")
+        self.status_label.pack(padx=10, pady=(2, 6), fill=tk.X)
+
+        # Chargement en arrière-plan : le thread poste ses messages dans cette file
+        self.load_queue = queue.Queue()
+        self.load_thread = None
+        self.cancel_event = threading.Event()
+
+        # Frame pour afficher le graphique Plotly, créée après le premier affichage de la fenêtre (si tkinterhtml est installé)
+        self.html_frame = None
+        self.startup_ready = None
+        self.startup_s = None
+        self.bind("<Map>", self._on_first_map)
+
+    def _on_first_map(self, event):
+        # <Map> est aussi reçu pour chaque widget enfant : seule la fenêtre principale compte
+        if event.widget is not self or self.startup_s is not None:
+            return
+        self.startup_s = time.perf_counter() - STARTUP_T0
+        self.status_label.config(text=f"Prêt (démarrage en {self.startup_s:.2f} s).")
+        self.after(50, self._finish_startup)
+
+    def _finish_startup(self):
+        # Imports lourds (NumPy, modules d'analyse, tkinterhtml) hors du thread Tk : la fenêtre reste réactive
+        self.startup_ready = threading.Event()
+        threading.Thread(target=_preload_modules, args=(self.startup_ready,), daemon=True).start()
+        self.after(50, self._poll_startup)
+
+    def _poll_startup(self):
+        if not self.startup_ready.is_set():
+            self.after(50, self._poll_startup)
+            return
+        # Modules déjà importés par le thread : ces imports les reprennent dans sys.modules
+        from rsi_cache import ParseCache
+        from rsi_downsample import DEFAULT_MAX_POINTS
+        from rsi_store import FrameStore
+        self.data = FrameStore()
+        self.cache = ParseCache()
+        self.max_plot_points = DEFAULT_MAX_POINTS
+        self.load_button.config(state=tk.NORMAL)
+        try:
+            from tkinterhtml import HtmlFrame
+        except ImportError:
+            # tkinterhtml est optionnel : les graphiques s'ouvrent alors seulement dans le navigateur
+            return
+        # Les widgets se créent dans le thread Tk
         self.html_frame = HtmlFrame(self)
         self.html_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -56,22 +167,130 @@ class KukaRsiLogViewer(tk.Tk):
         self.parse_log_file(filepath)
 
     def parse_log_file(self, filepath):
-        self.data.clear()
-        xml_pattern = re.compile(r'(<.*>.*)')
-
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line_number, line in enumerate(f, 1):
-                match = xml_pattern.search(line)
-                if match:
-                    xml_string = match.group(1).replace('\\"', '"').replace('\\n', '')
-                    #print(f"Ligne {line_number}: Trame XML trouvée: {xml_string}")
-                    try:
-                        root = ET.fromstring(xml_string)
-                        self._extract_paths_from_element(root)
-                    except ET.ParseError as e:
-                        #print(f"Ligne {line_number}: Erreur de parsing XML: {e}")
-                        continue
+        if self.load_thread is not None and self.load_thread.is_alive():
+            return
+        self.stop_follow()
+        self.current_filepath = filepath
+        from rsi_store import FrameStore
+        # Les anciennes données restent affichables pendant le chargement
+        store = FrameStore(self.data.dtype)
+        self.cancel_event = threading.Event()
+        self.load_thread = threading.Thread(
+            target=self._load_worker, args=(filepath, store, self.workers_var.get()), daemon=True
+        )
+        self.load_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar['value'] = 0
+        self.status_label.config(text=f"Chargement de {os.path.basename(filepath)}...")
+        self.load_thread.start()
+        self.after(100, self._poll_loading)
+
+    def cancel_loading(self):
+        self.cancel_event.set()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Annulation en cours...")
+
+    def _load_worker(self, filepath, store, workers):
+        # Exécuté hors du thread Tk : aucun appel Tk ici, uniquement la file
+        import rsi_parser
+        from rsi_cache import load_or_parse
+        try:
+            rsi_parser.run_profiled(
+                os.environ.get(PROFILE_ENV), load_or_parse,
+                filepath, store, cache=self.cache, fast=self.fast_parse, workers=workers,
+                progress=lambda p: self.load_queue.put(("progress", p)), cancel=self.cancel_event
+            )
+        except rsi_parser.ParseCancelled:
+            self.load_queue.put(("cancelled", store))
+        except Exception as e:
+            self.load_queue.put(("error", e))
+        else:
+            self.load_queue.put(("done", store))
 
+    def _poll_loading(self):
+        while True:
+            try:
+                kind, payload = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self._show_progress(payload)
+                continue
+            self.load_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            if kind == "error":
+                self.status_label.config(text="")
+                messagebox.showerror("Erreur de chargement", str(payload))
+            elif kind == "cancelled":
+                # Résultats partiels conservés
+                self.data = payload
+                self.view = None
+                self.tag_selector['values'] = sorted(self.data.keys())
+                self.status_label.config(text=f"Chargement annulé : {self.data.frame_count} trames partielles conservées.")
+            else:
+                self.data = payload
+                self.view = None
+                self.progress_bar['value'] = 100
+                text = f"{self.data.frame_count} trames chargées."
+                if self.data.parse_stats is not None and self.data.parse_stats.malformed_lines:
+                    text += f" {self.data.parse_stats.malformed_lines} lignes malformées ignorées (voir Diagnostic)."
+                self.status_label.config(text=text)
+                self._on_log_loaded()
+            return
+        self.after(100, self._poll_loading)
+
+    def _show_progress(self, progress):
+        self.progress_bar['value'] = 100 * progress.fraction
+        text = (f"{progress.bytes_done / 1e6:.0f} / {progress.total_bytes / 1e6:.0f} Mo - "
+                f"{progress.frames_per_s:,.0f} trames/s")
+        if progress.eta is not None:
+            text += f" - reste ~{progress.eta:.0f} s"
+        self.status_label.config(text=text)
+        # Les tags sont proposés dès que le schéma des trames est connu
+        if progress.tags:
+            self.tag_selector['values'] = progress.tags
+
+    def toggle_follow(self):
+        if self.follow_var.get():
+            self.start_follow()
+        else:
+            self.stop_follow()
+
+    def start_follow(self):
+        loading = self.load_thread is not None and self.load_thread.is_alive()
+        if self.current_filepath is None or loading:
+            self.follow_var.set(False)
+            return
+        # La sélection serait figée : le suivi affiche le log entier
+        self.view = None
+        import rsi_parser
+        # Reprise juste après les octets déjà analysés
+        self.follower = rsi_parser.LogFollower(self.current_filepath, self.data, fast=self.fast_parse)
+        self.status_label.config(text=f"Suivi de {os.path.basename(self.current_filepath)}...")
+        self.after(FOLLOW_POLL_MS, self._follow_tick)
+
+    def stop_follow(self):
+        self.follower = None
+        self.follow_var.set(False)
+
+    def _follow_tick(self):
+        follower = self.follower
+        if follower is None:
+            return
+        new_frames = follower.poll()
+        if new_frames:
+            self.tag_selector['values'] = sorted(self.data.keys())
+            self.status_label.config(
+                text=f"Suivi : {self.data.frame_count} trames (+{new_frames}), rotations : {follower.rotations}"
+            )
+            now = time.monotonic()
+            # Rafraîchissement du graphique ouvert limité à un toutes les FOLLOW_REFRESH_S secondes
+            if self.plotted_tag in self.shown and now - self.last_plot_refresh >= FOLLOW_REFRESH_S:
+                self.last_plot_refresh = now
+                self._write_tag_plot(self.plotted_tag, "graphiques_combines.html", FOLLOW_REFRESH_S)
+        self.after(FOLLOW_POLL_MS, self._follow_tick)
+
+    def _on_log_loaded(self):
         if not self.data:
             messagebox.showwarning("Aucune donnée", "Aucune trame XML valide n'a été trouvée dans ce fichier.")
             return
@@ -90,39 +309,102 @@ class KukaRsiLogViewer(tk.Tk):
             messagebox.showinfo("Export interactif", f"Le fichier {html_file_path} a été généré.")
             webbrowser.open(os.path.abspath(html_file_path))
 
-    def _extract_paths_from_element(self, element, path=''):
-        current_path = f"{path}/{element.tag}" if path else element.tag
-        if element.text and element.text.strip():
-            try:
-                value = float(element.text.strip())
-                self.data[current_path].append(value)
-            except (ValueError, TypeError):
-                pass
+    @property
+    def shown(self):
+        """Données affichées et exportées : la sélection de la requête, sinon le log entier."""
+        return self.data if self.view is None else self.view
 
-        for attr, attr_value in element.attrib.items():
-            attr_path = f"{current_path}@{attr}"
+    def apply_query(self, event=None):
+        if not self.data:
+            messagebox.showwarning("Aucune donnée", "Chargez d'abord un fichier de log.")
+            return
+        text = self.query_var.get().strip()
+        if not text:
+            self.view = None
+            self.status_label.config(text=f"Log entier : {len(self.data)} tags, {self.data.frame_count} trames.")
+        else:
+            from rsi_query import run_query
             try:
-                value = float(attr_value)
-                self.data[attr_path].append(value)
-            except (ValueError, TypeError):
-                pass
+                result = run_query(self.data, text)
+            except (KeyError, ValueError) as e:
+                messagebox.showerror("Requête", str(e))
+                return
+            if not result.columns:
+                messagebox.showwarning("Requête", "Aucune donnée ne correspond à la requête.")
+                return
+            self.view = result.to_store()
+            self.status_label.config(text=f"Requête : {result.summary()}.")
+        self.tag_selector['values'] = sorted(self.shown.keys())
+        if self.tag_selector.get() not in self.shown:
+            self.tag_selector.set("Sélectionnez un tag")
+
+    def show_timing_report(self):
+        if not self.data:
+            messagebox.showwarning("Aucune donnée", "Chargez d'abord un fichier de log.")
+            return
+        from rsi_timing import analyze_timing
+        messagebox.showinfo("Analyse des cycles RSI", analyze_timing(self.data).summary())
+
+    def show_parse_diagnostics(self):
+        if self.data is None or self.data.parse_stats is None:
+            messagebox.showwarning("Aucune donnée", "Chargez d'abord un fichier de log.")
+            return
+        messagebox.showinfo("Diagnostic de l'analyse", self.data.parse_stats.summary())
 
-        for child in element:
-            self._extract_paths_from_element(child, current_path)
+    def export_tcp(self):
+        if not self.data:
+            messagebox.showwarning("Aucune donnée", "Chargez d'abord un fichier de log.")
+            return
+        from rsi_tcp import TCP_SUFFIX, export_tcp_columns
+        filepath = filedialog.asksaveasfilename(
+            title="Exporter la trajectoire du TCP",
+            defaultextension=".npy",
+            initialfile=self.selectedLogFile + TCP_SUFFIX,
+            filetypes=(("Trajectoire NumPy", "*.npy"), ("All files", "*.*"))
+        )
+        if not filepath:
+            return
+        try:
+            n = export_tcp_columns(self.shown, filepath)
+        except (KeyError, ValueError) as e:
+            messagebox.showerror("Export de la trajectoire", str(e))
+            return
+        messagebox.showinfo("Export de la trajectoire", f"{n} points écrits dans {filepath}\n(à charger dans comparaison.py).")
 
     def plot_selected_tag(self, event=None):
         selected_tag = self.tag_selector.get()
-        if not selected_tag or selected_tag not in self.data:
+        if not selected_tag or selected_tag not in self.shown:
             return
 
-        values = self.data[selected_tag]
+        values = self.shown[selected_tag]
 
         print(f"Génération des graphiques pour le tag '{selected_tag}'...")
         print(f"Nombre de valeurs trouvées : {len(values)}")
-        if not values:
+        if values.size == 0:
             messagebox.showwarning("Données vides", f"Le tag '{selected_tag}' ne contient aucune donnée à afficher.")
             return
 
+        html_file_path = "graphiques_combines.html"
+        refresh_s = FOLLOW_REFRESH_S if self.follower is not None else None
+        self._write_tag_plot(selected_tag, html_file_path, refresh_s)
+        self.plotted_tag = selected_tag
+        messagebox.showinfo("Succès", f"Graphiques sauvegardés dans {html_file_path}")
+        webbrowser.open(f"file://{os.path.abspath(html_file_path)}")
+
+    def _write_tag_plot(self, selected_tag, html_file_path, refresh_s=None):
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        from rsi_downsample import downsample
+        from rsi_stats import tag_stats
+        from rsi_timing import frame_times, tag_times
+        store = self.shown
+        values = store[selected_tag]
+        # Abscisse en temps réel tiré de l'IPOC (index de trame si le log n'en contient pas)
+        frames = tag_times(store, selected_tag)
+        # Statistiques et histogramme précalculés au chargement (recalculés si la colonne a grossi)
+        stats = tag_stats(store, selected_tag)
+        hist = stats["histogram"]
+
         is_delay = "delay" in selected_tag.lower()  # mettez ici la condition exacte sur le nom du tag Delay
 
         fig = make_subplots(
@@ -133,25 +415,22 @@ class KukaRsiLogViewer(tk.Tk):
             )
         )
 
-        # Tracé commun : ligne à gauche
+        # Tracé commun : ligne à gauche, réduite à une enveloppe min/max pour les longues séries
+        line_x, line_y = downsample(frames, values, self.max_plot_points)
         fig.add_trace(
             go.Scatter(
-                x=list(range(len(values))), y=values, mode='lines+markers'
+                x=line_x, y=line_y, mode='lines+markers' if len(line_y) == len(values) else 'lines'
             ),
             row=1, col=1
         )
 
-        if is_delay:
+        if is_delay and stats["mean"] is not None:
             # --- Votre configuration spéciale Delay conservée ---
             fig.add_trace(
-                go.Histogram(
-                    x=values,
-                    autobinx=False,
-                    xbins=dict(
-                        start=min(values) - 0.5,
-                        end=max(values) + 0.5,
-                        size=1
-                    ),
+                go.Bar(
+                    x=hist["x"],
+                    y=hist["y"],
+                    width=hist["width"] or 1,
                     marker=dict(
                         line=dict(width=1, color="white"),
                         color="#1f77b4"
@@ -166,8 +445,8 @@ class KukaRsiLogViewer(tk.Tk):
                 showlegend=False,
                 margin=dict(t=120)
             )
-            mean_delay = np.mean(values)
-            percent_nonzero = 100 * sum(1 for v in values if v != 0) / len(values)
+            mean_delay = stats["mean"]
+            percent_nonzero = 100 * stats["nonzero_ratio"]
             # Texte du cadre (formatté sur 2 lignes)
             info_text = (
                 f"<b>Statistiques</b><br>"
@@ -188,8 +467,7 @@ class KukaRsiLogViewer(tk.Tk):
                 opacity=0.85
             )
 
-            counts = Counter(values)
-            for x_val, y_val in counts.items():
+            for x_val, y_val in zip(hist["x"], hist["y"]):
                 if y_val >=1000:
                     fig.add_annotation(
                         x=x_val, y=18.8, text=str(y_val), showarrow=False,
@@ -224,8 +502,10 @@ class KukaRsiLogViewer(tk.Tk):
         else:
             # --- Affichage standard & auto-adaptatif pour tous les autres tags ---
             fig.add_trace(
-                go.Histogram(
-                    x=values,
+                go.Bar(
+                    x=hist["x"],
+                    y=hist["y"],
+                    width=hist["width"],
                     marker=dict(
                         line=dict(width=1, color="white"),
                         color="#1f77b4"
@@ -241,284 +521,60 @@ class KukaRsiLogViewer(tk.Tk):
                 margin=dict(t=80)
             )
 
-        fig.update_xaxes(title_text="Index de la trame", row=1, col=1)
+        x_title = "Temps (s)" if frame_times(store) is not None else "Index de la trame"
+        fig.update_xaxes(title_text=x_title, row=1, col=1)
         fig.update_yaxes(title_text=f"{selected_tag}", row=1, col=1)
         fig.update_xaxes(title_text=selected_tag, row=1, col=2)
 
-        html_file_path = "graphiques_combines.html"
-        fig.write_html(html_file_path)
-        messagebox.showinfo("Succès", f"Graphiques sauvegardés dans {html_file_path}")
-        webbrowser.open(f"file://{os.path.abspath(html_file_path)}")
+        if refresh_s is None:
+            fig.write_html(html_file_path)
+        else:
+            # En mode suivi, la page se recharge d'elle-même pour afficher les nouvelles valeurs
+            html = fig.to_html().replace("<head>", f'<head><meta http-equiv="refresh" content="{refresh_s:g}">', 1)
+            with open(html_file_path, "w", encoding="utf-8") as f:
+                f.write(html)
 
     def export_to_html_interactif(self, output_path="kuka_log_interactif.html"):
-        all_data = {tag: values for tag, values in self.data.items() if values}
-        all_data_json = json.dumps(all_data)
-
-        html_template = f'''<!DOCTYPE html>
-    <html lang="fr">
-    <head>
-        <meta charset="UTF-8">
-        <title>KUKA Log Viewer Interactif</title>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-        <style>
-            html, body {{
-                height: 100vh; margin: 0; padding: 0; background: #181c21; color: #fff;
-                font-family: Arial,sans-serif;
-            }}
-            #main-container {{
-                display: flex; flex-direction: row; height: 100vh; width: 100vw;
-            }}
-            #sidebar {{
-                background:#20242b;
-                min-width:235px; max-width:335px;
-                padding:22px 14px 12px 14px;
-                overflow-y:auto; height:100vh;
-                border-right: 1px solid #282a30;
-            }}
-            #plot-container {{
-                flex:1;
-                padding: 26px 34px 30px 36px;
-                overflow:auto;
-                height:100vh;
-                background: #181c21;
-            }}
-            #plot-container > div {{
-                margin-bottom: 60px;
-                width: 100%;
-                min-height: 540px;
-            }}
-            .plot-header {{
-                font-family:sans-serif;font-weight:bold;margin-bottom:5px;
-            }}
-            .stats-box {{
-                color:white;background-color:#1f77b4;
-                border:1px solid #fff;border-radius:5px;padding:10px 15px;
-                display:inline-block;opacity:0.92;margin-bottom:8px;font-size:15px;
-            }}
-            #checkbox-list {{ columns:1 auto; }}
-            button {{ margin-top:11px;margin-bottom:6px;padding:4px 9px; }}
-            label {{ font-size: 15px; }}
-            @media (max-width: 900px) {{
-                #main-container {{ flex-direction: column; }}
-                #sidebar {{ max-width: 100vw; min-width:110px; border-right:none; border-bottom:1px solid #282a30; height:auto; }}
-                #plot-container {{ height: auto; padding: 8px 4px 16px 6px; }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div id="main-container">
-            <div id="sidebar">
-                <label style="font-size:16px;"><input type="checkbox" id="same-plot"> Tout sur le même graphe</label>
-                <br/><br/>
-                <strong>Tags à afficher&nbsp;:</strong>
-                <div id="checkbox-list"></div>
-                <button id="plot-btn">Tracer</button>
-                <button id="select-all" style="margin-left:8px;">Tout sélectionner</button>
-                <button id="select-none" style="margin-left:4px;">Aucun</button>
-                <br>
-            </div>
-            <div id="plot-container"></div>
-        </div>
-        <script>
-        // Données exportées (injectées)
-        const all_data = {all_data_json};
-
-        // Initialiser la liste de checkboxes
-        const checkboxList = document.getElementById('checkbox-list');
-        const tags = Object.keys(all_data);
-        function renderCheckboxes() {{
-            checkboxList.innerHTML = '';
-            tags.forEach(tag => {{
-                let cb = document.createElement('input');
-                cb.type = 'checkbox';
-                cb.id = 'cb-'+btoa(tag);
-                cb.value = tag;
-                cb.checked = false;
-                checkboxList.appendChild(cb);
-                let label = document.createElement('label');
-                label.innerHTML = '&nbsp;' + tag;
-                label.htmlFor = cb.id;
-                checkboxList.appendChild(label);
-                checkboxList.appendChild(document.createElement('br'));
-            }});
-        }}
-        renderCheckboxes();
-
-        // Select all / none
-        document.getElementById("select-all").onclick = function() {{
-            document.querySelectorAll('#checkbox-list input[type=checkbox]').forEach(cb => cb.checked = true);
-        }};
-        document.getElementById("select-none").onclick = function() {{
-            document.querySelectorAll('#checkbox-list input[type=checkbox]').forEach(cb => cb.checked = false);
-        }};
-
-        // Tracé des graphes
-        function plotGraphs() {{
-            const selectedTags = Array.from(document.querySelectorAll('#checkbox-list input:checked')).map(cb => cb.value);
-            const samePlot = document.getElementById('same-plot').checked;
-            const container = document.getElementById('plot-container');
-            container.innerHTML = '';
-
-            if (selectedTags.length === 0) {{
-                container.innerHTML = "<p>Aucun tag sélectionné.</p>";
-                return;
-            }}
-
-            if (samePlot) {{
-                let traces = [];
-                selectedTags.forEach(tag => {{
-                    let values = all_data[tag];
-                    traces.push({{
-                        x: Array.from({{length: values.length}}, (_, i) => i),
-                        y: values,
-                        type: 'scatter',
-                        mode: 'lines+markers',
-                        name: tag,
-                        yaxis: 'y'
-                    }});
-                }});
-                let layout = {{
-                    paper_bgcolor: "#181c21", plot_bgcolor: "#20242b",
-                    title: 'Tags superposés',
-                    xaxis: {{title: 'Index de la trame', color:'#fff'}},
-                    yaxis: {{title: 'Valeur', color:'#fff'}},
-                    legend: {{font:{{color:'white'}}}},
-                    margin: {{t: 60, l: 65, r:32, b: 50}},
-                    autosize:true
-                }};
-                let div = document.createElement('div');
-                div.style.width = "100%"; div.style.minHeight = "580px";
-                container.appendChild(div);
-                Plotly.newPlot(div, traces, layout, {{responsive:true, displaylogo:false}});
-            }} else {{
-                selectedTags.forEach(tag => {{
-                    let values = all_data[tag];
-                    let isDelay = tag.toLowerCase().includes("delay");
-                    let div = document.createElement('div');
-                    div.style.width = "100%"; div.style.minHeight = "540px";
-                    container.appendChild(div);
-
-                    // ---------- SPECIAL DELAY ----------
-                    if (isDelay && values.length > 0) {{
-                        let mean = values.reduce((a,b) => a+b, 0)/values.length;
-                        let percent_nonzero = 100*values.filter(v => v !== 0).length/values.length;
-                        let stats_html = `<span class="stats-box">
-                            <b>Statistiques</b><br/>
-                            Moyenne : ${{mean.toFixed(2)}}<br/>
-                            Retards ≠0 : ${{percent_nonzero.toFixed(1)}}%
-                        </span>`;
-                        let supTitle = `<div class="plot-header"><span style="color:#97eafc;">${{tag}}</span></div>`;
-                        // Ajoute le texte d'infos/statistiques
-                        div.innerHTML = supTitle + stats_html;
-                        // Crée un sous-div pour Plotly
-                        let plotdiv = document.createElement('div');
-                        plotdiv.style.width = "100%";
-                        plotdiv.style.minHeight = "540px";
-                        div.appendChild(plotdiv);
-
-                        // Histogramme Delay (avec annotations verticales)
-                        let counts = values.reduce((acc, v) => (acc[v]=1+(acc[v]||0), acc), {{}});
-                        let xVals = Object.keys(counts).map(Number).sort((a,b)=>a-b);
-                        let yVals = xVals.map(x=>counts[x]);
-                        // Data
-                        let figData = [
-                            {{
-                                x: Array.from({{length: values.length}}, (_, i) => i),
-                                y: values, type:"scatter", mode:"lines+markers",
-                                marker:{{color:"#63b2ea"}},
-                                name:"Série temporelle"
-                            }},
-                            {{
-                                x: xVals,
-                                y: yVals,
-                                type:"bar",
-                                marker:{{
-                                    line:{{width:1,color:"#fff"}},
-                                    color:"#1f77b4"
-                                }},
-                                name:"Histogramme",
-                                xaxis:"x2",
-                                yaxis:"y2",
-                                showlegend:false
-                            }}
-                        ];
-                        let annots = yVals.map((yv, i) => {{
-                            let angle = (yv>=10)? 90 : 0;
-                            let y_text = ((yv>=1000)? 18.6 : (yv >=100 ? 18.9 :(yv>=20?19.1: yv-(yv>=10?0.9:0.7))));
-                            return {{
-                                x: xVals[i], y: y_text,
-                                yanchor:"bottom", text: yv.toString(), showarrow:false,
-                                xref:"x2", yref:"y2", textangle:angle,
-                                font:{{color:"white",size:10}}
-                            }};
-                        }});
-
-                        let figLayout = {{
-                            paper_bgcolor: "#181c21", plot_bgcolor: "#20242b",
-                            title: `Analyse complète pour :  ${{tag}}`,
-                            grid:{{rows:1, columns:2, pattern:"independent"}},
-                            xaxis: {{domain:[0.0,0.47],title:"Index de la trame",color:'#fff', automargin:true}},
-                            yaxis: {{domain:[0,1],title:tag,color:'#fff', automargin:true}},
-                            xaxis2: {{domain:[0.53,1.0],title:tag,color:'#fff', automargin:true}},
-                            yaxis2: {{domain:[0,1],title:"Nombre d'occurrences",color:'#fff',range:[0,20], automargin:true}},
-                            annotations: annots,
-                            showlegend:false,
-                            margin:{{t:90, b:46, l:66, r:38}},
-                            autosize:true
-                        }};
-                        Plotly.newPlot(plotdiv, figData, figLayout, {{responsive:true, displaylogo:false}});
-                    }} else if (values.length > 0) {{
-                    // ---------- STANDARD / NON-DELAY ----------
-                        let supTitle = `<div class="plot-header">Tag&nbsp;<span style="color:#97eafc;"> ${{tag}}</span></div>`;
-                        div.innerHTML = supTitle;
-                        let figData = [
-                            {{
-                                x: Array.from({{length: values.length}}, (_, i) => i),
-                                y: values,
-                                type:"scatter", mode:"lines+markers",
-                                marker:{{color:"#63b2ea"}},
-                                name:"Série temporelle"
-                            }},
-                            {{
-                                x: values,
-                                type:"histogram",
-                                marker:{{line:{{width:1, color:"#fff"}},color:"#1f77b4"}},
-                                name:"Histogramme",
-                                xaxis:"x2", yaxis:"y2"
-                            }}
-                        ];
-                        let figLayout = {{
-                            paper_bgcolor: "#181c21", plot_bgcolor: "#20242b",
-                            title: `Analyse pour :  ${{tag}}`,
-                            grid:{{rows:1, columns:2, pattern:"independent"}},
-                            xaxis: {{domain:[0.0,0.47],title:"Index de la trame", color:'#fff', automargin:true}},
-                            yaxis: {{domain:[0,1],title:tag, color:'#fff', automargin:true}},
-                            xaxis2: {{domain:[0.53,1.0],title:tag, color:'#fff', automargin:true}},
-                            yaxis2: {{domain:[0,1],title:"Nombre d'occurrences", color:'#fff', automargin:true}},
-                            showlegend:false,
-                            margin:{{t:70, b:45, l:58, r:36}},
-                            autosize:true
-                        }};
-                        Plotly.newPlot(div, figData, figLayout, {{responsive:true, displaylogo:false}});
-                    }}
-                }});
-            }}
-        }}
-
-        document.getElementById('plot-btn').onclick = plotGraphs;
-
-        // Option : rendre le plot auto au chargement si tu veux
-        // window.onload = () => plotGraphs();
-        </script>
-    </body>
-    </html>
-    '''
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_template)
-        print(f"Fichier HTML interactif généré : {output_path}")
+        import rsi_parser
+        from rsi_export import export_to_html_interactif
+        # Durée de l'export ajoutée au diagnostic de l'analyse, créé s'il n'existe pas encore
+        if self.data.parse_stats is None:
+            self.data.parse_stats = rsi_parser.ParseStats()
+        with self.data.parse_stats.stage("export"):
+            export_to_html_interactif(self.shown, output_path, max_points=self.max_plot_points)
+
+
+def _preload_modules(ready=None):
+    # Exécuté hors du thread Tk : ready est levé dès que les modules de STARTUP_MODULES et tkinterhtml sont importés
+    import importlib
+    try:
+        for name in STARTUP_MODULES:
+            importlib.import_module(name)
+        try:
+            importlib.import_module("tkinterhtml")
+        except ImportError:
+            pass
+    finally:
+        # Même en cas d'échec : l'import refait dans le thread Tk affiche alors l'erreur au lieu de bloquer le démarrage
+        if ready is not None:
+            ready.set()
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
 
 
 if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Analyseur de log KUKA RSI")
+    arg_parser.add_argument("--startup-time", action="store_true",
+                            help="affiche le temps jusqu'à l'apparition de la fenêtre puis quitte")
+    args = arg_parser.parse_args()
     app = KukaRsiLogViewer()
+    if args.startup_time:
+        def _report_startup():
+            if app.startup_s is None:
+                app.after(10, _report_startup)
+                return
+            print(f"Fenêtre affichée en {app.startup_s:.3f} s")
+            app.destroy()
+        app.after(10, _report_startup)
     app.mainloop()
@@ -0,0 +1,269 @@
+import re
+import warnings
+import numpy as np
+
+# Vitesse programmée des déplacements RAPID (mm/min)
+RAPID_FEEDRATE = 12000.0
+# Types de déplacement
+LINEAR, ARC = 0, 1
+# Erreur de corde maximale (mm) quand un arc est remplacé par des segments (index de distance exacte)
+ARC_CHORD_TOLERANCE_MM = 0.001
+# Taille des blocs de texte lus à la fois
+READ_CHUNK_CHARS = 1 << 23
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+# Instructions qui changent l'état du parcours, rares devant les GOTO :
+#   RAPID ; FEDRAT/ [MMPM,] f ; INDIRV/ u, v, w (direction de départ du mouvement suivant) ;
+#   CIRCLE/ xc, yc, zc, [i, j, k,] r[, ...] : le GOTO suivant va en arc jusqu'à son point, dans le sens direct
+#   autour de l'axe (i, j, k), ou à défaut dans le sens donné par INDIRV (sinon autour de Z)
+APT_CONTROL = re.compile(
+    rf'RAPID'
+    rf'|FEDRAT(?:\s*/\s*(?:[A-Z]+\s*,\s*)?(?P<feed>{_NUMBER}))?'
+    rf'|INDIRV\s*/\s*(?P<indirv>{_NUMBER}\s*,\s*{_NUMBER}\s*,\s*{_NUMBER})'
+    rf'|CIRCLE\s*/\s*(?P<circle>{_NUMBER}(?:\s*,\s*{_NUMBER})*)'
+)
+# GOTO/ x, y, z[, i, j, k] : les trois premiers champs, convertis ensemble par NumPy
+APT_GOTO = re.compile(r'GOTO\s*/([^,\n]*,[^,\n]*,[^,\n]*)')
+GOTO_NUMBERS = re.compile(rf'^\s*({_NUMBER})\s*,\s*({_NUMBER})\s*,\s*({_NUMBER})')
+
+def rotation_matrix(rotation_deg):
+    """Matrice de rotation Rz @ Ry @ Rx pour des angles (rz, ry, rx) en degrés."""
+    alpha, beta, gamma = np.radians(rotation_deg)
+    Rz = np.array([[np.cos(alpha), -np.sin(alpha), 0], [np.sin(alpha), np.cos(alpha), 0], [0, 0, 1]])
+    Ry = np.array([[np.cos(beta), 0, np.sin(beta)], [0, 1, 0], [-np.sin(beta), 0, np.cos(beta)]])
+    Rx = np.array([[1, 0, 0], [0, np.cos(gamma), -np.sin(gamma)], [0, np.sin(gamma), np.cos(gamma)]])
+    return Rz @ Ry @ Rx
+
+
+class ToolPath:
+    """Parcours APT en tableaux, un mouvement par ligne : début, fin, vitesse programmée (mm/min, NaN si inconnue),
+    RAPID, type (LINEAR ou ARC) et, pour les arcs (dans l'ordre des mouvements ARC), centre et axe unitaire."""
+
+    def __init__(self, starts, ends, feedrates, rapid, motion=None, arc_centers=None, arc_axes=None):
+        self.starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+        self.ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+        self.feedrates = np.asarray(feedrates, dtype=np.float64)
+        self.rapid = np.asarray(rapid, dtype=bool)
+        self.motion = np.zeros(len(self.starts), dtype=np.int8) if motion is None else np.asarray(motion, dtype=np.int8)
+        self.arc_centers = np.empty((0, 3)) if arc_centers is None else np.asarray(arc_centers, dtype=np.float64).reshape(-1, 3)
+        self.arc_axes = np.empty((0, 3)) if arc_axes is None else np.asarray(arc_axes, dtype=np.float64).reshape(-1, 3)
+        self._arcs = None
+
+    @classmethod
+    def from_segments(cls, path_segments):
+        """Parcours à partir d'une liste de segments {"start", "end", "feedrate", "rapid"} (lignes droites)."""
+        return cls(
+            [segment['start'] for segment in path_segments], [segment['end'] for segment in path_segments],
+            [np.nan if segment['feedrate'] is None else segment['feedrate'] for segment in path_segments],
+            [segment.get('rapid', False) for segment in path_segments],
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def speeds(self):
+        """Vitesse programmée de chaque mouvement (mm/s)."""
+        return self.feedrates / 60.0
+
+    @property
+    def arc_index(self):
+        return np.flatnonzero(self.motion == ARC)
+
+    def _arc_frames(self):
+        # Repère de chaque arc : centre, axe, direction du début (u) et sa perpendiculaire (w = axe x u),
+        # rayons et hauteurs le long de l'axe au début et à la fin (hélice), angle parcouru dans le sens direct
+        if self._arcs is None:
+            index = self.arc_index
+            center, axis = self.arc_centers, self.arc_axes
+            a, b = self.starts[index] - center, self.ends[index] - center
+            h0, h1 = np.einsum('ij,ij->i', a, axis), np.einsum('ij,ij->i', b, axis)
+            u, v = a - h0[:, None] * axis, b - h1[:, None] * axis
+            r0, r1 = np.linalg.norm(u, axis=1), np.linalg.norm(v, axis=1)
+            # Départ sur le centre ou sur l'axe (r0 nul) : arc dégénéré, écarté par read_apt
+            u = np.divide(u, r0[:, None], out=np.zeros_like(u), where=r0[:, None] > 0)
+            w = np.cross(axis, u)
+            theta = np.arctan2(np.einsum('ij,ij->i', v, w), np.einsum('ij,ij->i', v, u))
+            # Fin confondue avec le début : cercle complet
+            theta = np.where(theta <= 1e-12, theta + 2 * np.pi, theta)
+            self._arcs = {"center": center, "axis": axis, "u": u, "w": w, "r0": r0, "r1": r1, "h0": h0, "h1": h1,
+                          "theta": theta, "position": np.full(len(self), -1, dtype=np.int64)}
+            self._arcs["position"][index] = np.arange(len(index))
+        return self._arcs
+
+    @property
+    def lengths(self):
+        """Longueur de chaque mouvement (mm), le long de l'arc pour les arcs."""
+        lengths = np.linalg.norm(self.ends - self.starts, axis=1)
+        if len(self.arc_centers):
+            arcs = self._arc_frames()
+            lengths[self.arc_index] = np.hypot(arcs["theta"] * (arcs["r0"] + arcs["r1"]) / 2, arcs["h1"] - arcs["h0"])
+        return lengths
+
+    def arc_points(self, motion_index, fraction):
+        """Points (n, 3) des arcs motion_index à la fraction [0, 1] de leur parcours."""
+        arcs = self._arc_frames()
+        k = arcs["position"][motion_index]
+        angle = fraction * arcs["theta"][k]
+        radius = arcs["r0"][k] + fraction * (arcs["r1"][k] - arcs["r0"][k])
+        height = arcs["h0"][k] + fraction * (arcs["h1"][k] - arcs["h0"][k])
+        return (arcs["center"][k] + height[:, None] * arcs["axis"][k]
+                + radius[:, None] * (np.cos(angle)[:, None] * arcs["u"][k] + np.sin(angle)[:, None] * arcs["w"][k]))
+
+    def chords(self, tolerance=ARC_CHORD_TOLERANCE_MM):
+        """(débuts, fins, mouvement) des segments droits du parcours, les arcs découpés en cordes
+        à moins de tolerance de l'arc."""
+        pieces = np.ones(len(self), dtype=np.int64)
+        index = self.arc_index
+        if len(index):
+            arcs = self._arc_frames()
+            radius = np.maximum(arcs["r0"], arcs["r1"])
+            # Angle maximal d'une corde dont la flèche reste sous la tolérance
+            step = 2 * np.arccos(np.clip(1 - tolerance / np.maximum(radius, tolerance), -1.0, 1.0))
+            pieces[index] = np.maximum(np.ceil(arcs["theta"] / step), 1).astype(np.int64)
+        motion = np.repeat(np.arange(len(self), dtype=np.int32), pieces)
+        if not len(index):
+            return self.starts, self.ends, motion
+        first = np.concatenate(([0], np.cumsum(pieces)[:-1]))
+        rank = np.arange(len(motion)) - first[motion]
+        starts, ends = self.starts[motion], self.ends[motion]
+        on_arc = self.motion[motion] == ARC
+        arc_motion, arc_rank, arc_pieces = motion[on_arc], rank[on_arc], pieces[motion[on_arc]]
+        starts[on_arc] = self.arc_points(arc_motion, arc_rank / arc_pieces)
+        ends[on_arc] = self.arc_points(arc_motion, (arc_rank + 1) / arc_pieces)
+        # Extrémités exactes (pas d'écart d'arrondi avec les mouvements voisins)
+        starts[first[index]] = self.starts[index]
+        ends[first[index] + pieces[index] - 1] = self.ends[index]
+        return starts, ends, motion
+
+
+def as_toolpath(path):
+    """ToolPath tel quel, ou construit à partir d'une liste de segments."""
+    return path if isinstance(path, ToolPath) else ToolPath.from_segments(path)
+
+
+def _goto_points(fields):
+    # Coordonnées (n, 3) des GOTO, converties d'un bloc ; ligne par ligne si l'une n'est pas numérique (ignorée)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            points = np.fromstring(",".join(fields), sep=",")
+    except ValueError:
+        points = None
+    if points is None or len(points) != 3 * len(fields):
+        rows = [GOTO_NUMBERS.match(text) for text in fields]
+        points = np.array([[float(v) for v in row.groups()] for row in rows if row], dtype=np.float64)
+    return points.reshape(-1, 3)
+
+
+def read_apt(filepath, offset_translation=(0, 0, 0), offset_rotation_deg=(0, 0, 0), rapid_feedrate=RAPID_FEEDRATE):
+    """Lit un programme APT par blocs en un ToolPath, repère du programme tourné (rz, ry, rx en degrés) puis translaté.
+
+    Le premier GOTO fixe le point de départ ; chaque GOTO suivant ajoute un mouvement, en arc s'il suit un CIRCLE.
+    """
+    blocks, counts, feedrates, rapid, arcs = [], [], [], [], []
+    total = 0
+    feedrate, is_rapid, circle, direction = np.nan, False, None, None
+
+    def add_gotos(text, start, end):
+        # GOTO entre deux instructions d'état : même vitesse et même mode pour tous
+        nonlocal total, circle, direction
+        points = _goto_points(APT_GOTO.findall(text, start, end))
+        if not len(points):
+            return
+        if circle is not None:
+            arcs.append((total, circle, direction))
+        circle, direction = None, None
+        blocks.append(points)
+        counts.append(len(points))
+        feedrates.append(rapid_feedrate if is_rapid else feedrate)
+        rapid.append(is_rapid)
+        total += len(points)
+
+    with open(filepath, 'r', encoding='latin-1') as f:
+        tail = ""
+        while True:
+            block = f.read(READ_CHUNK_CHARS)
+            text = tail + block
+            if block:
+                # Ligne coupée en fin de bloc : reprise avec le bloc suivant
+                cut = text.rfind("\n") + 1
+                text, tail = text[:cut], text[cut:]
+            position = 0
+            for match in APT_CONTROL.finditer(text):
+                add_gotos(text, position, match.start())
+                position = match.end()
+                keyword = match.group(0)[0]
+                if keyword == 'R':
+                    is_rapid = True
+                elif keyword == 'F':
+                    is_rapid = False
+                    if match.group('feed') is not None:
+                        feedrate = float(match.group('feed'))
+                elif keyword == 'I':
+                    direction = [float(v) for v in match.group('indirv').split(',')]
+                else:
+                    circle = [float(v) for v in match.group('circle').split(',')]
+            add_gotos(text, position, len(text))
+            if not block:
+                break
+
+    rotation = rotation_matrix(offset_rotation_deg)
+    translation = np.asarray(offset_translation, dtype=np.float64)
+    # Changement de repère de tous les points en un seul produit matriciel
+    points = (np.concatenate(blocks) if blocks else np.empty((0, 3))) @ rotation.T + translation
+    if len(points) < 2:
+        return ToolPath(np.empty((0, 3)), np.empty((0, 3)), [], [])
+    starts, ends = points[:-1], points[1:]
+    feedrates = np.repeat(feedrates, counts)[1:]
+    rapid = np.repeat(rapid, counts)[1:]
+    motion = np.zeros(len(starts), dtype=np.int8)
+    centers, axes = [], []
+    for goto, circle, direction in arcs:
+        # Le mouvement i va du GOTO i au GOTO i + 1
+        i = goto - 1
+        if i < 0 or len(circle) < 4:
+            continue
+        center = np.array(circle[:3])
+        if len(circle) >= 7:
+            axis = np.array(circle[3:6])
+        elif direction is not None:
+            # Sens donné par la direction de départ : axe = rayon au départ x tangente
+            axis = np.cross(starts[i] - (rotation @ center + translation), rotation @ np.array(direction))
+            axis = rotation.T @ axis
+        else:
+            axis = np.array([0.0, 0.0, 1.0])
+        norm = np.linalg.norm(axis)
+        if norm == 0:
+            continue
+        motion[i] = ARC
+        centers.append(center)
+        axes.append(axis / norm)
+    if centers:
+        centers = np.array(centers) @ rotation.T + translation
+        axes = np.array(axes) @ rotation.T
+        path = ToolPath(starts, ends, feedrates, rapid, motion, centers, axes)
+        # Arc dégénéré (départ sur le centre ou sur l'axe) : ligne droite
+        frames = path._arc_frames()
+        degenerate = ~(frames["r0"] > 0)
+        if degenerate.any():
+            keep = ~degenerate
+            motion[path.arc_index[degenerate]] = LINEAR
+            return ToolPath(starts, ends, feedrates, rapid, motion, centers[keep], axes[keep])
+        return path
+    return ToolPath(starts, ends, feedrates, rapid, motion)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    arg_parser = argparse.ArgumentParser(description="Lecture d'un programme APT : mouvements, arcs et longueur du parcours")
+    arg_parser.add_argument("aptfile")
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    path = read_apt(args.aptfile)
+    elapsed = time.perf_counter() - t0
+    lengths = path.lengths
+    print(f"{len(path)} mouvements dont {len(path.arc_index)} arcs et {int(path.rapid.sum())} RAPID, lus en {elapsed:.2f} s")
+    print(f"Longueur du parcours : {lengths.sum():.1f} mm (dont {lengths[path.motion == ARC].sum():.1f} mm en arc)")
@@ -0,0 +1,186 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from rsi_cache import DEFAULT_CACHE_DIR, ParseCache, load_or_parse
+from rsi_downsample import DEFAULT_MAX_POINTS
+from rsi_export import plotly_script_tag, export_to_html_interactif
+from rsi_parser import ParseStats
+from rsi_stats import compute_all_stats
+from rsi_store import FrameStore
+from rsi_timing import analyze_timing
+
+# Traitement par lots sans interface graphique : ni tkinter ni tkinterhtml ne sont importés ici
+
+
+def find_logs(patterns, recursive=False):
+    """Fichiers .log désignés par une liste de dossiers, fichiers ou motifs glob (triés, sans doublon)."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.log") if recursive else os.path.join(pattern, "*.log")
+        for path in glob.glob(pattern, recursive=recursive):
+            if os.path.isfile(path):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def output_names(logs):
+    """Nom de base des sorties de chaque log ; suffixe _2, _3... si deux logs portent le même nom."""
+    names = {}
+    used = set()
+    for path in logs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, i = stem, 1
+        while name in used:
+            i += 1
+            name = f"{stem}_{i}"
+        used.add(name)
+        names[path] = name
+    return names
+
+
+def save_columns(store, path):
+    """Écrit les colonnes du FrameStore dans un .npz : values_i, frames_i (tags non denses) et index des tags."""
+    arrays = {}
+    index = []
+    for i, (tag, (start, frames, values)) in enumerate(store.export_columns().items()):
+        arrays[f"values_{i}"] = values
+        if frames is not None:
+            arrays[f"frames_{i}"] = frames
+        index.append({"tag": tag, "start": start, "dense": frames is None})
+    arrays["index"] = np.array(json.dumps({"frame_count": store.frame_count, "dtype": store.dtype.str, "columns": index}))
+    np.savez(path, **arrays)
+
+
+def load_columns(path, store=None):
+    """Relit un .npz écrit par save_columns dans un FrameStore."""
+    with np.load(path) as data:
+        index = json.loads(str(data["index"]))
+        columns = {}
+        for i, column in enumerate(index["columns"]):
+            frames = None if column["dense"] else data[f"frames_{i}"]
+            columns[column["tag"]] = (column["start"], frames, data[f"values_{i}"])
+        if store is None:
+            # Colonnes de dtypes variés (entiers compacts) : on reprend le dtype flottant du FrameStore d'origine
+            store = FrameStore(index.get("dtype", np.float64))
+        store.clear()
+        store.merge_columns(columns, index["frame_count"])
+    return store.finalize()
+
+
+def process_log(task):
+    """Analyse un log et écrit rapport HTML, colonnes .npz et statistiques JSON ; exécuté dans un processus."""
+    filepath, out_base, options = task
+    t0 = time.perf_counter()
+    cache = ParseCache(options["cache_dir"]) if options["cache_dir"] else None
+    store = load_or_parse(filepath, FrameStore(options["dtype"]), cache=cache, fast=options["fast"], workers=1)
+    if not store:
+        raise ValueError("aucune trame XML valide")
+    t_parse = time.perf_counter() - t0
+    parse_stats = store.parse_stats or ParseStats()
+    with parse_stats.stage("export"):
+        export_to_html_interactif(store, out_base + ".html", max_points=options["max_points"],
+                                  plotly_js=options["plotly_js"])
+    save_columns(store, out_base + ".npz")
+    summary = {
+        "source": filepath,
+        "frame_count": store.frame_count,
+        "source_bytes": store.source_bytes,
+        "parse": parse_stats.to_dict(),
+        "timing": analyze_timing(store).to_dict(),
+        "tags": compute_all_stats(store),
+    }
+    with open(out_base + ".stats.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=1)
+    return {
+        "frames": store.frame_count,
+        "tags": len(store),
+        "parse_s": t_parse,
+        "malformed_lines": parse_stats.malformed_lines,
+        "total_s": time.perf_counter() - t0,
+    }
+
+
+def _outputs(out_base):
+    return [out_base + ext for ext in (".html", ".npz", ".stats.json")]
+
+
+def _up_to_date(filepath, out_base):
+    source_mtime = os.path.getmtime(filepath)
+    return all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in _outputs(out_base))
+
+
+def run_batch(patterns, output_dir, jobs=None, recursive=False, force=False, fast=True, dtype=np.float64,
+              max_points=DEFAULT_MAX_POINTS, plotly_js="directory", cache_dir=None):
+    """Traite tous les logs trouvés, un log par processus ; renvoie {chemin: résultat ou message d'erreur}."""
+    logs = find_logs(patterns, recursive)
+    os.makedirs(output_dir, exist_ok=True)
+    if plotly_js == "directory":
+        # Une seule copie de plotly.js (plotly_bundle_name) pour tout le dossier, écrite avant de lancer les processus
+        plotly_script_tag(plotly_js, os.path.join(output_dir, "index.html"))
+    options = {"fast": fast, "dtype": np.dtype(dtype).str, "max_points": max_points,
+               "plotly_js": plotly_js, "cache_dir": cache_dir}
+    names = output_names(logs)
+    tasks = []
+    results = {}
+    for path in logs:
+        out_base = os.path.join(output_dir, names[path])
+        if not force and _up_to_date(path, out_base):
+            results[path] = "à jour"
+            continue
+        tasks.append((path, out_base, options))
+    print(f"{len(logs)} log(s) trouvé(s), {len(tasks)} à traiter, {len(logs) - len(tasks)} déjà à jour")
+    if not tasks:
+        return results
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = {executor.submit(process_log, task): task[0] for task in tasks}
+        for future in as_completed(futures):
+            path = futures[future]
+            done += 1
+            try:
+                result = future.result()
+            except Exception as e:
+                results[path] = f"erreur : {e}"
+                print(f"[{done}/{len(tasks)}] ÉCHEC {path} : {e}")
+                continue
+            results[path] = result
+            print(f"[{done}/{len(tasks)}] {path} : {result['frames']} trames, {result['tags']} tags "
+                  f"en {result['total_s']:.2f} s, {result['malformed_lines']} lignes malformées")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(
+        description="Traitement par lots de logs KUKA RSI : rapport HTML, colonnes .npz et statistiques JSON par log")
+    arg_parser.add_argument("inputs", nargs="+", help="dossiers, fichiers .log ou motifs glob")
+    arg_parser.add_argument("-o", "--output-dir", default="rapports", help="dossier des fichiers générés")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="nombre de logs traités en parallèle")
+    arg_parser.add_argument("-r", "--recursive", action="store_true", help="parcourt aussi les sous-dossiers")
+    arg_parser.add_argument("--force", action="store_true", help="retraite les logs dont les sorties sont à jour")
+    arg_parser.add_argument("--no-fast", action="store_true", help="désactive les gabarits de trame (ElementTree seul)")
+    arg_parser.add_argument("--float32", action="store_true", help="stocke les valeurs en float32")
+    arg_parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS,
+                            help="points par courbe dans la vue d'ensemble des rapports")
+    arg_parser.add_argument("--plotly-js", default="directory",
+                            help="inline, directory (un plotly-<version>.min.js partagé), cdn ou chemin d'un plotly.min.js")
+    arg_parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                            help="réutilise le cache disque des logs analysés (dossier optionnel)")
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = run_batch(
+        args.inputs, args.output_dir, jobs=args.jobs, recursive=args.recursive, force=args.force,
+        fast=not args.no_fast, dtype=np.float32 if args.float32 else np.float64,
+        max_points=args.max_points, plotly_js=args.plotly_js, cache_dir=args.cache,
+    )
+    failed = [path for path, result in results.items() if isinstance(result, str) and result.startswith("erreur")]
+    print(f"Terminé en {time.perf_counter() - t0:.1f} s : {len(results) - len(failed)} réussi(s), {len(failed)} échec(s)")
+    if failed:
+        sys.exit(1)
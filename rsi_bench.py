@@ -0,0 +1,229 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+import rsi_synth
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+DEFAULT_COMPARE_SCALES = (10_000, 100_000)
+# Au-delà, l'analyse ElementTree seule (référence) devient trop longue pour un banc d'essai
+MAX_ET_FRAMES = 100_000
+# Au-delà, la mesure n'est générée qu'au format .npy (le JSON devient démesuré)
+MAX_JSON_SAMPLES = 1_000_000
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "rsi_bench")
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus courant (Mo), None si la plateforme ne le fournit pas."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def _log_path(data_dir, frames, options):
+    # Les fichiers générés sont réutilisés d'une exécution à l'autre (génération déterministe)
+    key = "_".join(f"{k}{v}" for k, v in sorted(options.items()))
+    return os.path.join(data_dir, f"rsi_{frames}_{key}.log")
+
+
+def ensure_log(data_dir, frames, **options):
+    path = _log_path(data_dir, frames, options)
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        rsi_synth.generate_log(tmp, frames, **options)
+        os.replace(tmp, path)
+    return path
+
+
+def _bench_parse(task):
+    # Exécuté dans un processus neuf : le pic de mémoire ne mesure que ce cas
+    path, fast, workers, export_dir = task
+    import rsi_parser
+    from rsi_export import export_to_html_interactif
+    size = os.path.getsize(path)
+    rss_before = peak_rss_mb()
+    t0 = time.perf_counter()
+    store = rsi_parser.parse_log_file(path, fast=fast, workers=workers)
+    parse_s = time.perf_counter() - t0
+    result = {
+        "bytes": size, "frames_parsed": store.frame_count, "tags": len(store),
+        "parse_s": parse_s, "frames_per_s": store.frame_count / parse_s, "mb_per_s": size / 1e6 / parse_s,
+        "store_mb": store.nbytes / 1e6, "rss_start_mb": rss_before, "peak_rss_parse_mb": peak_rss_mb(),
+    }
+    if export_dir is not None:
+        output = os.path.join(export_dir, f"bench_{os.getpid()}.html")
+        t0 = time.perf_counter()
+        export_to_html_interactif(store, output)
+        result["export_s"] = time.perf_counter() - t0
+        result["export_mb"] = os.path.getsize(output) / 1e6
+        result["peak_rss_export_mb"] = peak_rss_mb()
+        os.remove(output)
+    return result
+
+
+def _bench_comparaison(task):
+    apt_path, json_path, npy_path = task
+    import comparaison
+    stages = {}
+    t0 = time.perf_counter()
+    segments = comparaison.parse_and_transform_apt(apt_path, comparaison.ORIGIN_OFFSET, comparaison.ORIGIN_ROTATION_DEG)
+    stages["parse_apt_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    theoretical = comparaison.densify_theoretical_path(segments, step_mm=comparaison.INTERPOLATION_STEP_MM)
+    stages["densify_s"] = time.perf_counter() - t0
+    if json_path is not None:
+        t0 = time.perf_counter()
+        comparaison.load_rsi_data(json_path)
+        stages["load_rsi_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    real = comparaison.load_rsi_data(npy_path)
+    stages["load_rsi_npy_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    trimmed = comparaison.trim_rsi_data(real, theoretical[['X', 'Y', 'Z']].iloc[0].values)
+    stages["trim_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    results = comparaison.synchronize_and_compare(theoretical, trimmed)
+    stages["compare_s"] = time.perf_counter() - t0
+    # Index des segments construit une fois, partagé par les modes exact et monotone
+    t0 = time.perf_counter()
+    index = comparaison.SegmentIndex.from_segments(segments)
+    stages["segment_index_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    exact = comparaison.compare_to_segments(segments, trimmed, index=index)
+    stages["compare_exact_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    comparaison.compare_to_segments(segments, trimmed, index=index, monotonic=True)
+    stages["compare_monotonic_s"] = time.perf_counter() - t0
+    stages.update({
+        "segments": len(segments), "theoretical_points": len(theoretical), "real_points": len(real),
+        "mean_error_mm": float(results['Positional_Error'].mean()),
+        "mean_exact_error_mm": float(exact['Positional_Error'].mean()), "peak_rss_mb": peak_rss_mb(),
+    })
+    return stages
+
+
+def _run_isolated(func, task):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(func, task).result()
+
+
+def _metadata():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": revision, "python": platform.python_version(),
+        "numpy": np.__version__, "platform": platform.platform(), "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, compare_scales=DEFAULT_COMPARE_SCALES, workers=(1,),
+                   data_dir=DEFAULT_DATA_DIR, log_options=None, export=True):
+    """Exécute les cas du banc d'essai, chacun dans un processus neuf ; renvoie {"meta": ..., "results": [...]}."""
+    os.makedirs(data_dir, exist_ok=True)
+    log_options = dict(log_options or {})
+    results = []
+
+    def record(case, **fields):
+        entry = {"case": case, **fields}
+        results.append(entry)
+        shown = {k: (round(v, 3) if isinstance(v, float) else v) for k, v in fields.items()}
+        print(f"{case} {shown}")
+
+    for frames in scales:
+        path = ensure_log(data_dir, frames, **log_options)
+        for n in workers:
+            result = _run_isolated(_bench_parse, (path, True, n, data_dir if export and n == workers[0] else None))
+            record("parse", frames=frames, workers=n, **result)
+        if frames <= MAX_ET_FRAMES:
+            record("parse_et", frames=frames, workers=1, **_run_isolated(_bench_parse, (path, False, 1, None)))
+
+    for samples in compare_scales:
+        apt_path = os.path.join(data_dir, f"apt_{samples}.aptsource")
+        json_path = os.path.join(data_dir, f"rsi_{samples}.json") if samples <= MAX_JSON_SAMPLES else None
+        npy_path = os.path.join(data_dir, f"rsi_{samples}.tcp.npy")
+        if not os.path.exists(apt_path):
+            # Parcours dense (pas de 0,01 mm) du même ordre de grandeur que la mesure
+            rsi_synth.generate_apt(apt_path, max(1, samples // 1000))
+        if json_path is not None and not os.path.exists(json_path):
+            rsi_synth.generate_rsi_json(json_path, apt_path, samples)
+        if not os.path.exists(npy_path):
+            rsi_synth.generate_rsi_columns(npy_path, apt_path, samples)
+        record("comparaison", samples=samples, **_run_isolated(_bench_comparaison, (apt_path, json_path, npy_path)))
+    return {"meta": _metadata(), "log_options": log_options, "results": results}
+
+
+def _case_key(entry):
+    return (entry["case"], entry.get("frames", entry.get("samples")), entry.get("workers"))
+
+
+# Mesures comparées à la référence : plus petit = meilleur
+_COMPARED = ("parse_s", "export_s", "export_mb", "peak_rss_parse_mb", "densify_s", "load_rsi_s", "load_rsi_npy_s", "trim_s",
+             "compare_s", "segment_index_s", "compare_exact_s",
+             "compare_monotonic_s", "peak_rss_mb")
+
+
+def compare_results(current, baseline):
+    """Lignes de comparaison (rapport courant / référence) pour les cas présents dans les deux fichiers."""
+    previous = {_case_key(e): e for e in baseline["results"]}
+    lines = []
+    for entry in current["results"]:
+        old = previous.get(_case_key(entry))
+        if old is None:
+            continue
+        ratios = [f"{k} x{entry[k] / old[k]:.2f}" for k in _COMPARED
+                  if isinstance(entry.get(k), (int, float)) and isinstance(old.get(k), (int, float)) and old[k]]
+        lines.append(f"{' '.join(str(p) for p in _case_key(entry) if p is not None)} : {', '.join(ratios)}")
+    return lines
+
+
+if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Banc d'essai : analyse, export HTML et comparaison sur données synthétiques")
+    arg_parser.add_argument("-o", "--output", default="bench_results.json", help="fichier JSON des résultats")
+    arg_parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                            help="nombres de trames des logs générés (ex. 10000,100000,1000000,10000000)")
+    arg_parser.add_argument("--compare-scales", default=",".join(map(str, DEFAULT_COMPARE_SCALES)),
+                            help="nombres d'échantillons RSI pour comparaison.py (vide pour ignorer)")
+    arg_parser.add_argument("--workers", default="1", help="nombres de processus d'analyse à tester (ex. 1,4)")
+    arg_parser.add_argument("--tags", type=int, default=16)
+    arg_parser.add_argument("--depth", type=int, default=2)
+    arg_parser.add_argument("--attr-density", type=int, default=3)
+    arg_parser.add_argument("--malformed", type=float, default=0.001)
+    arg_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="dossier des fichiers générés (réutilisés)")
+    arg_parser.add_argument("--no-export", action="store_true", help="ne mesure pas l'export HTML")
+    arg_parser.add_argument("--baseline", help="résultats précédents à comparer")
+    args = arg_parser.parse_args()
+
+    def _ints(text):
+        return tuple(int(v) for v in text.split(",") if v.strip())
+
+    report = run_benchmarks(
+        _ints(args.scales), _ints(args.compare_scales), _ints(args.workers), args.data_dir,
+        {"tags": args.tags, "depth": args.depth, "attr_density": args.attr_density, "malformed_ratio": args.malformed},
+        export=not args.no_export,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"Résultats écrits dans {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Comparaison avec {args.baseline} ({baseline['meta'].get('revision')}) :")
+        for line in compare_results(report, baseline):
+            print(f"  {line}")
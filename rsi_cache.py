@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import rsi_index
+import rsi_parser
+import rsi_stats
+from rsi_store import FrameStore
+
+CACHE_VERSION = 6
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RSI_LOGVIEWER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "kuka_rsi_logviewer")
+)
+# Taille totale maximale du cache avant éviction des entrées les moins récemment utilisées
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+# Octets lus en tête et en queue de fichier pour l'empreinte de contenu
+HASH_BYTES = 1024 * 1024
+
+MANIFEST = "manifest.json"
+# Index de trames (rsi_index.FrameIndex) relevé pendant l'analyse complète, rangé dans l'entrée du log
+INDEX = "index.npz"
+
+
+def file_fingerprint(filepath):
+    """Empreinte d'un fichier de log : chemin, taille, date de modification et hash tête/queue."""
+    st = os.stat(filepath)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        digest.update(f.read(HASH_BYTES))
+        if st.st_size > HASH_BYTES:
+            f.seek(max(st.st_size - HASH_BYTES, HASH_BYTES))
+            digest.update(f.read())
+    return {
+        "path": os.path.normcase(os.path.abspath(filepath)),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "digest": digest.hexdigest(),
+    }
+
+
+class ParseCache:
+    """Cache disque des colonnes analysées (.npy par tag + manifeste), relu par memory-map."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, filepath, dtype):
+        # Une seule entrée par fichier et par dtype : une nouvelle version remplace l'ancienne
+        path = os.path.normcase(os.path.abspath(filepath))
+        key = hashlib.sha1(f"{path}|{np.dtype(dtype).str}".encode('utf-8')).hexdigest()
+        return os.path.join(self.root, key)
+
+    def load(self, filepath, store):
+        """Remplit store depuis le cache ; renvoie False si l'entrée est absente ou périmée."""
+        entry = self._entry_dir(filepath, store.dtype)
+        manifest_path = os.path.join(entry, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return False
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest["version"] != CACHE_VERSION or manifest["fingerprint"] != file_fingerprint(filepath):
+                self._remove(entry)
+                return False
+            columns = {}
+            for column in manifest["columns"]:
+                values = np.load(os.path.join(entry, column["values"]), mmap_mode='r')
+                frames = None
+                if column["frames"] is not None:
+                    frames = np.load(os.path.join(entry, column["frames"]), mmap_mode='r')
+                columns[column["tag"]] = (column["start"], frames, values)
+        except (OSError, ValueError, KeyError, TypeError):
+            self._remove(entry)
+            return False
+        store.clear()
+        store.merge_columns(columns, manifest["frame_count"])
+        store.source_bytes = manifest["source_bytes"]
+        store.stats = manifest.get("stats", {})
+        if manifest.get("parse_stats") is not None:
+            store.parse_stats = rsi_parser.ParseStats.from_dict(manifest["parse_stats"])
+            store.parse_stats.from_cache = True
+        store.finalize()
+        # Date de dernier accès pour l'éviction LRU
+        os.utime(manifest_path)
+        return True
+
+    def save(self, filepath, store, index=None):
+        """Met en cache les colonnes de store et, s'il est fourni, l'index de trames du log."""
+        entry = self._entry_dir(filepath, store.dtype)
+        tmp = f"{entry}.tmp-{os.getpid()}"
+        self._remove(tmp)
+        os.makedirs(tmp)
+        columns = []
+        for i, (tag, (start, frames, values)) in enumerate(store.export_columns().items()):
+            column = {"tag": tag, "start": start, "values": f"c{i}.values.npy", "frames": None}
+            np.save(os.path.join(tmp, column["values"]), values)
+            if frames is not None:
+                column["frames"] = f"c{i}.frames.npy"
+                np.save(os.path.join(tmp, column["frames"]), frames)
+            columns.append(column)
+        manifest = {
+            "version": CACHE_VERSION,
+            "fingerprint": file_fingerprint(filepath),
+            "dtype": store.dtype.str,
+            "frame_count": store.frame_count,
+            "source_bytes": store.source_bytes,
+            "columns": columns,
+            "stats": store.stats,
+            "parse_stats": store.parse_stats.to_dict() if store.parse_stats is not None else None,
+            "created": time.time(),
+        }
+        if index is not None:
+            index.save(os.path.join(tmp, INDEX))
+        with open(os.path.join(tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        self._remove(entry)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def load_index(self, filepath, dtype=np.float64):
+        """Index de trames de l'entrée du log (rsi_index.FrameIndex), None s'il est absent ou périmé."""
+        entry = self._entry_dir(filepath, dtype)
+        index = rsi_index.FrameIndex.load(os.path.join(entry, INDEX), filepath)
+        if index is not None:
+            # Date de dernier accès pour l'éviction LRU
+            try:
+                os.utime(os.path.join(entry, MANIFEST))
+            except OSError:
+                pass
+        return index
+
+    def invalidate(self, filepath, dtype=np.float64):
+        self._remove(self._entry_dir(filepath, dtype))
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            entry = os.path.join(self.root, name)
+            manifest_path = os.path.join(entry, MANIFEST)
+            if not os.path.isfile(manifest_path):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+            entries.append((os.path.getmtime(manifest_path), size, entry))
+            total += size
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(entry)
+            total -= size
+
+    def _remove(self, entry):
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+def load_or_parse(filepath, store=None, cache=None, **parse_options):
+    """Relit un log depuis le cache si possible, sinon l'analyse puis met le résultat en cache (voir parse_and_cache)."""
+    if store is None:
+        store = FrameStore()
+    if cache is not None and cache.load(filepath, store):
+        return store
+    store, _ = parse_and_cache(filepath, store, cache, **parse_options)
+    return store
+
+
+def parse_and_cache(filepath, store=None, cache=None, **parse_options):
+    """Analyse complète d'un log, statistiques comprises ; renvoie (store, index de trames).
+
+    L'index (rsi_index) est relevé au passage et mis en cache avec les colonnes : rsi_index.load_window
+    l'y retrouve sans rien écrire dans le dossier du log (partages, supports en lecture seule).
+    """
+    store, index = rsi_index.parse_and_index(filepath, store, **parse_options)
+    # Statistiques calculées une fois au chargement et mises en cache avec les colonnes
+    with (store.parse_stats or rsi_parser.ParseStats()).stage("stats"):
+        rsi_stats.compute_all_stats(store)
+    if cache is not None and store:
+        try:
+            cache.save(filepath, store, index)
+        except OSError as e:
+            print(f"Mise en cache impossible pour {filepath} : {e}")
+    return store, index
@@ -0,0 +1,136 @@
+import numpy as np
+
+# Nombre de points visés par défaut pour un tracé (de l'ordre de la largeur d'un graphique en pixels)
+DEFAULT_MAX_POINTS = 4000
+
+
+def minmax_envelope(y, n_buckets):
+    """Indices (triés) du min et du max de chaque seau : pics et creux ne sont jamais perdus."""
+    n = len(y)
+    if n <= 2 * n_buckets + 2:
+        return np.arange(n)
+    bucket = -(-n // n_buckets)
+    full = (n // bucket) * bucket
+    blocks = y[:full].reshape(-1, bucket)
+    offsets = np.arange(0, full, bucket)
+    indices = [offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1), [0, n - 1]]
+    if full < n:
+        tail = y[full:]
+        indices.append([full + tail.argmin(), full + tail.argmax()])
+    return np.unique(np.concatenate(indices))
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets : indices de n_out points préservant la forme de la courbe."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Point moyen du seau suivant
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS, method="minmax"):
+    """Réduit une série à environ max_points points ; renvoie (x, y) inchangés si elle est déjà plus courte."""
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    if method == "lttb":
+        indices = lttb(x, y, max_points)
+    elif method == "minmax":
+        indices = minmax_envelope(y, max_points // 2)
+    else:
+        raise ValueError(f"Méthode de réduction inconnue : {method}")
+    return x[indices], y[indices]
+
+
+# Facteur de réduction entre deux niveaux de la pyramide min/max
+PYRAMID_FACTOR = 4
+
+
+def _reduce_level(y, min_idx, max_idx, factor):
+    # Regroupe les seaux par paquets de factor : indice du min des min et du max des max
+    n = len(min_idx)
+    full = (n // factor) * factor
+    offsets = np.arange(0, full, factor)
+    lo = min_idx[:full].reshape(-1, factor)
+    hi = max_idx[:full].reshape(-1, factor)
+    new_min = lo[np.arange(len(offsets)), y[lo].argmin(axis=1)]
+    new_max = hi[np.arange(len(offsets)), y[hi].argmax(axis=1)]
+    if full < n:
+        tail_lo, tail_hi = min_idx[full:], max_idx[full:]
+        new_min = np.append(new_min, tail_lo[y[tail_lo].argmin()])
+        new_max = np.append(new_max, tail_hi[y[tail_hi].argmax()])
+    return new_min, new_max
+
+
+class MinMaxPyramid:
+    """Pyramide multi-résolution d'une série : au niveau k, indices du min et du max de chaque seau de factor**k points.
+
+    Une requête sur une fenêtre lit le niveau le plus fin qui tient dans max_points,
+    en un temps proportionnel au nombre de points renvoyés et non à la longueur de la fenêtre.
+    """
+
+    def __init__(self, x, values, factor=PYRAMID_FACTOR, min_points=DEFAULT_MAX_POINTS // 4):
+        self.x = x
+        self.values = values
+        self.factor = factor
+        # levels[k] = (taille de seau, indices des min, indices des max) ; niveau 0 = données brutes
+        self.levels = []
+        n = len(values)
+        dtype = np.int32 if n < 2 ** 31 else np.int64
+        if n > min_points:
+            identity = np.arange(n, dtype=dtype)
+            min_idx, max_idx = _reduce_level(values, identity, identity, factor)
+            bucket = factor
+            while True:
+                self.levels.append((bucket, min_idx, max_idx))
+                if len(min_idx) <= min_points:
+                    break
+                min_idx, max_idx = _reduce_level(values, min_idx, max_idx, factor)
+                bucket *= factor
+
+    @property
+    def nbytes(self):
+        return sum(lo.nbytes + hi.nbytes for _, lo, hi in self.levels)
+
+    def index_range(self, start=None, end=None):
+        """Indices [i0, i1) des points dont l'abscisse (trame ou temps, croissante) est dans [start, end]."""
+        i0 = 0 if start is None else int(np.searchsorted(self.x, start, side='left'))
+        i1 = len(self.values) if end is None else int(np.searchsorted(self.x, end, side='right'))
+        return i0, max(i0, i1)
+
+    def query(self, start=None, end=None, max_points=DEFAULT_MAX_POINTS):
+        """(abscisses, valeurs, taille de seau) de la fenêtre, au plus ~max_points points ; seau 1 = pleine résolution."""
+        i0, i1 = self.index_range(start, end)
+        # Un point de part et d'autre pour que la courbe touche les bords de la fenêtre
+        i0, i1 = max(i0 - 1, 0), min(i1 + 1, len(self.values))
+        if i1 - i0 <= max_points:
+            return self.x[i0:i1], self.values[i0:i1], 1
+        # Niveau le plus fin dont la fenêtre tient dans factor * max_points points
+        for bucket, min_idx, max_idx in self.levels:
+            j0, j1 = i0 // bucket, -(-i1 // bucket)
+            if 2 * (j1 - j0) <= self.factor * max_points or bucket == self.levels[-1][0]:
+                break
+        lo, hi = min_idx[j0:j1], max_idx[j0:j1]
+        # Dans chaque seau, min et max dans l'ordre des abscisses
+        indices = np.empty(2 * len(lo), dtype=np.int64)
+        indices[0::2] = np.minimum(lo, hi)
+        indices[1::2] = np.maximum(lo, hi)
+        if len(indices) > max_points:
+            # Enveloppe de l'enveloppe : ramène à max_points sans perdre les extrêmes
+            indices = indices[minmax_envelope(self.values[indices], max_points // 2)]
+        return self.x[indices], self.values[indices], bucket
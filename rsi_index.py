@@ -0,0 +1,203 @@
+import json
+import os
+import sys
+import time
+import numpy as np
+import rsi_parser
+from rsi_store import FrameStore
+from rsi_timing import frame_ipoc
+
+# Une entrée d'index toutes les DEFAULT_EVERY trames : au plus ~2x ce nombre de trames relues par fenêtre
+DEFAULT_EVERY = 1024
+INDEX_VERSION = 1
+
+
+class FrameIndex:
+    """Index d'un log : position en octets et IPOC d'une trame sur `every`, pour relire une fenêtre sans tout analyser."""
+
+    def __init__(self, frames, offsets, ipoc, frame_count, source_bytes, every, source=None):
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.ipoc = np.asarray(ipoc, dtype=np.float64)
+        self.frame_count = frame_count
+        self.source_bytes = source_bytes
+        self.every = every
+        # (taille, date de modification) du log indexé
+        self.source = source
+
+    @classmethod
+    def build(cls, filepath, store, checkpoints, every=DEFAULT_EVERY):
+        """Index à partir des points de reprise relevés par parse_log_file et des IPOC du FrameStore."""
+        if checkpoints:
+            frames, offsets = (np.array(c, dtype=np.int64) for c in zip(*checkpoints))
+        else:
+            frames = offsets = np.empty(0, dtype=np.int64)
+        ipoc = frame_ipoc(store)[frames] if len(frames) else np.empty(0)
+        return cls(frames, offsets, ipoc, store.frame_count, store.source_bytes, every, _source_id(filepath))
+
+    def save(self, path):
+        meta = {
+            "version": INDEX_VERSION, "frame_count": self.frame_count, "source_bytes": self.source_bytes,
+            "every": self.every, "source": self.source,
+        }
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(tmp, frames=self.frames, offsets=self.offsets, ipoc=self.ipoc, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, filepath):
+        """Index enregistré dans path s'il existe et correspond toujours au log filepath, sinon None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta["version"] != INDEX_VERSION or meta["source"] != _source_id(filepath):
+                    return None
+                return cls(data["frames"], data["offsets"], data["ipoc"], meta["frame_count"],
+                           meta["source_bytes"], meta["every"], meta["source"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def byte_range(self, start_frame, end_frame):
+        """(trame, octet) du point de reprise précédant start_frame et octet de fin couvrant end_frame."""
+        k = int(np.searchsorted(self.frames, start_frame, side='right')) - 1
+        if k < 0:
+            first_frame, start = 0, 0
+        else:
+            first_frame, start = int(self.frames[k]), int(self.offsets[k])
+        k_end = int(np.searchsorted(self.frames, end_frame, side='right'))
+        end = int(self.offsets[k_end]) if k_end < len(self.frames) else self.source_bytes
+        return first_frame, start, end
+
+    def frames_for_ipoc(self, start_ipoc, end_ipoc):
+        """Plage de trames (large, à la résolution de l'index) contenant les IPOC [start_ipoc, end_ipoc]."""
+        # On ne retient que les points de reprise dont l'IPOC est connu et croissant depuis le début
+        valid = ~np.isnan(self.ipoc)
+        frames, ipoc = self.frames[valid], self.ipoc[valid]
+        k = int(np.searchsorted(ipoc, start_ipoc, side='right')) - 1
+        start_frame = int(frames[k]) if k >= 0 else 0
+        k_end = int(np.searchsorted(ipoc, end_ipoc, side='right'))
+        end_frame = int(frames[k_end]) if k_end < len(frames) else self.frame_count - 1
+        return start_frame, end_frame
+
+
+def _source_id(filepath):
+    st = os.stat(filepath)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def parse_and_index(filepath, store=None, every=DEFAULT_EVERY, **parse_options):
+    """Analyse complète du log en relevant un point de reprise toutes les every trames ; renvoie (store, index)."""
+    checkpoints = []
+    store = rsi_parser.parse_log_file(filepath, store, checkpoints=checkpoints, checkpoint_every=every,
+                                      **parse_options)
+    return store, FrameIndex.build(filepath, store, checkpoints, every)
+
+
+def cached_index(filepath, dtype=np.float64, fast=True, cache=None, **parse_options):
+    """Index du log conservé dans le cache des logs analysés (ParseCache, dossier par défaut si cache est None).
+
+    S'il manque, le log est analysé en entier une fois et ses colonnes sont mises en cache avec l'index :
+    rien n'est écrit dans le dossier du log.
+    """
+    from rsi_cache import ParseCache, parse_and_cache
+    if cache is None:
+        cache = ParseCache()
+    index = cache.load_index(filepath, dtype)
+    if index is None:
+        _, index = parse_and_cache(filepath, FrameStore(dtype), cache, fast=fast, **parse_options)
+    return index
+
+
+def load_window(filepath, start_frame=None, end_frame=None, start_ipoc=None, end_ipoc=None,
+                store=None, fast=True, index=None, cache=None):
+    """Charge uniquement les trames [start_frame, end_frame] ou dont l'IPOC (croissant) est dans [start_ipoc, end_ipoc].
+
+    Le FrameStore garde la numérotation globale des trames (colonnes commençant à start_frame).
+    L'index est lu dans le cache (voir cached_index) ; sans index valide, le log est d'abord analysé en entier une fois.
+    """
+    if store is None:
+        store = FrameStore()
+    if index is None:
+        index = cached_index(filepath, store.dtype, fast, cache)
+    by_ipoc = start_ipoc is not None or end_ipoc is not None
+    if by_ipoc:
+        start_frame, end_frame = index.frames_for_ipoc(
+            -np.inf if start_ipoc is None else start_ipoc, np.inf if end_ipoc is None else end_ipoc)
+    start_frame = 0 if start_frame is None else max(int(start_frame), 0)
+    end_frame = index.frame_count - 1 if end_frame is None else min(int(end_frame), index.frame_count - 1)
+
+    first_frame, start, end = index.byte_range(start_frame, end_frame)
+    window = rsi_parser.parse_byte_range(filepath, start, end, FrameStore(store.dtype), fast)
+    columns = window.export_columns()
+    if by_ipoc:
+        # Affinage à la trame près avec les IPOC relus
+        ipoc = frame_ipoc(window)
+        inside = np.flatnonzero((ipoc >= (start_ipoc if start_ipoc is not None else -np.inf))
+                                & (ipoc <= (end_ipoc if end_ipoc is not None else np.inf)))
+        if len(inside):
+            start_frame, end_frame = first_frame + int(inside[0]), first_frame + int(inside[-1])
+        else:
+            end_frame = start_frame - 1
+
+    store.clear()
+    store.frame_count = start_frame
+    store.merge_columns(_slice_columns(columns, start_frame - first_frame, end_frame - first_frame),
+                        max(end_frame - start_frame + 1, 0))
+    store.source_bytes = end
+    return store.finalize()
+
+
+def _slice_columns(columns, lo, hi):
+    # Colonnes ramenées aux trames [lo, hi] puis renumérotées à partir de lo
+    sliced = {}
+    for tag, (start, frames, values) in columns.items():
+        if frames is None:
+            i0, i1 = max(lo - start, 0), min(hi + 1 - start, len(values))
+            if i1 > i0:
+                sliced[tag] = (start + i0 - lo, None, values[i0:i1])
+        else:
+            i0, i1 = np.searchsorted(frames, lo), np.searchsorted(frames, hi, side='right')
+            if i1 > i0:
+                sliced[tag] = (int(frames[i0]) - lo, frames[i0:i1] - lo, values[i0:i1])
+    return sliced
+
+
+if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Index d'un log KUKA RSI et chargement d'une fenêtre")
+    arg_parser.add_argument("logfile")
+    arg_parser.add_argument("--frames", help="fenêtre de trames début:fin (bornes incluses, optionnelles)")
+    arg_parser.add_argument("--ipoc", help="fenêtre d'IPOC début:fin")
+    arg_parser.add_argument("--every", type=int, default=DEFAULT_EVERY, help="une entrée d'index toutes les N trames")
+    arg_parser.add_argument("--rebuild", action="store_true", help="reconstruit l'index même s'il est à jour")
+    arg_parser.add_argument("--cache", default=None, help="dossier du cache des logs analysés, où est rangé l'index")
+    arg_parser.add_argument("--html", help="exporte la fenêtre dans ce rapport HTML")
+    args = arg_parser.parse_args()
+
+    def _bounds(text):
+        lo, _, hi = text.partition(":")
+        return (float(lo) if lo else None), (float(hi) if hi else None)
+
+    from rsi_cache import DEFAULT_CACHE_DIR, ParseCache, parse_and_cache
+    cache = ParseCache(args.cache or DEFAULT_CACHE_DIR)
+    t0 = time.perf_counter()
+    index = None if args.rebuild else cache.load_index(args.logfile)
+    if index is None:
+        _, index = parse_and_cache(args.logfile, cache=cache, every=args.every, workers=os.cpu_count())
+        print(f"Index construit en {time.perf_counter() - t0:.2f} s : {len(index.frames)} entrées, "
+              f"{index.frame_count} trames")
+    if args.frames is None and args.ipoc is None:
+        sys.exit(0)
+
+    t0 = time.perf_counter()
+    frame_bounds = _bounds(args.frames) if args.frames else (None, None)
+    ipoc_bounds = _bounds(args.ipoc) if args.ipoc else (None, None)
+    window = load_window(args.logfile, *frame_bounds, *ipoc_bounds, index=index, cache=cache)
+    first = min((column.start for column in window.columns.values()), default=window.frame_count)
+    print(f"Fenêtre chargée en {time.perf_counter() - t0:.3f} s : trames {first} à {window.frame_count - 1}, "
+          f"{len(window)} tags")
+    if args.html:
+        from rsi_export import export_to_html_interactif
+        export_to_html_interactif(window, args.html)
@@ -0,0 +1,649 @@
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from rsi_store import FrameStore
+
+# Trame XML présente dans une ligne de log (du premier '<' à la fin de ligne)
+XML_PATTERN = re.compile(r'(<.*>.*)')
+
+# En dessous de cette taille, l'analyse parallèle ne vaut pas le coût du pool de processus
+MIN_PARALLEL_BYTES = 8 * 1024 * 1024
+# Taille minimale d'un morceau de fichier confié à un processus
+MIN_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Fréquence (en lignes) des rapports de progression et des tests d'annulation
+PROGRESS_EVERY_LINES = 8192
+
+# Volume maximal lu par appel en mode suivi, pour garder l'interface réactive
+FOLLOW_MAX_BYTES = 16 * 1024 * 1024
+
+# Nombre maximal de gabarits de trame appris (ex. trames Rob et Sen alternées)
+MAX_TEMPLATES = 8
+
+# Exemples conservés par le diagnostic : lignes malformées, et chemins non numériques distincts
+MAX_SAMPLES = 5
+MAX_NON_NUMERIC_PATHS = 100
+# Longueur des extraits de ligne conservés comme exemples
+SAMPLE_CHARS = 200
+
+_TOKEN = re.compile(
+    r'<(?P<close>/?)(?P<tag>[^\s/>!?]+)(?P<attrs>(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*)\s*(?P<empty>/?)>'
+    r'|(?P<text>[^<]+)'
+)
+_ATTR = re.compile(r'\s+([^\s=/>]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+class ParseCancelled(Exception):
+    """Analyse interrompue à la demande ; le FrameStore garde les trames déjà lues."""
+
+
+class ParseProgress:
+    """Avancement d'une analyse : octets lus, trames, débit et temps restant estimé."""
+
+    def __init__(self, bytes_done, total_bytes, frames, elapsed, tags=None):
+        self.bytes_done = bytes_done
+        self.total_bytes = total_bytes
+        self.frames = frames
+        self.elapsed = elapsed
+        # Liste triée des tags connus, renseignée seulement quand elle change
+        self.tags = tags
+
+    @property
+    def fraction(self):
+        return self.bytes_done / self.total_bytes if self.total_bytes else 1.0
+
+    @property
+    def frames_per_s(self):
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        if not self.bytes_done or self.elapsed <= 0:
+            return None
+        return (self.total_bytes - self.bytes_done) * self.elapsed / self.bytes_done
+
+
+class _ProgressReporter:
+    def __init__(self, callback, cancel, total_bytes, store):
+        self.callback = callback
+        self.cancel = cancel
+        self.total_bytes = total_bytes
+        self.store = store
+        self.t0 = time.perf_counter()
+        self.known_tags = 0
+
+    def __call__(self, bytes_done):
+        if self.cancel is not None and self.cancel.is_set():
+            raise ParseCancelled()
+        if self.callback is None:
+            return
+        tags = None
+        if len(self.store.columns) != self.known_tags:
+            self.known_tags = len(self.store.columns)
+            tags = sorted(self.store.columns)
+        self.callback(ParseProgress(bytes_done, self.total_bytes, self.store.frame_count,
+                                    time.perf_counter() - self.t0, tags))
+
+
+class ParseStats:
+    """Diagnostic d'une analyse : lignes et champs rejetés (avec exemples), temps par étape, débit.
+
+    Les compteurs sont toujours tenus ; avec detailed=True, le temps passé dans chaque étape
+    (lecture, regex, XML, extraction) est aussi mesuré ligne par ligne, ce qui ralentit un peu l'analyse.
+    """
+
+    def __init__(self, detailed=False):
+        self.detailed = detailed
+        self.lines = 0
+        self.bytes = 0
+        self.no_xml_lines = 0
+        self.template_frames = 0
+        self.xml_frames = 0
+        # Lignes passées à ElementTree alors que des gabarits étaient déjà appris
+        self.template_misses = 0
+        self.malformed_lines = 0
+        self.malformed_samples = []
+        # {chemin: [nombre, exemple de valeur]} des champs ignorés faute d'être numériques
+        self.non_numeric = {}
+        # Secondes par étape ; les étapes par ligne sont cumulées sur tous les processus
+        self.stages = {}
+        # Diagnostic relu depuis le cache (analyse initiale)
+        self.from_cache = False
+
+    @property
+    def frames(self):
+        return self.template_frames + self.xml_frames
+
+    @property
+    def non_numeric_fields(self):
+        return sum(count for count, _ in self.non_numeric.values())
+
+    @property
+    def malformed_ratio(self):
+        total = self.frames + self.malformed_lines
+        return self.malformed_lines / total if total else 0.0
+
+    def add_time(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_malformed(self, error, text):
+        self.malformed_lines += 1
+        if len(self.malformed_samples) < MAX_SAMPLES:
+            self.malformed_samples.append({"line": self.lines, "error": str(error), "text": text[:SAMPLE_CHARS]})
+
+    def add_non_numeric(self, path, raw, count=1):
+        entry = self.non_numeric.get(path)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.non_numeric) < MAX_NON_NUMERIC_PATHS:
+            self.non_numeric[path] = [count, raw[:SAMPLE_CHARS]]
+
+    def merge(self, other):
+        """Ajoute le diagnostic d'une plage analysée à la suite (numéros de ligne décalés)."""
+        for sample in other.malformed_samples:
+            if len(self.malformed_samples) < MAX_SAMPLES:
+                self.malformed_samples.append({**sample, "line": sample["line"] + self.lines})
+        for name in ("lines", "bytes", "no_xml_lines", "template_frames", "xml_frames", "template_misses",
+                     "malformed_lines"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for path, (count, raw) in other.non_numeric.items():
+            self.add_non_numeric(path, raw, count)
+        for stage, seconds in other.stages.items():
+            self.add_time(stage, seconds)
+
+    def throughput(self):
+        """(Mo/s, trames/s) sur la durée totale de l'analyse, None si elle n'est pas connue."""
+        elapsed = self.stages.get("parse")
+        if not elapsed:
+            return None
+        return self.bytes / 1e6 / elapsed, self.frames / elapsed
+
+    def to_dict(self):
+        rates = self.throughput()
+        return {
+            "lines": self.lines, "bytes": self.bytes, "frames": self.frames, "template_frames": self.template_frames,
+            "xml_frames": self.xml_frames, "template_misses": self.template_misses, "no_xml_lines": self.no_xml_lines,
+            "malformed_lines": self.malformed_lines, "malformed_ratio": self.malformed_ratio,
+            "malformed_samples": self.malformed_samples, "non_numeric_fields": self.non_numeric_fields,
+            "non_numeric": {path: {"count": count, "sample": raw} for path, (count, raw) in self.non_numeric.items()},
+            "stages_s": self.stages, "mb_per_s": rates and rates[0], "frames_per_s": rates and rates[1],
+            "detailed": self.detailed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data.get("detailed", False))
+        for name in ("lines", "bytes", "no_xml_lines", "template_frames", "xml_frames", "template_misses",
+                     "malformed_lines", "malformed_samples"):
+            setattr(stats, name, data[name])
+        stats.non_numeric = {path: [e["count"], e["sample"]] for path, e in data["non_numeric"].items()}
+        stats.stages = dict(data["stages_s"])
+        return stats
+
+    def summary(self):
+        """Résumé texte du diagnostic."""
+        lines = [
+            f"{self.lines} lignes ({self.bytes / 1e6:.1f} Mo) : {self.frames} trames "
+            f"({self.template_frames} par gabarit, {self.xml_frames} par ElementTree), "
+            f"{self.no_xml_lines} lignes sans XML",
+            f"Lignes XML malformées : {self.malformed_lines} ({100 * self.malformed_ratio:.2f} %)",
+        ]
+        if self.from_cache:
+            lines.insert(0, "Log relu depuis le cache : diagnostic de l'analyse initiale.")
+        if self.template_misses:
+            lines.append(f"Lignes non reconnues par les gabarits appris : {self.template_misses}")
+        for sample in self.malformed_samples:
+            lines.append(f"  ligne {sample['line']} : {sample['error']} - {sample['text'][:80]}")
+        lines.append(f"Champs non numériques ignorés : {self.non_numeric_fields} ({len(self.non_numeric)} chemins)")
+        for path, (count, raw) in sorted(self.non_numeric.items(), key=lambda e: -e[1][0])[:MAX_SAMPLES]:
+            lines.append(f"  {path} : {count} (ex. {raw[:40]!r})")
+        rates = self.throughput()
+        if rates is not None:
+            lines.append(f"Débit : {rates[0]:.1f} Mo/s, {rates[1]:,.0f} trames/s")
+        if self.stages:
+            lines.append("Temps par étape : " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self.stages.items()))
+        return "\n".join(lines)
+
+
+def clean_xml_line(line):
+    match = XML_PATTERN.search(line)
+    if not match:
+        return None
+    return match.group(1).replace('\\"', '"').replace('\\n', '')
+
+
+def iter_numeric_fields(element, path='', skipped=None):
+    """Parcourt un élément XML et produit les couples (chemin, valeur) numériques.
+
+    skipped(chemin, texte) est appelé pour chaque champ ignoré faute d'être numérique.
+    """
+    current_path = f"{path}/{element.tag}" if path else element.tag
+    if element.text and element.text.strip():
+        try:
+            yield current_path, float(element.text.strip())
+        except (ValueError, TypeError):
+            if skipped is not None:
+                skipped(current_path, element.text.strip())
+
+    for attr, attr_value in element.attrib.items():
+        try:
+            yield f"{current_path}@{attr}", float(attr_value)
+        except (ValueError, TypeError):
+            if skipped is not None:
+                skipped(f"{current_path}@{attr}", attr_value)
+
+    for child in element:
+        yield from iter_numeric_fields(child, current_path, skipped)
+
+
+class FrameTemplate:
+    """Gabarit d'une trame : regex compilée dont chaque groupe capture un champ numérique."""
+
+    def __init__(self, pattern, paths, skipped=()):
+        self.regex = re.compile(pattern)
+        self.paths = tuple(paths)
+        # Champs non numériques (chemin, texte) de la trame d'origine, ignorés à chaque correspondance
+        self.skipped = tuple(skipped)
+
+    @classmethod
+    def learn(cls, xml_string, root):
+        # Pas de gabarit pour les constructions que le tokenizer ne suit pas
+        if '<!' in xml_string or '<?' in xml_string:
+            return None
+        pieces, paths = [], []
+        stack, text_path = [], None
+        last = 0
+        pos = 0
+        for token in _TOKEN.finditer(xml_string):
+            if token.start() != pos:
+                return None
+            pos = token.end()
+            tag = token.group('tag')
+            if tag is not None:
+                text_path = None
+                if token.group('close'):
+                    if not stack or stack[-1] != tag:
+                        return None
+                    stack.pop()
+                    continue
+                current_path = f"{'/'.join(stack)}/{tag}" if stack else tag
+                attrs = token.group('attrs')
+                for attr in _ATTR.finditer(attrs):
+                    raw = attr.group(2) if attr.group(2) is not None else attr.group(3)
+                    if not _is_number(raw):
+                        continue
+                    group = 2 if attr.group(2) is not None else 3
+                    start = token.start('attrs') + attr.start(group)
+                    pieces.append(re.escape(xml_string[last:start]))
+                    pieces.append('([^"]*)' if group == 2 else "([^']*)")
+                    paths.append(f"{current_path}@{attr.group(1)}")
+                    last = start + len(raw)
+                if not token.group('empty'):
+                    stack.append(tag)
+                    text_path = current_path
+            else:
+                # Seul le texte qui suit directement la balise ouvrante compte (element.text)
+                if text_path is not None and _is_number(token.group('text')):
+                    pieces.append(re.escape(xml_string[last:token.start()]))
+                    pieces.append('([^<]*)')
+                    paths.append(text_path)
+                    last = token.end()
+                text_path = None
+        if pos != len(xml_string) or stack:
+            return None
+        pieces.append(re.escape(xml_string[last:]))
+        skipped = []
+        template = cls(''.join(pieces), paths, skipped)
+
+        # Le gabarit n'est retenu que s'il extrait exactement ce que donne ElementTree
+        values = template.match(xml_string)
+        expected = sorted(iter_numeric_fields(root, skipped=lambda path, raw: skipped.append((path, raw))))
+        if values is None or sorted(zip(paths, values)) != expected:
+            return None
+        template.skipped = tuple(skipped)
+        return template
+
+    def match(self, xml_string):
+        m = self.regex.fullmatch(xml_string)
+        if m is None:
+            return None
+        try:
+            return list(map(float, m.groups()))
+        except ValueError:
+            return None
+
+
+def _is_number(text):
+    if '&' in text or not text.strip():
+        return False
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+class RsiFrameParser:
+    """Analyse des lignes de log vers un FrameStore, avec gabarits appris et repli ElementTree."""
+
+    def __init__(self, store, fast=True, stats=None):
+        self.store = store
+        self.fast = fast
+        self.templates = []
+        self.stats = ParseStats() if stats is None else stats
+        # Correspondances par gabarit, reportées dans stats par finish()
+        self._hits = []
+
+    def feed_line(self, line):
+        stats = self.stats
+        stats.lines += 1
+        t0 = time.perf_counter() if stats.detailed else None
+        xml_string = clean_xml_line(line)
+        if xml_string is None:
+            stats.no_xml_lines += 1
+            return False
+        if self.fast:
+            for i, template in enumerate(self.templates):
+                values = template.match(xml_string)
+                if values is not None:
+                    self.store.append_row(template.paths, self.store.new_frame(), values)
+                    self._hits[i] += 1
+                    if t0 is not None:
+                        stats.add_time("regex", time.perf_counter() - t0)
+                    return True
+            if self.templates:
+                stats.template_misses += 1
+        if t0 is not None:
+            t1 = time.perf_counter()
+            stats.add_time("regex", t1 - t0)
+        try:
+            root = ET.fromstring(xml_string)
+        except ET.ParseError as e:
+            stats.add_malformed(e, xml_string)
+            return False
+        if t0 is not None:
+            t2 = time.perf_counter()
+            stats.add_time("xml", t2 - t1)
+        frame = self.store.new_frame()
+        for path, value in iter_numeric_fields(root, skipped=stats.add_non_numeric):
+            self.store.append(path, frame, value)
+        stats.xml_frames += 1
+        if self.fast and len(self.templates) < MAX_TEMPLATES:
+            template = FrameTemplate.learn(xml_string, root)
+            if template is not None:
+                self.templates.append(template)
+                self._hits.append(0)
+        if t0 is not None:
+            stats.add_time("extract", time.perf_counter() - t2)
+        return True
+
+    def finish(self):
+        """Reporte dans stats les trames lues par gabarit et leurs champs non numériques."""
+        for template, hits in zip(self.templates, self._hits):
+            self.stats.template_frames += hits
+            for path, raw in template.skipped:
+                self.stats.add_non_numeric(path, raw, hits)
+        self._hits = [0] * len(self.templates)
+        return self.stats
+
+
+def _decode_line(raw):
+    # Fins de ligne normalisées en '\n' comme en lecture texte
+    if raw.endswith(b'\r\n'):
+        raw = raw[:-2] + b'\n'
+    return raw.decode('utf-8', 'replace')
+
+
+def _iter_lines(f, start, end):
+    # (position après la ligne, ligne décodée) pour les lignes commençant dans [start, end)
+    f.seek(start)
+    pos = start
+    for raw in f:
+        if pos >= end:
+            break
+        pos += len(raw)
+        yield pos, _decode_line(raw)
+
+
+def split_file(filepath, parts):
+    """Découpe un fichier en au plus `parts` plages d'octets alignées sur des débuts de ligne."""
+    size = os.path.getsize(filepath)
+    bounds = [0]
+    with open(filepath, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts - 1, 0))
+            f.readline()
+            pos = min(f.tell(), size)
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    if size > bounds[-1]:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# Étapes mesurées ligne par ligne par RsiFrameParser (le reste de la boucle est la lecture)
+_LINE_STAGES = ("regex", "xml", "extract")
+
+
+def _parse_range(filepath, start, end, store, fast, report=None, checkpoints=None, every=None, stats=None):
+    # Renvoie la position qui suit la dernière ligne lue ; si checkpoints est une liste,
+    # y ajoute (trame, position de début de ligne) toutes les `every` trames
+    parser = RsiFrameParser(store, fast=fast, stats=stats)
+    stats = parser.stats
+    busy = sum(stats.stages.get(stage, 0.0) for stage in _LINE_STAGES)
+    t0 = time.perf_counter()
+    pos = start
+    with open(filepath, 'rb') as f:
+        for n, (next_pos, line) in enumerate(_iter_lines(f, start, end), 1):
+            if parser.feed_line(line) and checkpoints is not None and (store.frame_count - 1) % every == 0:
+                checkpoints.append((store.frame_count - 1, pos))
+            pos = next_pos
+            if report is not None and n % PROGRESS_EVERY_LINES == 0:
+                report(pos)
+    parser.finish()
+    stats.bytes += pos - start
+    if stats.detailed:
+        busy = sum(stats.stages.get(stage, 0.0) for stage in _LINE_STAGES) - busy
+        stats.add_time("read", time.perf_counter() - t0 - busy)
+    return pos
+
+
+def parse_byte_range(filepath, start, end, store=None, fast=True, stats=None):
+    """Analyse les lignes commençant dans [start, end) ; start doit être un début de ligne (voir rsi_index)."""
+    if store is None:
+        store = FrameStore()
+    store.source_bytes = _parse_range(filepath, start, end, store, fast, stats=stats)
+    return store.finalize()
+
+
+def _parse_chunk(task):
+    # Exécuté dans un processus : renvoie des tableaux colonnaires, pas des listes
+    filepath, start, end, fast, dtype, every, detailed = task
+    store = FrameStore(dtype)
+    checkpoints = [] if every else None
+    stats = ParseStats(detailed)
+    consumed = _parse_range(filepath, start, end, store, fast, checkpoints=checkpoints, every=every, stats=stats)
+    return store.frame_count, store.export_columns(), consumed, checkpoints, stats
+
+
+def parse_log_file(filepath, store=None, fast=True, workers=1, progress=None, cancel=None,
+                   checkpoints=None, checkpoint_every=1024, stats=None):
+    """Analyse un fichier de log RSI et renvoie le FrameStore rempli.
+
+    Avec workers > 1, le fichier est découpé en plages alignées sur les lignes,
+    analysées dans un pool de processus puis fusionnées dans l'ordre des trames.
+    progress reçoit des ParseProgress ; si cancel (threading.Event) est levé,
+    ParseCancelled est levée et store contient les trames déjà analysées.
+    Si checkpoints est une liste, elle reçoit (trame, octet de début de ligne) environ
+    toutes les checkpoint_every trames (points de reprise de rsi_index).
+    Le diagnostic de l'analyse (ParseStats, éventuellement fourni via stats) est placé dans store.parse_stats.
+    """
+    if store is None:
+        store = FrameStore()
+    store.clear()
+    if stats is None:
+        stats = ParseStats()
+    store.parse_stats = stats
+    t0 = time.perf_counter()
+    size = os.path.getsize(filepath)
+    report = None
+    if progress is not None or cancel is not None:
+        report = _ProgressReporter(progress, cancel, size, store)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    try:
+        every = checkpoint_every if checkpoints is not None else None
+        if workers <= 1 or size < MIN_PARALLEL_BYTES:
+            store.source_bytes = _parse_range(filepath, 0, size, store, fast, report, checkpoints, every, stats)
+        else:
+            store.source_bytes = _parse_parallel(filepath, store, fast, workers, report, checkpoints, every, stats)
+    finally:
+        with stats.stage("finalize"):
+            store.finalize()
+        stats.add_time("parse", time.perf_counter() - t0)
+    if report is not None:
+        report(size)
+    return store
+
+
+def _parse_parallel(filepath, store, fast, workers, report, checkpoints=None, every=None, stats=None):
+    parts = max(1, min(workers * 4, os.path.getsize(filepath) // MIN_CHUNK_BYTES))
+    ranges = split_file(filepath, parts)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_parse_chunk, (filepath, start, end, fast, store.dtype, every, stats.detailed))
+                   for start, end in ranges]
+        # Fusion dans l'ordre des plages, donc des trames
+        consumed = 0
+        for future, (_, end) in zip(futures, ranges):
+            frame_count, columns, consumed, chunk_checkpoints, chunk_stats = future.result()
+            if checkpoints is not None:
+                checkpoints.extend((frame + store.frame_count, offset) for frame, offset in chunk_checkpoints)
+            stats.merge(chunk_stats)
+            with stats.stage("merge"):
+                store.merge_columns(columns, frame_count)
+            if report is not None:
+                report(end)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return consumed
+
+
+def run_profiled(output, func, *args, top=25, **kwargs):
+    """Appelle func(*args, **kwargs) sous cProfile si output est un chemin (profil écrit, fonctions les plus
+    coûteuses affichées) ; sans output, appel direct. Seul le thread appelant est profilé."""
+    if not output:
+        return func(*args, **kwargs)
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(output)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+
+
+class LogFollower:
+    """Suivi d'un log en cours d'écriture : seules les lignes complètes ajoutées sont analysées.
+
+    Le travail de chaque poll() est proportionnel aux données nouvelles. Une rotation
+    (fichier remplacé) ou une troncature fait reprendre la lecture au début du fichier,
+    les nouvelles trames s'ajoutant à la suite de celles déjà chargées.
+    """
+
+    def __init__(self, filepath, store, fast=True, offset=None):
+        self.filepath = filepath
+        self.store = store
+        if store.parse_stats is None:
+            store.parse_stats = ParseStats()
+        self.parser = RsiFrameParser(store, fast=fast, stats=store.parse_stats)
+        self.offset = store.source_bytes if offset is None else offset
+        self.rotations = 0
+        self._file_id = self._stat_id()
+
+    def _stat_id(self):
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def poll(self, max_bytes=FOLLOW_MAX_BYTES):
+        """Analyse les lignes complètes ajoutées depuis le dernier appel ; renvoie le nombre de trames lues."""
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            # Rotation en cours : le nouveau fichier n'existe pas encore
+            return 0
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self.offset:
+            self._file_id = file_id
+            self.offset = 0
+            self.rotations += 1
+        if st.st_size == self.offset:
+            return 0
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(st.st_size - self.offset, max_bytes))
+        end = data.rfind(b'\n')
+        if end < 0:
+            if len(data) == max_bytes:
+                # Ligne démesurée : ignorée plutôt que de bloquer le suivi
+                self.offset += len(data)
+            # Sinon, dernière ligne encore en cours d'écriture
+            return 0
+        self.offset += end + 1
+
+        frames_before = self.store.frame_count
+        for raw in data[:end].split(b'\n'):
+            self.parser.feed_line(_decode_line(raw + b'\n'))
+        stats = self.parser.finish()
+        stats.bytes += end + 1
+        self.store.source_bytes = self.offset
+        return self.store.frame_count - frames_before
+
+
+if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Analyse d'un log KUKA RSI sans interface graphique")
+    arg_parser.add_argument("logfile")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="nombre de processus (1 = séquentiel)")
+    arg_parser.add_argument("--no-fast", action="store_true", help="désactive les gabarits de trame (ElementTree seul)")
+    arg_parser.add_argument("--diagnostics", action="store_true",
+                            help="temps par étape mesuré ligne par ligne et diagnostic détaillé")
+    arg_parser.add_argument("--json", help="écrit le diagnostic de l'analyse dans ce fichier JSON")
+    arg_parser.add_argument("--profile", help="profil cProfile de l'analyse écrit dans ce fichier (processus principal seulement)")
+    args = arg_parser.parse_args()
+
+    parse_stats = ParseStats(detailed=args.diagnostics)
+    t0 = time.perf_counter()
+    result = run_profiled(args.profile, parse_log_file, args.logfile, fast=not args.no_fast, workers=args.workers,
+                          stats=parse_stats)
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        import json
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(parse_stats.to_dict(), f, indent=1)
+    if not result:
+        print(parse_stats.summary())
+        sys.exit("Aucune trame XML valide n'a été trouvée dans ce fichier.")
+    print(f"{result.frame_count} trames, {len(result)} tags en {elapsed:.2f} s "
+          f"({result.nbytes / 1e6:.1f} Mo en mémoire)")
+    print(parse_stats.summary())
+    if not args.diagnostics:
+        for tag in sorted(result.keys()):
+            print(f"  {tag} : {len(result.columns[tag])} valeurs")
@@ -0,0 +1,237 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from rsi_apt import ARC_CHORD_TOLERANCE_MM, as_toolpath
+
+# Points projetés à la fois (borne la mémoire des tableaux points x candidats)
+PROJECT_CHUNK_POINTS = 200_000
+# Points cherchés à la fois dans un cKDTree, et threads de recherche (-1 : tous les cœurs)
+QUERY_CHUNK_POINTS = 500_000
+QUERY_WORKERS = -1
+# Segments candidats examinés d'emblée pour chaque point (multiplié par 4 tant que la réponse n'est pas certaine)
+INITIAL_CANDIDATES = 8
+# Longueur des morceaux indexés : quantile des longueurs de segment (les segments plus longs sont découpés),
+# réduite pour que le parcours compte au moins MIN_PIECES morceaux (peu de longs segments : petites sphères)
+PIECE_QUANTILE = 90
+MIN_PIECES = 100_000
+# Suivi monotone : l'abscisse de chaque point est prédite par la distance parcourue par la mesure (positions lissées
+# sur TRACK_SMOOTH_POINTS points, pas bornés par la vitesse maximale x TRACK_SPEED_MARGIN) depuis le dernier recalage,
+# puis le point est projeté sur la partie du parcours à moins de TRACK_WINDOW_MM + TRACK_DRIFT x avance de la prédiction.
+# Recalage tous les TRACK_BLOCK_POINTS points sur l'écart médian entre abscisses appariées et distance parcourue.
+TRACK_SMOOTH_POINTS = 15
+TRACK_SPEED_MARGIN = 1.5
+TRACK_WINDOW_MM = 2.0
+TRACK_DRIFT = 0.2
+TRACK_BLOCK_POINTS = 64
+# Avancement du suivi signalé tous les TRACK_PROGRESS_BLOCKS blocs
+TRACK_PROGRESS_BLOCKS = 1000
+# Recul toléré (bruit de mesure) derrière la plus grande abscisse déjà appariée : le plancher du suivi
+# (cette abscisse moins TRACK_BACKTRACK_MM) ne descend jamais, aucune passe antérieure n'est donc atteignable
+TRACK_BACKTRACK_MM = 1.0
+# Suivi perdu (robot hors du parcours) : au-delà de cet écart avec la projection sans contrainte, le point est recalé sur celle-ci
+TRACK_RESYNC_MM = 2.0
+
+
+def build_kdtree(points):
+    """cKDTree des points (n, 3), à construire une fois et réutiliser pour toutes les recherches."""
+    # Arbre non équilibré : construction ~2 fois plus rapide sur des trajectoires, recherches aussi rapides
+    return cKDTree(np.asarray(points, dtype=np.float64), balanced_tree=False)
+
+
+def query_kdtree(tree, points, chunk_points=QUERY_CHUNK_POINTS, workers=QUERY_WORKERS, progress=None):
+    """(distances, index) du plus proche point de tree pour chaque point, cherchés par blocs de chunk_points
+    sur workers threads ; progress(faits, total) est appelé après chaque bloc."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    n = len(points)
+    distances = np.empty(n)
+    indices = np.empty(n, dtype=np.int32 if tree.n < 2 ** 31 else np.int64)
+    for i in range(0, n, chunk_points):
+        part = slice(i, min(i + chunk_points, n))
+        distances[part], indices[part] = tree.query(points[part], workers=workers)
+        if progress is not None:
+            progress(part.stop, n)
+    return distances, indices
+
+
+def _project(points, starts, deltas, lengths2):
+    # Projection orthogonale de chaque point sur son segment (t dans [0, 1]) et distance au pied
+    w = points - starts
+    dot = np.einsum('...j,...j->...', w, deltas)
+    t = np.clip(np.divide(dot, lengths2, out=np.zeros_like(dot), where=lengths2 > 0), 0.0, 1.0)
+    diff = w - t[..., None] * deltas
+    return np.sqrt(np.einsum('...j,...j->...', diff, diff)), t
+
+
+class SegmentIndex:
+    """Index spatial des segments d'un parcours pour la distance exacte point-polyligne.
+
+    Chaque segment est découpé en morceaux d'au plus piece_mm, indexés par leur sphère englobante
+    (centre dans un cKDTree, rayon commun) : la mémoire suit le nombre de segments et non longueur / pas.
+    motion donne pour chaque segment le mouvement du parcours rapporté dans les résultats (cordes d'un arc).
+    """
+
+    def __init__(self, starts, ends, piece_mm=None, motion=None):
+        self.motion = None if motion is None else np.asarray(motion, dtype=np.int32)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.deltas = np.asarray(ends, dtype=np.float64) - self.starts
+        self.lengths2 = np.einsum('ij,ij->i', self.deltas, self.deltas)
+        lengths = np.sqrt(self.lengths2)
+        # Abscisse curviligne du début de chaque segment depuis le début du parcours
+        self.abscissa = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+        if piece_mm is None:
+            piece_mm = min(np.percentile(lengths, PIECE_QUANTILE), lengths.sum() / MIN_PIECES) if len(lengths) else 0.0
+        pieces = np.maximum(np.ceil(lengths / piece_mm), 1).astype(np.int64) if piece_mm > 0 else np.ones(len(lengths), np.int64)
+        self.piece_segment = np.repeat(np.arange(len(lengths), dtype=np.int32), pieces)
+        first = np.concatenate(([0], np.cumsum(pieces)[:-1]))
+        rank = np.arange(len(self.piece_segment)) - first[self.piece_segment]
+        centers = self.starts[self.piece_segment] + ((rank + 0.5) / pieces[self.piece_segment])[:, None] * self.deltas[self.piece_segment]
+        self.radius = float((lengths / (2 * pieces)).max()) if len(lengths) else 0.0
+        self.tree = build_kdtree(centers)
+
+    @classmethod
+    def from_segments(cls, path_segments, piece_mm=None, tolerance=ARC_CHORD_TOLERANCE_MM):
+        """Index d'un parcours (ToolPath ou liste de segments), arcs découpés en cordes à moins de tolerance."""
+        path = as_toolpath(path_segments)
+        starts, ends, motion = path.chords(tolerance)
+        return cls(starts, ends, piece_mm=piece_mm, motion=motion if len(motion) != len(path) else None)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _nearest(self, points, workers):
+        # Segment le plus proche de chaque point : candidats = morceaux les plus proches, puis élargissement
+        # tant qu'un morceau non examiné peut encore contenir un point plus proche (centre à moins de d + rayon)
+        n_pieces = self.tree.n
+        k = min(INITIAL_CANDIDATES, n_pieces)
+        center_d, piece = self.tree.query(points, k=k, workers=workers)
+        center_d, piece = center_d.reshape(len(points), k), piece.reshape(len(points), k)
+        best_d, best_t, best_s = self._best(points, piece)
+        pending = np.flatnonzero(center_d[:, -1] <= best_d + self.radius) if k < n_pieces else np.empty(0, np.int64)
+        while len(pending):
+            k = min(4 * k, n_pieces)
+            bound = (best_d[pending] + self.radius) * (1 + 1e-9) + 1e-9
+            # Borne commune (cKDTree n'accepte qu'un scalaire) : la plus large, chaque point garde la sienne ensuite
+            center_d, piece = self.tree.query(points[pending], k=k, distance_upper_bound=bound.max(), workers=workers)
+            center_d, piece = center_d.reshape(len(pending), k), piece.reshape(len(pending), k)
+            d, t, s = self._best(points[pending], piece)
+            better = d < best_d[pending]
+            best_d[pending[better]], best_t[pending[better]], best_s[pending[better]] = d[better], t[better], s[better]
+            # Toujours des morceaux dans la borne au-delà des k examinés : on élargit encore
+            pending = pending[center_d[:, -1] <= bound] if k < n_pieces else pending[:0]
+        return best_d, best_t, best_s
+
+    def _best(self, points, piece):
+        # Meilleur segment parmi les morceaux candidats (index n_pieces = pas de candidat)
+        valid = piece < self.tree.n
+        segment = self.piece_segment[np.where(valid, piece, 0)]
+        d, t = _project(points[:, None, :], self.starts[segment], self.deltas[segment], self.lengths2[segment])
+        d[~valid] = np.inf
+        j = d.argmin(axis=1)
+        rows = np.arange(len(points))
+        return d[rows, j], t[rows, j], segment[rows, j]
+
+    def project(self, points, chunk_points=PROJECT_CHUNK_POINTS, workers=QUERY_WORKERS, progress=None):
+        """Projection exacte de chaque point sur le parcours : distance (mm), segment le plus proche,
+        abscisse curviligne (mm) et pied de la perpendiculaire (n, 3). progress(faits, total) après chaque bloc."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        return self._result(*self._project_all(points, chunk_points, workers, progress))
+
+    def _project_all(self, points, chunk_points=PROJECT_CHUNK_POINTS, workers=QUERY_WORKERS, progress=None, total=None):
+        n = len(points)
+        distance = np.empty(n)
+        segment = np.empty(n, dtype=np.int32)
+        t = np.empty(n)
+        for i in range(0, n, chunk_points):
+            part = slice(i, min(i + chunk_points, n))
+            distance[part], t[part], segment[part] = self._nearest(points[part], workers)
+            if progress is not None:
+                progress(part.stop, total or n)
+        return distance, segment, t
+
+    def _result(self, distance, segment, t):
+        lengths = np.sqrt(self.lengths2[segment])
+        foot = self.starts[segment] + t[:, None] * self.deltas[segment]
+        abscissa = self.abscissa[segment] + t * lengths
+        if self.motion is not None:
+            segment = self.motion[segment]
+        return {"distance": distance, "segment": segment, "abscissa": abscissa, "foot": foot}
+
+    def _project_window(self, points, lo, hi, floor, reach):
+        # Projection sur les segments lo..hi restreinte, pour chaque point, à l'abscisse [floor, reach] :
+        # pied borné à la partie du segment dans la fenêtre, distance infinie si le segment en est hors
+        lengths = np.sqrt(self.lengths2[lo:hi])
+        begin = self.abscissa[lo:hi]
+        w = points[:, None, :] - self.starts[lo:hi]
+        dot = np.einsum('ijk,jk->ij', w, self.deltas[lo:hi])
+        t = np.divide(dot, self.lengths2[lo:hi], out=np.zeros_like(dot), where=self.lengths2[lo:hi] > 0)
+        safe = np.where(lengths > 0, lengths, 1.0)
+        t = np.clip(t, np.clip((floor[:, None] - begin) / safe, 0.0, 1.0), np.clip((reach[:, None] - begin) / safe, 0.0, 1.0))
+        diff = w - t[..., None] * self.deltas[lo:hi]
+        d = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+        d[(begin > reach[:, None]) | (begin + lengths < floor[:, None])] = np.inf
+        j = d.argmin(axis=1)
+        rows = np.arange(len(points))
+        return d[rows, j], t[rows, j], (lo + j).astype(np.int32)
+
+    def _track_window(self, points, floor, reach, ends):
+        # _project_window sur la plage contiguë des segments qui coupent les fenêtres [floor, reach]
+        lo = min(int(np.searchsorted(ends, floor.min(), side='left')), len(self) - 1)
+        hi = max(int(np.searchsorted(self.abscissa, reach.max(), side='right')), lo + 1)
+        return self._project_window(points, lo, hi, floor, reach)
+
+    def track(self, points, times, max_speed_mm_s, start_mm=0.0, block_points=TRACK_BLOCK_POINTS, workers=QUERY_WORKERS,
+              progress=None):
+        """Comme project, mais en suivant le parcours dans l'ordre des mesures : chaque point n'est cherché que près
+        (en abscisse curviligne) de l'endroit où le robot a pu arriver d'après la distance parcourue depuis le point
+        de départ start_mm, avec des pas bornés par max_speed_mm_s.
+
+        Là où le parcours repasse au même endroit (poches, contournages), les points restent sur la bonne passe :
+        l'abscisse appariée ne recule jamais de plus de TRACK_BACKTRACK_MM derrière la plus grande déjà atteinte.
+        Temps et mémoire linéaires en nombre de points. progress(faits, total) compte la projection sans contrainte
+        puis le suivi (total = 2 x nombre de points).
+        """
+        from scipy.ndimage import uniform_filter1d
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        times = np.asarray(times, dtype=np.float64)
+        free_distance, free_segment, free_t = self._project_all(points, workers=workers, progress=progress,
+                                                                total=2 * len(points))
+        n = len(points)
+        if n < 2:
+            return self._result(free_distance, free_segment, free_t)
+        free_abscissa = self.abscissa[free_segment] + free_t * np.sqrt(self.lengths2[free_segment])
+        # Distance parcourue par la mesure, sur positions lissées (le bruit allongerait le chemin)
+        smooth = uniform_filter1d(points, TRACK_SMOOTH_POINTS, axis=0, mode='nearest')
+        steps = np.minimum(np.linalg.norm(np.diff(smooth, axis=0), axis=1),
+                           max_speed_mm_s * TRACK_SPEED_MARGIN * np.maximum(np.diff(times), 0.0))
+        travelled = np.concatenate(([0.0], np.cumsum(steps)))
+
+        distance, segment, t = np.empty(n), np.empty(n, dtype=np.int32), np.empty(n)
+        ends = self.abscissa + np.sqrt(self.lengths2)
+        offset = start_mm
+        # Plancher d'abscisse non décroissant : plus grande abscisse déjà appariée moins TRACK_BACKTRACK_MM
+        reached = start_mm
+        for i in range(0, n, block_points):
+            part = slice(i, min(i + block_points, n))
+            predicted = np.maximum(travelled[part] + offset, reached)
+            slack = TRACK_WINDOW_MM + TRACK_DRIFT * (travelled[part] - travelled[i])
+            floor, reach = np.minimum(np.maximum(predicted - slack, reached), ends[-1]), predicted + slack
+            d, tt, s = self._track_window(points[part], floor, reach, ends)
+            # Suivi perdu : recalage sur la projection sans contrainte, seulement si elle ne revient pas en arrière
+            lost = (d > free_distance[part] + TRACK_RESYNC_MM) & (free_abscissa[part] >= floor)
+            d[lost], s[lost], tt[lost] = free_distance[part][lost], free_segment[part][lost], free_t[part][lost]
+            abscissa = self.abscissa[s] + tt * np.sqrt(self.lengths2[s])
+            # Points du bloc trop en arrière d'un point précédent : reprojetés à partir du plancher
+            for _ in range(len(abscissa)):
+                behind = np.maximum.accumulate(np.concatenate(([reached], abscissa[:-1] - TRACK_BACKTRACK_MM)))
+                back = abscissa < behind
+                if not back.any():
+                    break
+                d[back], tt[back], s[back] = self._track_window(points[part][back], behind[back],
+                                                                np.maximum(reach[back], behind[back]), ends)
+                abscissa[back] = self.abscissa[s[back]] + tt[back] * np.sqrt(self.lengths2[s[back]])
+            distance[part], segment[part], t[part] = d, s, tt
+            reached = max(reached, float(abscissa.max()) - TRACK_BACKTRACK_MM)
+            # Recalage : écart médian (robuste à quelques points mal appariés) entre abscisse et distance parcourue
+            offset = float(np.median(abscissa - travelled[part]))
+            if progress is not None and (part.stop == n or (i // block_points) % TRACK_PROGRESS_BLOCKS == 0):
+                progress(n + part.stop, 2 * n)
+        return self._result(distance, segment, t)
@@ -0,0 +1,238 @@
+import fnmatch
+import operator
+import re
+import numpy as np
+from rsi_store import FrameStore
+from rsi_timing import frame_times
+
+# Prédicat sur les valeurs d'un tag, ex. "Rob/Delay@D>0" ou "Rob/RIst@Z <= 12.5"
+PREDICATE_PATTERN = re.compile(r'^(?P<tag>[^<>=!]+?)\s*(?P<op>>=|<=|==|!=|>|<)\s*(?P<value>\S+)$')
+# Espaces autour des opérateurs, retirés avant le découpage de la requête en termes
+_OPERATOR_SPACES = re.compile(r'\s*(>=|<=|==|!=|>|<)\s*')
+_OPERATORS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+}
+
+
+def select_tags(store, patterns):
+    """Tags dont le chemin correspond à l'un des motifs : glob (Rob/RIst@*) ou regex préfixée par re:."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    selected = set()
+    for pattern in patterns:
+        if pattern.startswith("re:"):
+            regex = re.compile(pattern[3:])
+            selected.update(tag for tag in store.keys() if regex.search(tag))
+        else:
+            selected.update(fnmatch.filter(store.keys(), pattern))
+    return sorted(selected)
+
+
+def parse_predicate(text):
+    """(tag, opérateur, valeur) d'un prédicat "tag>valeur" ; ValueError si le texte n'en est pas un."""
+    match = PREDICATE_PATTERN.match(text.strip())
+    if match is None:
+        raise ValueError(f"Prédicat invalide : {text}")
+    try:
+        value = float(match.group("value"))
+    except ValueError:
+        raise ValueError(f"Valeur non numérique dans le prédicat : {text}") from None
+    return match.group("tag"), _OPERATORS[match.group("op")], value
+
+
+def _bounds(text, cast):
+    lo, sep, hi = text.partition(":")
+    if not sep:
+        raise ValueError(f"Fenêtre début:fin attendue : {text}")
+    return (cast(lo) if lo else None), (cast(hi) if hi else None)
+
+
+def parse_query(text):
+    """Arguments de query() à partir d'une requête texte, termes séparés par des espaces :
+    motifs de tags, frames=début:fin, time=début:fin (s), margin=N et prédicats (Rob/Delay@D>0, Rob/RIst@Z <= 12.5)."""
+    options = {"tags": [], "where": []}
+    for term in _OPERATOR_SPACES.sub(r'\1', text).split():
+        key, sep, value = term.partition("=")
+        if sep and key in ("frames", "time", "margin") and not value.startswith("="):
+            if key == "margin":
+                options["margin"] = int(value)
+            else:
+                options[key] = _bounds(value, int if key == "frames" else float)
+        elif PREDICATE_PATTERN.match(term):
+            options["where"].append(term)
+        else:
+            options["tags"].append(term)
+    return options
+
+
+class QueryResult:
+    """Sélection de trames (plages [début, fin]) et, par tag, ses valeurs sur ces trames.
+
+    columns suit le format de FrameStore.export_columns ({tag: (début, trames ou None si dense, valeurs)}),
+    trames renumérotées à partir de first_frame. Sur une seule plage, les valeurs sont des vues sans copie.
+    """
+
+    def __init__(self, store, ranges, columns, first_frame):
+        self.store = store
+        self.ranges = ranges
+        self.columns = columns
+        self.first_frame = first_frame
+
+    @property
+    def frame_count(self):
+        """Nombre de trames sélectionnées."""
+        return int((self.ranges[:, 1] - self.ranges[:, 0] + 1).sum())
+
+    @property
+    def tags(self):
+        return list(self.columns)
+
+    def to_store(self):
+        """FrameStore de la sélection, utilisable par les tracés et exports ; trame 0 = first_frame.
+
+        Les colonnes partagent la mémoire du FrameStore d'origine tant que la sélection est une plage unique.
+        """
+        store = FrameStore(self.store.dtype, adaptive=self.store.adaptive)
+        if not len(self.ranges):
+            return store
+        last_frame = int(self.ranges[-1, 1])
+        store.merge_columns(self.columns, last_frame - self.first_frame + 1)
+        times = frame_times(self.store)
+        if times is not None:
+            store.times = times[self.first_frame:last_frame + 1]
+        return store.finalize()
+
+    def summary(self):
+        return (f"{len(self.columns)} tags, {self.frame_count} trames sélectionnées "
+                f"en {len(self.ranges)} plage(s)")
+
+    def __len__(self):
+        return len(self.columns)
+
+
+def _range_indices(lo, hi):
+    # Concaténation vectorisée des arange(lo[i], hi[i])
+    lengths = hi - lo
+    total = int(lengths.sum())
+    offsets = np.repeat(lo - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(total) + offsets
+
+
+def _window(store, frames, time):
+    # Plage de trames [début, fin] de la requête
+    start, end = 0, store.frame_count - 1
+    if frames is not None:
+        lo, hi = frames
+        start = max(start, 0 if lo is None else int(lo))
+        end = min(end, end if hi is None else int(hi))
+    if time is not None:
+        times = frame_times(store)
+        if times is None:
+            raise ValueError("Log sans IPOC : fenêtre en temps impossible")
+        lo, hi = time
+        if lo is not None:
+            start = max(start, int(np.searchsorted(times, lo, side='left')))
+        if hi is not None:
+            end = min(end, int(np.searchsorted(times, hi, side='right')) - 1)
+    return start, end
+
+
+def _column_window(store, tag, start, end):
+    # (trames, valeurs) d'un tag restreintes à [start, end], par tranches (vues)
+    values = store[tag]
+    frames = store.frames(tag)
+    i0, i1 = np.searchsorted(frames, start), np.searchsorted(frames, end, side='right')
+    return frames[i0:i1], values[i0:i1]
+
+
+def _matching_ranges(store, where, start, end, margin):
+    # Trames de la fenêtre où tous les prédicats sont vrais, étendues de margin trames et fusionnées en plages
+    matched = None
+    for predicate in where:
+        tag, op, value = parse_predicate(predicate) if isinstance(predicate, str) else predicate
+        if tag not in store:
+            raise KeyError(f"Tag absent du log : {tag}")
+        frames, values = _column_window(store, tag, start, end)
+        # Trames uniques : un même chemin répété dans une trame donne plusieurs valeurs par trame
+        hits = np.unique(frames[op(values, value)])
+        matched = hits if matched is None else np.intersect1d(matched, hits, assume_unique=True)
+    if matched is None or not len(matched):
+        return np.empty((0, 2), dtype=np.int64)
+    lo = np.maximum(matched - margin, start)
+    hi = np.minimum(matched + margin, end)
+    breaks = lo[1:] > hi[:-1] + 1
+    return np.column_stack((lo[np.concatenate(([True], breaks))], hi[np.concatenate((breaks, [True]))]))
+
+
+def query(store, tags=None, frames=None, time=None, where=(), margin=0):
+    """Sélectionne des tags (motifs, voir select_tags) sur une fenêtre de trames ou de temps (s),
+    éventuellement réduite aux trames où tous les prédicats where sont vrais (± margin trames).
+
+    Les bornes des fenêtres sont incluses et optionnelles (None).
+    """
+    store.flush_rows()
+    selected = select_tags(store, tags) if tags else sorted(store.keys())
+    start, end = _window(store, frames, time)
+    if where:
+        ranges = _matching_ranges(store, where, start, end, margin)
+    elif end >= start:
+        ranges = np.array([[start, end]], dtype=np.int64)
+    else:
+        ranges = np.empty((0, 2), dtype=np.int64)
+
+    first_frame = int(ranges[0, 0]) if len(ranges) else 0
+    columns = {}
+    for tag in selected:
+        column = store.columns[tag]
+        values = store[tag]
+        if column.dense:
+            lo = np.clip(ranges[:, 0] - column.start, 0, column.size)
+            hi = np.clip(ranges[:, 1] + 1 - column.start, 0, column.size)
+        else:
+            tag_frames = store.frames(tag)
+            lo = np.searchsorted(tag_frames, ranges[:, 0])
+            hi = np.searchsorted(tag_frames, ranges[:, 1], side='right')
+        keep = hi > lo
+        if not keep.any():
+            continue
+        lo, hi = lo[keep], hi[keep]
+        if len(lo) == 1:
+            # Plage unique : tranches, donc vues sans copie
+            i0, i1 = int(lo[0]), int(hi[0])
+            if column.dense:
+                columns[tag] = (column.start + i0 - first_frame, None, values[i0:i1])
+            else:
+                part = tag_frames[i0:i1]
+                columns[tag] = (int(part[0]) - first_frame, part - first_frame if first_frame else part, values[i0:i1])
+        else:
+            index = _range_indices(lo, hi)
+            part = column.start + index if column.dense else tag_frames[index]
+            columns[tag] = (int(part[0]) - first_frame, part - first_frame, values[index])
+    return QueryResult(store, ranges, columns, first_frame)
+
+
+def run_query(store, text):
+    """query() à partir d'une requête texte (voir parse_query)."""
+    return query(store, **parse_query(text))
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from rsi_cache import ParseCache, load_or_parse
+    arg_parser = argparse.ArgumentParser(description="Requête sur un log KUKA RSI : tags, fenêtre et filtres")
+    arg_parser.add_argument("logfile")
+    arg_parser.add_argument("query", nargs="+",
+                            help='termes : motifs de tags, frames=a:b, time=a:b, margin=N, prédicats (ex. "Rob/Delay@D>0")')
+    arg_parser.add_argument("--html", help="exporte la sélection dans ce rapport HTML")
+    arg_parser.add_argument("--cache", action="store_true", help="utilise le cache disque des logs analysés")
+    args = arg_parser.parse_args()
+
+    data = load_or_parse(args.logfile, cache=ParseCache() if args.cache else None, workers=os.cpu_count())
+    result = run_query(data, " ".join(args.query))
+    print(result.summary())
+    for start, end in result.ranges[:10]:
+        print(f"  trames {start} à {end}")
+    if args.html:
+        from rsi_export import export_to_html_interactif
+        export_to_html_interactif(result.to_store(), args.html)
@@ -0,0 +1,204 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+from flask import Flask, Response, abort, jsonify, request
+from rsi_cache import DEFAULT_CACHE_DIR, ParseCache, load_or_parse
+from rsi_downsample import DEFAULT_MAX_POINTS, MinMaxPyramid
+from rsi_stats import compute_all_stats, tag_stats
+from rsi_timing import frame_times, tag_times
+
+# Borne du nombre de points qu'un client peut demander par requête
+MAX_POINTS_LIMIT = 50000
+
+
+class SeriesServer:
+    """Log chargé une fois en mémoire et pyramides min/max par tag, pour répondre aux requêtes par fenêtre."""
+
+    def __init__(self, store, source=None):
+        self.store = store.finalize()
+        self.source = source
+        self._lock = threading.Lock()
+        compute_all_stats(store)
+        # Abscisse en secondes (IPOC) ou, à défaut, en index de trame
+        self.x_unit = "s" if frame_times(store) is not None else "frame"
+        t0 = time.perf_counter()
+        self.pyramids = {
+            tag: MinMaxPyramid(tag_times(store, tag), store[tag])
+            for tag, column in store.columns.items() if column.size
+        }
+        print(f"Pyramides construites en {time.perf_counter() - t0:.2f} s "
+              f"({sum(p.nbytes for p in self.pyramids.values()) / 1e6:.1f} Mo)")
+
+    def tags(self):
+        return [
+            {"tag": tag, "count": len(self.store.columns[tag]),
+             "first_x": float(p.x[0]), "last_x": float(p.x[-1])}
+            for tag, p in self.pyramids.items()
+        ]
+
+    def stats(self, tag=None):
+        with self._lock:
+            if tag is not None:
+                return tag_stats(self.store, tag)
+            return {t: tag_stats(self.store, t) for t in self.pyramids}
+
+    def series(self, tag, start=None, end=None, max_points=DEFAULT_MAX_POINTS):
+        return self.pyramids[tag].query(start, end, max_points)
+
+
+def create_app(server):
+    """Application Flask : /api/tags, /api/stats, /api/series et une page de visualisation."""
+    app = Flask(__name__)
+
+    def _tag_arg():
+        tag = request.args.get("tag")
+        if tag not in server.pyramids:
+            abort(404, description=f"Tag inconnu : {tag}")
+        return tag
+
+    @app.get("/api/tags")
+    def api_tags():
+        return jsonify({"source": server.source, "frame_count": server.store.frame_count,
+                        "x_unit": server.x_unit, "tags": server.tags()})
+
+    @app.get("/api/stats")
+    def api_stats():
+        if "tag" in request.args:
+            return jsonify(server.stats(_tag_arg()))
+        return jsonify(server.stats())
+
+    @app.get("/api/series")
+    def api_series():
+        tag = _tag_arg()
+        start = request.args.get("start", type=float)
+        end = request.args.get("end", type=float)
+        max_points = min(request.args.get("max_points", DEFAULT_MAX_POINTS, type=int), MAX_POINTS_LIMIT)
+        if max_points < 2:
+            abort(400, description="max_points doit valoir au moins 2")
+        x, values, bucket = server.series(tag, start, end, max_points)
+        if request.args.get("format") == "binary":
+            # Abscisses (secondes ou trames, voir x_unit) puis valeurs, en float64 petit-boutiste
+            body = np.concatenate((x.astype('<f8'), values.astype('<f8'))).tobytes()
+            return Response(body, mimetype="application/octet-stream",
+                            headers={"X-Points": str(len(x)), "X-Bucket": str(bucket)})
+        y = values.astype(object)
+        # NaN n'existe pas en JSON
+        y[~np.isfinite(values)] = None
+        return jsonify({"tag": tag, "bucket": bucket, "x": x.tolist(), "y": y.tolist()})
+
+    @app.get("/plotly.min.js")
+    def plotly_js():
+        import plotly.offline
+        return Response(plotly.offline.get_plotlyjs(), mimetype="application/javascript",
+                        headers={"Cache-Control": "max-age=86400"})
+
+    @app.get("/")
+    def index():
+        return Response(VIEWER_PAGE, mimetype="text/html")
+
+    return app
+
+
+VIEWER_PAGE = '''<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <title>KUKA Log Viewer - serveur</title>
+    <script src="plotly.min.js"></script>
+    <style>
+        html, body { height: 100vh; margin: 0; background: #181c21; color: #fff; font-family: Arial,sans-serif; }
+        #bar { padding: 10px 16px; background: #2a3f5f; display: flex; gap: 12px; align-items: center; }
+        #plot { width: 100%; height: calc(100vh - 60px); }
+        #info { color: #bcd; font-size: 0.9em; }
+    </style>
+</head>
+<body>
+    <div id="bar">
+        <select id="tag"></select>
+        <span id="info"></span>
+    </div>
+    <div id="plot"></div>
+    <script>
+    const MAX_POINTS = 4000;
+    const div = document.getElementById('plot');
+    const info = document.getElementById('info');
+    let pending = null;
+    let xTitle = 'Index de la trame';
+    async function fetchSeries(tag, range) {
+        let url = `api/series?format=binary&max_points=${MAX_POINTS}&tag=${encodeURIComponent(tag)}`;
+        if (range) url += `&start=${range[0]}&end=${range[1]}`;
+        const response = await fetch(url);
+        const n = Number(response.headers.get('X-Points'));
+        const data = new Float64Array(await response.arrayBuffer());
+        return {x: data.subarray(0, n), y: data.subarray(n), bucket: response.headers.get('X-Bucket')};
+    }
+    async function update(tag, range) {
+        // Seule la fenêtre visible est demandée, déjà réduite par le serveur
+        const t0 = performance.now();
+        const s = await fetchSeries(tag, range);
+        info.textContent = `${s.x.length} points (seau ${s.bucket}) en ${(performance.now() - t0).toFixed(0)} ms`;
+        return s;
+    }
+    async function draw(tag) {
+        const s = await update(tag, null);
+        Plotly.purge(div);
+        await Plotly.newPlot(div, [{x: s.x, y: s.y, type: 'scattergl', mode: 'lines', name: tag}], {
+            paper_bgcolor: "#181c21", plot_bgcolor: "#20242b", title: tag,
+            xaxis: {title: xTitle, color: '#fff'}, yaxis: {title: tag, color: '#fff'},
+            margin: {t: 50, l: 65, r: 32, b: 50}
+        }, {responsive: true, displaylogo: false});
+        div.on('plotly_relayout', ev => {
+            let r;
+            if (ev['xaxis.range[0]'] !== undefined) r = [ev['xaxis.range[0]'], ev['xaxis.range[1]']];
+            else if (ev['xaxis.autorange']) r = null;
+            else return;
+            clearTimeout(pending);
+            pending = setTimeout(async () => {
+                const s = await update(tag, r);
+                Plotly.restyle(div, {x: [s.x], y: [s.y]}, [0]);
+            }, 60);
+        });
+    }
+    fetch('api/tags').then(r => r.json()).then(meta => {
+        const select = document.getElementById('tag');
+        if (meta.x_unit === 's') xTitle = 'Temps (s)';
+        meta.tags.forEach(t => {
+            const opt = document.createElement('option');
+            opt.value = t.tag; opt.textContent = `${t.tag} (${t.count})`;
+            select.appendChild(opt);
+        });
+        select.onchange = () => draw(select.value);
+        if (meta.tags.length) draw(meta.tags[0].tag);
+    });
+    </script>
+</body>
+</html>
+'''
+
+
+if __name__ == "__main__":
+    import argparse
+    import webbrowser
+    arg_parser = argparse.ArgumentParser(description="Serveur local d'exploration d'un log KUKA RSI")
+    arg_parser.add_argument("logfile")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8050)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="nombre de processus d'analyse")
+    arg_parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_DIR, default=None,
+                            help="réutilise le cache disque des logs analysés (dossier optionnel)")
+    arg_parser.add_argument("--open", action="store_true", help="ouvre la page dans le navigateur")
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    cache = ParseCache(args.cache) if args.cache else None
+    store = load_or_parse(args.logfile, cache=cache, workers=args.workers)
+    if not store:
+        sys.exit("Aucune trame XML valide n'a été trouvée dans ce fichier.")
+    print(f"{store.frame_count} trames, {len(store)} tags chargés en {time.perf_counter() - t0:.2f} s")
+    app = create_app(SeriesServer(store, os.path.abspath(args.logfile)))
+    url = f"http://{args.host}:{args.port}/"
+    if args.open:
+        threading.Timer(1.0, webbrowser.open, (url,)).start()
+    app.run(host=args.host, port=args.port, threaded=True)
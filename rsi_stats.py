@@ -0,0 +1,77 @@
+import numpy as np
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# Au-delà de ce nombre de valeurs distinctes, l'histogramme est calculé par classes
+MAX_DISTINCT_VALUES = 256
+HISTOGRAM_BINS = 100
+
+
+def compute_tag_stats(values):
+    """Résumé d'une série en un tri : min, max, moyenne, écart-type, percentiles, part non nulle, histogramme.
+
+    Calculé sur les valeurs finies, part non nulle comprise ; les NaN et ±inf sont seulement comptés (nonfinite_count).
+    """
+    values = np.asarray(values)
+    count = int(values.size)
+    valid = values[np.isfinite(values)] if values.dtype.kind == 'f' else values
+    stats = {
+        "count": count,
+        "nonfinite_count": count - int(valid.size),
+        "min": None, "max": None, "mean": None, "std": None,
+        "nonzero_ratio": float(np.count_nonzero(valid)) / valid.size if valid.size else None,
+        "percentiles": {},
+        "histogram": {"kind": "values", "x": [], "y": [], "width": None},
+    }
+    if not valid.size:
+        return stats
+
+    ordered = np.sort(valid)
+    stats["min"] = float(ordered[0])
+    stats["max"] = float(ordered[-1])
+    mean = ordered.mean(dtype=np.float64)
+    stats["mean"] = float(mean)
+    stats["std"] = float(ordered.std(dtype=np.float64))
+    stats["percentiles"] = {
+        f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(ordered, PERCENTILES))
+    }
+
+    # Comptage des valeurs distinctes à partir du tableau déjà trié (équivalent de np.unique)
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    if len(starts) <= MAX_DISTINCT_VALUES:
+        counts = np.diff(np.append(starts, ordered.size))
+        stats["histogram"] = {"kind": "values", "x": ordered[starts].tolist(), "y": counts.tolist(), "width": None}
+    else:
+        counts, edges = np.histogram(ordered, bins=HISTOGRAM_BINS)
+        stats["histogram"] = {
+            "kind": "bins",
+            "x": ((edges[:-1] + edges[1:]) / 2).tolist(),
+            "y": counts.tolist(),
+            "width": float(edges[1] - edges[0]),
+        }
+    return _finite_or_none(stats)
+
+
+def _finite_or_none(obj):
+    # inf/NaN ne sont pas du JSON valide
+    if isinstance(obj, dict):
+        return {k: _finite_or_none(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_finite_or_none(v) for v in obj]
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    return obj
+
+
+def tag_stats(store, tag):
+    """Statistiques d'un tag, recalculées seulement si sa colonne a grossi depuis le dernier calcul."""
+    store.flush_rows()
+    cached = store.stats.get(tag)
+    if cached is None or cached["count"] != len(store.columns[tag]):
+        cached = store.stats[tag] = compute_tag_stats(store[tag])
+    return cached
+
+
+def compute_all_stats(store):
+    for tag in store.keys():
+        tag_stats(store, tag)
+    return store.stats
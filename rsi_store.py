@@ -0,0 +1,399 @@
+from array import array
+import numpy as np
+
+# Taille d'un bloc avant qu'il ne soit figé en tableau NumPy
+DEFAULT_CHUNK_SIZE = 65536
+
+# Facteur de croissance du tableau compacté quand des valeurs arrivent après compaction
+GROWTH_FACTOR = 1.5
+
+# Codes array.array correspondant aux dtypes NumPy supportés
+_TYPECODES = {
+    np.dtype(np.float64): 'd',
+    np.dtype(np.float32): 'f',
+}
+
+# Entiers essayés, du plus compact au plus large, pour stocker sans perte les colonnes entières (IPOC, Delay, E/S)
+_INT_DTYPES = tuple(np.dtype(t) for t in (np.int8, np.int16, np.int32, np.int64))
+
+
+def narrowest_dtype(values, max_dtype=np.float64):
+    """Plus petit dtype représentant exactement values : entier si toutes les valeurs sont entières,
+    float32 si l'aller-retour est exact, sinon max_dtype."""
+    values = np.asarray(values)
+    max_dtype = np.dtype(max_dtype)
+    if not values.size:
+        return _INT_DTYPES[0]
+    if values.dtype.kind in 'iub' or (np.isfinite(values).all() and np.array_equal(values, np.trunc(values))):
+        lo, hi = values.min(), values.max()
+        for dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return dtype
+        if values.dtype.kind in 'iu':
+            return values.dtype
+    if max_dtype.itemsize > 4 and np.array_equal(values.astype(np.float32), values, equal_nan=True):
+        return np.dtype(np.float32)
+    return _cap(values.dtype, max_dtype)
+
+
+def _cap(dtype, max_dtype):
+    # Les flottants ne dépassent pas le dtype du FrameStore (float32 choisi pour réduire la mémoire)
+    if dtype.kind == 'f' and dtype.itemsize > max_dtype.itemsize:
+        return max_dtype
+    return dtype
+
+
+class TagColumn:
+    """Colonne typée extensible : valeurs d'un tag et index des trames où il apparaît.
+
+    Avec adaptive, chaque bloc est stocké dans le plus petit dtype exact (voir narrowest_dtype) et
+    le dtype de la colonne est élargi sans perte quand un bloc ne tient plus ; dtype reste le maximum des flottants.
+    """
+
+    __slots__ = ("dtype", "max_dtype", "adaptive", "chunk_size", "start", "size", "_base", "_fbase", "_base_size",
+                 "_chunks", "_frame_chunks", "_buf", "_fbuf")
+
+    def __init__(self, dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE, adaptive=False):
+        self.max_dtype = np.dtype(dtype)
+        self.adaptive = adaptive
+        self.dtype = _INT_DTYPES[0] if adaptive else self.max_dtype
+        self.chunk_size = chunk_size
+        self.start = 0
+        self.size = 0
+        # Tableau compacté (avec éventuellement de la capacité libre) et blocs en attente
+        self._base = None
+        self._fbase = None
+        self._base_size = 0
+        self._chunks = []
+        # None tant que la colonne est dense (une valeur par trame, sans trou)
+        self._frame_chunks = None
+        self._buf = array(_TYPECODES[self.max_dtype])
+        self._fbuf = None
+
+    @property
+    def dense(self):
+        return self._frame_chunks is None
+
+    def append(self, frame, value):
+        if self.size == 0:
+            self.start = frame
+        elif self._frame_chunks is None and frame != self.start + self.size:
+            self._materialize_frames()
+        if self._fbuf is not None:
+            self._fbuf.append(frame)
+        self._buf.append(value)
+        self.size += 1
+        if len(self._buf) >= self.chunk_size:
+            self._seal()
+
+    def extend(self, frames, values, narrow=False):
+        # narrow : valeurs brutes de l'analyse, dont on cherche le dtype exact le plus compact ;
+        # sinon (colonnes déjà typées : cache, processus d'analyse) leur dtype est conservé
+        n = len(values)
+        if not n:
+            return
+        if self.size == 0:
+            self.start = int(frames[0])
+        if self._frame_chunks is None:
+            expected = self.start + self.size
+            consecutive = frames[0] == expected and frames[-1] == expected + n - 1
+            if not consecutive or (n > 2 and not np.all(np.diff(frames) == 1)):
+                self._materialize_frames()
+        if len(self._buf):
+            self._seal()
+        self._chunks.append(self._typed(values, narrow))
+        if self._frame_chunks is not None:
+            self._frame_chunks.append(np.ascontiguousarray(frames, dtype=np.int64))
+        self.size += n
+
+    def extend_dense(self, start_frame, values):
+        # Bloc de trames consécutives à partir de start_frame
+        n = len(values)
+        if not n:
+            return
+        if self.size == 0:
+            self.start = start_frame
+        if self._frame_chunks is None and start_frame != self.start + self.size:
+            self._materialize_frames()
+        if len(self._buf):
+            self._seal()
+        self._chunks.append(self._typed(values, False))
+        if self._frame_chunks is not None:
+            self._frame_chunks.append(np.arange(start_frame, start_frame + n, dtype=np.int64))
+        self.size += n
+
+    def _materialize_frames(self):
+        # La colonne perd son caractère dense : on matérialise l'index implicite
+        sealed = self._base_size + sum(len(c) for c in self._chunks)
+        if self._base is not None:
+            self._fbase = np.arange(self.start, self.start + self._base_size, dtype=np.int64)
+        self._frame_chunks = []
+        if sealed > self._base_size:
+            self._frame_chunks.append(np.arange(self.start + self._base_size, self.start + sealed, dtype=np.int64))
+        self._fbuf = array('q', range(self.start + sealed, self.start + self.size))
+
+    def _typed(self, values, narrow):
+        # Bloc converti au dtype retenu ; le dtype de la colonne est élargi pour le contenir sans perte
+        if not self.adaptive:
+            return np.ascontiguousarray(values, dtype=self.dtype)
+        values = np.asarray(values)
+        dtype = narrowest_dtype(values, self.max_dtype) if narrow else _cap(values.dtype, self.max_dtype)
+        self.dtype = _cap(np.promote_types(self.dtype, dtype), self.max_dtype)
+        return np.ascontiguousarray(values, dtype=dtype)
+
+    def _seal(self):
+        # Fige le bloc courant (sans copie hors réduction de dtype) et en ouvre un nouveau
+        self._chunks.append(self._typed(np.frombuffer(self._buf, dtype=self.max_dtype), True))
+        self._buf = array(self._buf.typecode)
+        if self._fbuf is not None:
+            self._frame_chunks.append(np.frombuffer(self._fbuf, dtype=np.int64))
+            self._fbuf = array('q')
+
+    def compact(self):
+        if len(self._buf):
+            self._seal()
+        if not self._chunks:
+            return
+        self._base, size = _grow_merge(self._base, self._base_size, self._chunks, self.dtype)
+        if self._frame_chunks is not None:
+            self._fbase, _ = _grow_merge(self._fbase, self._base_size, self._frame_chunks, np.int64)
+            self._frame_chunks = []
+        self._chunks = []
+        self._base_size = size
+
+    def share_frames(self, pool):
+        """Remplace l'index de trames compacté par un tableau identique déjà présent dans pool
+        (dict partagé entre colonnes), ou l'y ajoute ; les tableaux partagés passent en lecture seule."""
+        if self._frame_chunks is None or self._fbase is None or self._chunks or isinstance(self._fbase, np.memmap):
+            return
+        frames = self._fbase[:self._base_size]
+        candidates = pool.setdefault((self._base_size, int(frames[0]), int(frames[-1])), [])
+        for candidate in candidates:
+            if candidate is self._fbase:
+                return
+            if np.array_equal(candidate[:self._base_size], frames):
+                self._fbase = candidate
+                return
+        # Lecture seule : un ajout ultérieur (suivi) recopie le tableau au lieu d'écrire dans la capacité partagée
+        self._fbase.setflags(write=False)
+        candidates.append(self._fbase)
+
+    @property
+    def values(self):
+        self.compact()
+        if self._base is None:
+            return np.empty(0, dtype=self.dtype)
+        return self._base[:self._base_size]
+
+    @property
+    def frames(self):
+        if self._frame_chunks is None:
+            return np.arange(self.start, self.start + self.size, dtype=np.int64)
+        self.compact()
+        if self._fbase is None:
+            return np.empty(0, dtype=np.int64)
+        return self._fbase[:self._base_size]
+
+    @property
+    def nbytes(self):
+        n = sum(c.nbytes for c in self._chunks) + len(self._buf) * self._buf.itemsize
+        if self._base is not None:
+            n += self._base.nbytes
+        if self._frame_chunks is not None:
+            n += sum(c.nbytes for c in self._frame_chunks) + len(self._fbuf) * self._fbuf.itemsize
+            if self._fbase is not None:
+                n += self._fbase.nbytes
+        return n
+
+    def __len__(self):
+        return self.size
+
+
+def _grow_merge(base, base_size, chunks, dtype):
+    # Ajoute les blocs au tableau compacté (converti en dtype si la colonne a été élargie) ; capacité
+    # augmentée géométriquement pour que les ajouts successifs (suivi de fichier) restent en coût amorti constant
+    n = base_size + sum(len(c) for c in chunks)
+    if base is None:
+        merged = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        return merged.astype(dtype, copy=False), n
+    if n > len(base) or not base.flags.writeable or base.dtype != dtype:
+        grown = np.empty(max(n, int(len(base) * GROWTH_FACTOR)), dtype=dtype)
+        grown[:base_size] = base[:base_size]
+        base = grown
+    pos = base_size
+    for chunk in chunks:
+        base[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+    return base, n
+
+
+class FrameStore:
+    """Stockage colonnaire des tags RSI : une colonne typée par tag, alignées sur un index de trame commun.
+
+    dtype est le flottant le plus large stocké ; avec adaptive (par défaut), chaque colonne prend le plus
+    petit dtype exact de ses valeurs (int8 pour un bit d'E/S, int64 pour l'IPOC, float32 si exact).
+    """
+
+    def __init__(self, dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE, adaptive=True):
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in _TYPECODES:
+            raise ValueError(f"dtype non supporté : {self.dtype}")
+        self.chunk_size = chunk_size
+        self.adaptive = adaptive
+        self.columns = {}
+        self.frame_count = 0
+        # Octets du fichier source déjà analysés (reprise en mode suivi)
+        self.source_bytes = 0
+        # Statistiques par tag (rsi_stats), conservées avec les données
+        self.stats = {}
+        # Temps (s) de chaque trame tiré de l'IPOC (rsi_timing), None tant qu'il n'est pas calculé
+        self.times = None
+        # Diagnostic de la dernière analyse (rsi_parser.ParseStats)
+        self.parse_stats = None
+        # Trames complètes en attente, écrites ligne à ligne puis ventilées par colonne :
+        # un tampon (valeurs, trames) par disposition de trame (trames Rob et Sen alternées)
+        self._pending = {}
+        self._row_layouts = {}
+
+    def new_frame(self):
+        frame = self.frame_count
+        self.frame_count += 1
+        return frame
+
+    def _column(self, tag):
+        column = self.columns.get(tag)
+        if column is None:
+            column = self.columns[tag] = TagColumn(self.dtype, self.chunk_size, self.adaptive)
+        return column
+
+    def append(self, tag, frame, value):
+        if self._pending:
+            self.flush_rows()
+        column = self.columns.get(tag)
+        if column is None:
+            column = self._column(tag)
+        column.append(frame, value)
+
+    def append_row(self, tags, frame, values):
+        """Ajoute une trame complète ; tags est un tuple stable donnant l'ordre des valeurs."""
+        pending = self._pending.get(tags)
+        if pending is None:
+            layout = self._row_layouts.get(tags)
+            if layout is None:
+                layout = self._add_layout(tags)
+            # Une colonne partagée avec une autre disposition en attente doit recevoir ses valeurs dans l'ordre des trames
+            for other in layout[1]:
+                if other in self._pending:
+                    self._flush_layout(other)
+            pending = self._pending[tags] = (array(_TYPECODES[self.dtype]), array('q'))
+        pending[0].extend(values)
+        pending[1].append(frame)
+        if len(pending[1]) >= self.chunk_size:
+            self._flush_layout(tags)
+
+    def _add_layout(self, tags):
+        # Chemins résolus une fois par disposition en colonnes (et indices dans la trame)
+        indices = {}
+        for j, tag in enumerate(tags):
+            indices.setdefault(tag, []).append(j)
+        conflicts = set()
+        for other, (other_columns, other_conflicts) in self._row_layouts.items():
+            if any(tag in indices for tag, _, _ in other_columns):
+                conflicts.add(other)
+                other_conflicts.add(tags)
+        columns = [(tag, self._column(tag), j) for tag, j in indices.items()]
+        layout = self._row_layouts[tags] = (columns, conflicts)
+        return layout
+
+    def _flush_layout(self, tags):
+        values, frames = self._pending.pop(tags)
+        frames = np.frombuffer(frames, dtype=np.int64)
+        block = np.frombuffer(values, dtype=self.dtype).reshape(len(frames), len(tags))
+        for _, column, indices in self._row_layouts[tags][0]:
+            if len(indices) == 1:
+                column.extend(frames, block[:, indices[0]], narrow=True)
+            else:
+                # Chemin répété dans la trame : valeurs entrelacées dans l'ordre du document
+                column.extend(np.repeat(frames, len(indices)), block[:, indices].ravel(), narrow=True)
+
+    def flush_rows(self):
+        for tags in list(self._pending):
+            self._flush_layout(tags)
+
+    def frames(self, tag):
+        self.flush_rows()
+        return self.columns[tag].frames
+
+    def finalize(self):
+        self.flush_rows()
+        # Les colonnes d'une même trame (ex. centaines de bits d'E/S) partagent un seul index de trames
+        pool = {}
+        for column in self.columns.values():
+            column.compact()
+            column.share_frames(pool)
+        return self
+
+    def export_columns(self):
+        """Colonnes sous forme compacte {tag: (start, frames ou None si dense, valeurs)}."""
+        self.finalize()
+        return {
+            tag: (column.start, None if column.dense else column.frames, column.values)
+            for tag, column in self.columns.items()
+        }
+
+    def merge_columns(self, columns, frame_count):
+        """Ajoute à la suite des trames existantes des colonnes issues de export_columns."""
+        self.flush_rows()
+        offset = self.frame_count
+        for tag, (start, frames, values) in columns.items():
+            if frames is None:
+                self._column(tag).extend_dense(start + offset, values)
+            else:
+                # Sans décalage, les trames sont reprises telles quelles (vues d'une requête, rsi_query)
+                self._column(tag).extend(frames + offset if offset else frames, values)
+        self.frame_count += frame_count
+
+    def clear(self):
+        self.columns.clear()
+        self.frame_count = 0
+        self.source_bytes = 0
+        self.stats = {}
+        self.times = None
+        self.parse_stats = None
+        self._pending.clear()
+        self._row_layouts.clear()
+
+    @property
+    def nbytes(self):
+        # Index de trames partagés comptés une seule fois
+        total = 0
+        shared = set()
+        for column in self.columns.values():
+            total += column.nbytes
+            if not column.dense and column._fbase is not None:
+                if id(column._fbase) in shared:
+                    total -= column._fbase.nbytes
+                shared.add(id(column._fbase))
+        return total
+
+    def keys(self):
+        return self.columns.keys()
+
+    def items(self):
+        self.flush_rows()
+        for tag, column in self.columns.items():
+            yield tag, column.values
+
+    def __getitem__(self, tag):
+        self.flush_rows()
+        return self.columns[tag].values
+
+    def __contains__(self, tag):
+        return tag in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
@@ -0,0 +1,161 @@
+import json
+import os
+import numpy as np
+
+# Période des trames RSI (ms, pas de l'IPOC) et IPOC de départ
+CYCLE_MS = 4
+START_IPOC = 4208163864
+# Trames générées et formatées par bloc
+BLOCK_FRAMES = 8192
+
+
+def frame_template(tags=16, depth=2, attr_density=3, escaped_quotes=True):
+    """Gabarit %-format d'une trame Rob : `tags` champs numériques répartis en attributs,
+    dans des chaînes de `depth` éléments imbriqués portant chacun `attr_density` attributs,
+    suivis des éléments Delay et IPOC. Renvoie (gabarit, nombre de champs)."""
+    q = '\\"' if escaped_quotes else '"'
+    attr_density = max(1, attr_density)
+    depth = max(1, depth)
+    parts = [f'<Rob Type={q}KUKA{q}>']
+    fields = 0
+    block = 0
+    while fields < tags:
+        closing = []
+        for level in range(depth):
+            if fields >= tags:
+                break
+            name = f"B{block}" if level == 0 else f"L{level}"
+            n = min(attr_density, tags - fields)
+            attrs = ''.join(f' a{i}={q}%.4f{q}' for i in range(n))
+            parts.append(f'<{name}{attrs}>')
+            closing.append(f'</{name}>')
+            fields += n
+        parts.extend(reversed(closing))
+        block += 1
+    parts.append(f'<Delay D={q}%d{q}/><IPOC>%d</IPOC></Rob>')
+    return ''.join(parts), fields
+
+
+def generate_log(path, frames, tags=16, depth=2, attr_density=3, malformed_ratio=0.001,
+                 escaped_quotes=True, sen_every=1, missed_ratio=0.005, late_ratio=0.02, seed=0):
+    """Écrit un log RSI synthétique au format attendu par parse_log_file ; renvoie le nombre de trames valides.
+
+    Chaque trame robot (Received) est suivie toutes les `sen_every` trames d'une réponse (Sent)
+    renvoyant son IPOC ; une proportion malformed_ratio de lignes est tronquée (XML invalide).
+    """
+    rng = np.random.default_rng(seed)
+    template, n_fields = frame_template(tags, depth, attr_density, escaped_quotes)
+    q = '\\"' if escaped_quotes else '"'
+    sen = f'<Sen Type={q}ImFree{q}><EStr>Info</EStr><RKorr X={q}%.4f{q} Y={q}%.4f{q}/><IPOC>%d</IPOC></Sen>'
+    prefix_rob = '2024-01-01 10:00:00 Received: '
+    prefix_sen = '2024-01-01 10:00:00 Sent: '
+    suffix = '\\n\n' if escaped_quotes else '\n'
+    values = rng.uniform(-1000, 1000, n_fields)
+    ipoc = START_IPOC
+    valid = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for first in range(0, frames, BLOCK_FRAMES):
+            n = min(BLOCK_FRAMES, frames - first)
+            # Marche aléatoire pour des séries réalistes (compressibles comme les vraies)
+            walk = values + np.cumsum(rng.normal(0, 0.05, (n, n_fields)), axis=0)
+            values = walk[-1]
+            steps = np.where(rng.random(n) < missed_ratio, 2 * CYCLE_MS, CYCLE_MS)
+            ipocs = ipoc + np.cumsum(steps)
+            ipoc = int(ipocs[-1])
+            delays = np.where(rng.random(n) < late_ratio, rng.integers(1, 4, n), 0)
+            malformed = rng.random(n) < malformed_ratio
+            cuts = rng.integers(10, len(template), n)
+            lines = []
+            for i, row in enumerate(walk.tolist()):
+                xml = template % (*row, delays[i], ipocs[i])
+                if malformed[i]:
+                    xml = xml[:cuts[i]]
+                else:
+                    valid += 1
+                lines.append(prefix_rob + xml + suffix)
+                if sen_every and (first + i) % sen_every == 0:
+                    lines.append(prefix_sen + sen % (row[0] * 1e-3, row[-1] * 1e-3, ipocs[i]) + suffix)
+                    valid += 1
+            f.write(''.join(lines))
+    return valid
+
+
+def generate_apt(path, moves, step_mm=10.0, seed=0):
+    """Programme APT synthétique : GOTO en zigzag, avec FEDRAT et quelques RAPID ; renvoie la longueur du parcours (mm)."""
+    rng = np.random.default_rng(seed)
+    point = np.zeros(3)
+    length = 0.0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("PARTNO/SYNTHETIQUE\nFEDRAT/ 1200.0000\n")
+        f.write(f"GOTO/ {point[0]:.4f}, {point[1]:.4f}, {point[2]:.4f}\n")
+        for i in range(moves):
+            if i % 500 == 499:
+                f.write("RAPID\n")
+            elif i % 500 == 0 and i:
+                f.write(f"FEDRAT/ {rng.uniform(600, 3000):.4f}\n")
+            direction = rng.normal(0, 1, 3)
+            direction[2] *= 0.1
+            delta = direction / np.linalg.norm(direction) * step_mm
+            point = point + delta
+            length += step_mm
+            f.write(f"GOTO/ {point[0]:.4f}, {point[1]:.4f}, {point[2]:.4f}\n")
+    return length
+
+
+def _synthetic_tcp(apt_path, samples, noise_mm, seed):
+    # Positions réparties uniformément le long de la polyligne APT, bruitées ; (temps ms, positions, vitesse mm/s)
+    rng = np.random.default_rng(seed)
+    points = []
+    with open(apt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith("GOTO"):
+                points.append([float(v) for v in line.split('/', 1)[1].split(',')])
+    points = np.array(points)
+    seg = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    abscissa = np.concatenate(([0.0], np.cumsum(seg)))
+    s = np.linspace(0, abscissa[-1], samples)
+    tcp = np.column_stack([np.interp(s, abscissa, points[:, k]) for k in range(3)])
+    tcp += rng.normal(0, noise_mm, tcp.shape)
+    times = np.arange(samples) * CYCLE_MS
+    speed = np.gradient(s, times / 1000.0) if samples > 1 else np.zeros(samples)
+    return times, tcp, speed
+
+
+def generate_rsi_json(path, apt_path, samples, noise_mm=0.05, seed=0):
+    """Mesure RSI synthétique (format JSON lu par comparaison.load_rsi_data) suivant le parcours APT bruité."""
+    times, tcp, speed = _synthetic_tcp(apt_path, samples, noise_mm, seed)
+    data = {
+        "timeseries": [{"Time": int(t), "TCP_Speed": round(float(v), 3)} for t, v in zip(times, speed)],
+        "tcp_positions": np.round(tcp, 4).tolist(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return samples
+
+
+def generate_rsi_columns(path, apt_path, samples, noise_mm=0.05, seed=0):
+    """Même mesure que generate_rsi_json, au format .npy en colonnes de rsi_tcp.export_tcp_columns."""
+    times, tcp, speed = _synthetic_tcp(apt_path, samples, noise_mm, seed)
+    array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(samples, 5), fortran_order=True)
+    array[:, 0] = times / 1000.0
+    array[:, 1:4] = tcp
+    array[:, 4] = speed
+    array.flush()
+    return samples
+
+
+if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Génère un log KUKA RSI synthétique")
+    arg_parser.add_argument("output")
+    arg_parser.add_argument("--frames", type=int, default=100000)
+    arg_parser.add_argument("--tags", type=int, default=16, help="champs numériques par trame robot")
+    arg_parser.add_argument("--depth", type=int, default=2, help="profondeur d'imbrication des éléments")
+    arg_parser.add_argument("--attr-density", type=int, default=3, help="attributs numériques par élément")
+    arg_parser.add_argument("--malformed", type=float, default=0.001, help="proportion de lignes tronquées")
+    arg_parser.add_argument("--plain-quotes", action="store_true", help="guillemets non échappés")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    valid = generate_log(args.output, args.frames, args.tags, args.depth, args.attr_density, args.malformed,
+                         not args.plain_quotes, seed=args.seed)
+    print(f"{args.output} : {valid} trames valides, {os.path.getsize(args.output) / 1e6:.1f} Mo")
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from rsi_timing import frame_times
+
+# Colonnes du fichier trajectoire, dans l'ordre attendu par comparaison.load_rsi_data
+TCP_COLUMNS = ("Timestamp", "X", "Y", "Z", "RealSpeed_mm_s")
+# Position cartésienne réelle du TCP envoyée par le robot (mm)
+DEFAULT_POSITION_TAG = "Rob/RIst"
+TCP_SUFFIX = ".tcp.npy"
+
+
+def _aligned(store, tags):
+    # Valeurs des tags sur les trames où ils sont tous présents (le plus souvent, les mêmes trames)
+    frames = [store.frames(tag) for tag in tags]
+    if all(len(f) == len(frames[0]) and np.array_equal(f, frames[0]) for f in frames[1:]):
+        return frames[0], [store[tag] for tag in tags]
+    common = frames[0]
+    for f in frames[1:]:
+        common = np.intersect1d(common, f, assume_unique=True)
+    return common, [store[tag][np.searchsorted(f, common)] for tag, f in zip(tags, frames)]
+
+
+def tcp_speed(t, x, y, z):
+    """Vitesse du TCP (mm/s) : moyenne des vitesses des deux segments voisins de chaque point.
+
+    Les segments de durée nulle (trames sans nouvel IPOC) sont ignorés.
+    """
+    n = len(t)
+    if n < 2:
+        return np.zeros(n)
+    length = np.sqrt(np.diff(x) ** 2 + np.diff(y) ** 2 + np.diff(z) ** 2)
+    dt = np.diff(t)
+    segment = np.divide(length, dt, out=np.full(n - 1, np.nan), where=dt > 0)
+    before, after = segment[:-1], segment[1:]
+    speed = np.empty(n)
+    speed[0], speed[-1] = segment[0], segment[-1]
+    speed[1:-1] = np.where(np.isnan(before), after, np.where(np.isnan(after), before, (before + after) / 2))
+    return np.nan_to_num(speed, nan=0.0)
+
+
+def tcp_columns(store, position_tag=DEFAULT_POSITION_TAG, speed_tag=None):
+    """(temps en s, X, Y, Z, vitesse en mm/s) du TCP, temps tiré de l'IPOC.
+
+    Sans speed_tag, la vitesse est dérivée des positions successives.
+    """
+    tags = [f"{position_tag}@{axis}" for axis in "XYZ"]
+    if speed_tag is not None:
+        tags.append(speed_tag)
+    missing = [tag for tag in tags if tag not in store]
+    if missing:
+        raise KeyError(f"Tags absents du log : {', '.join(missing)}")
+    times = frame_times(store)
+    if times is None:
+        raise ValueError("Log sans IPOC : temps des positions inconnu")
+    frames, values = _aligned(store, tags)
+    t = times[frames]
+    x, y, z = (np.asarray(v, dtype=np.float64) for v in values[:3])
+    speed = np.asarray(values[3], dtype=np.float64) if speed_tag is not None else tcp_speed(t, x, y, z)
+    return t, x, y, z, speed
+
+
+def export_tcp_columns(store, output_path, position_tag=DEFAULT_POSITION_TAG, speed_tag=None):
+    """Écrit la trajectoire du TCP dans un .npy float64 (n, 5) rangé par colonne (ordre Fortran) :
+    relu par memory-map, chaque colonne est un tableau contigu sans copie. Renvoie le nombre de points."""
+    columns = tcp_columns(store, position_tag, speed_tag)
+    n = len(columns[0])
+    tmp = f"{output_path}.tmp-{os.getpid()}.npy"
+    # Écriture colonne par colonne dans le fichier : pas de copie (n, 5) supplémentaire en mémoire
+    array = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float64, shape=(n, len(TCP_COLUMNS)),
+                                      fortran_order=True)
+    for j, values in enumerate(columns):
+        array[:, j] = values
+    array.flush()
+    del array
+    os.replace(tmp, output_path)
+    return n
+
+
+def load_tcp_columns(path):
+    """Trajectoire écrite par export_tcp_columns, en memory-map (lecture seule)."""
+    array = np.load(path, mmap_mode='r')
+    if array.ndim != 2 or array.shape[1] != len(TCP_COLUMNS):
+        raise ValueError(f"{path} : tableau (n, {len(TCP_COLUMNS)}) attendu, {array.shape} trouvé")
+    return array
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from rsi_cache import ParseCache, load_or_parse
+    arg_parser = argparse.ArgumentParser(description="Export de la trajectoire du TCP d'un log KUKA RSI pour comparaison.py")
+    arg_parser.add_argument("logfile")
+    arg_parser.add_argument("-o", "--output", help=f"fichier .npy (défaut : <log>{TCP_SUFFIX})")
+    arg_parser.add_argument("--position", default=DEFAULT_POSITION_TAG, help="élément portant les attributs X, Y, Z")
+    arg_parser.add_argument("--speed", help="tag de vitesse à utiliser au lieu de la dérivée des positions")
+    arg_parser.add_argument("--cache", action="store_true", help="utilise le cache disque des logs analysés")
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    store = load_or_parse(args.logfile, cache=ParseCache() if args.cache else None, workers=os.cpu_count())
+    output = args.output or os.path.splitext(args.logfile)[0] + TCP_SUFFIX
+    n = export_tcp_columns(store, output, args.position, args.speed)
+    print(f"{output} : {n} points en {time.perf_counter() - t0:.2f} s")
@@ -0,0 +1,207 @@
+import numpy as np
+from rsi_stats import compute_tag_stats
+
+# Unité du compteur IPOC (millisecondes) et période de repli du compteur 32 bits
+IPOC_UNIT_S = 1e-3
+IPOC_WRAP = 2 ** 32
+# Nombre de rafales de retard détaillées dans le rapport
+TOP_BURSTS = 10
+
+
+def is_ipoc_tag(tag):
+    return tag.rsplit('/', 1)[-1] == "IPOC"
+
+
+def is_delay_tag(tag):
+    return "delay" in tag.lower()
+
+
+def frame_ipoc(store):
+    """IPOC de chaque trame (NaN pour les trames sans IPOC), à partir des tags .../IPOC."""
+    ipoc = np.full(store.frame_count, np.nan)
+    for tag in store.keys():
+        if is_ipoc_tag(tag):
+            ipoc[store.frames(tag)] = store[tag]
+    return ipoc
+
+
+def _unwrap(ipoc):
+    # Différences successives d'IPOC, corrigées du repli du compteur 32 bits
+    steps = np.diff(ipoc)
+    steps[steps < -IPOC_WRAP / 2] += IPOC_WRAP
+    return steps
+
+
+def nominal_cycle(steps):
+    """Période nominale : écart positif le plus fréquent entre IPOC successifs."""
+    positive = steps[steps > 0]
+    if not positive.size:
+        return None
+    values, counts = np.unique(positive, return_counts=True)
+    return float(values[counts.argmax()])
+
+
+def frame_times(store):
+    """Temps (s) de chaque trame depuis la première, tiré de l'IPOC ; None si le log n'a pas d'IPOC.
+
+    Les trames sans IPOC prennent le temps de la précédente, et un retour en arrière du compteur
+    (redémarrage) compte pour un cycle : le temps reste croissant pour les tracés.
+    Le résultat est conservé dans store.times tant que le nombre de trames ne change pas.
+    """
+    if store.times is not None and len(store.times) == store.frame_count:
+        return store.times
+    ipoc = frame_ipoc(store)
+    known = np.flatnonzero(~np.isnan(ipoc))
+    if not known.size:
+        return None
+    steps = _unwrap(ipoc[known])
+    cycle = nominal_cycle(steps) or 0.0
+    steps[steps < 0] = cycle
+    known_times = np.concatenate(([0.0], np.cumsum(steps))) * IPOC_UNIT_S
+    # Report de la dernière valeur connue sur les trames sans IPOC
+    last_known = np.zeros(store.frame_count, dtype=np.int64)
+    last_known[known] = np.arange(len(known))
+    store.times = known_times[np.maximum.accumulate(last_known)]
+    return store.times
+
+
+def tag_times(store, tag):
+    """Abscisse temporelle (s) des valeurs d'un tag, ou ses index de trame si le log n'a pas d'IPOC."""
+    times = frame_times(store)
+    frames = store.frames(tag)
+    return frames if times is None else times[frames]
+
+
+def _runs(mask):
+    # (début, fin exclue) des suites consécutives de True
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class TimingReport:
+    """Analyse des cycles RSI d'un log : cycles manqués, gigue, réponses désynchronisées, rafales de retard."""
+
+    def __init__(self, store):
+        self.ipoc_tag = None
+        self.cycle_ms = None
+        self.cycles = 0
+        self.duration_s = 0.0
+        self.missed_cycles = 0
+        self.gaps = []
+        self.resets = 0
+        self.jitter = None
+        self.desync_responses = 0
+        self.delay_tag = None
+        self.late_frames = 0
+        self.bursts = 0
+        self.top_bursts = []
+
+        # Référence : les trames reçues du robot (Rob/IPOC), sinon le tag IPOC apparu le premier
+        ipoc_tags = sorted((t for t in store.keys() if is_ipoc_tag(t)),
+                           key=lambda t: (not t.startswith("Rob/"), store.columns[t].start, t))
+        if ipoc_tags:
+            self._analyze_cycles(store, ipoc_tags)
+        delay_tags = sorted(t for t in store.keys() if is_delay_tag(t))
+        if delay_tags:
+            self._analyze_delay(store, delay_tags[0])
+
+    def _analyze_cycles(self, store, ipoc_tags):
+        self.ipoc_tag = tag = ipoc_tags[0]
+        frames = store.frames(tag)
+        ipoc = np.asarray(store[tag], dtype=np.float64)
+        steps = _unwrap(ipoc)
+        cycle = nominal_cycle(steps)
+        self.cycles = len(ipoc)
+        if cycle is None:
+            return
+        self.cycle_ms = cycle * IPOC_UNIT_S * 1000
+        # Cycles manqués : écarts multiples de la période (arrondis), au-delà d'un cycle
+        missing = np.rint(steps / cycle).astype(np.int64) - 1
+        gap_at = np.flatnonzero(missing > 0)
+        self.missed_cycles = int(missing[gap_at].sum())
+        self.gaps = [
+            {"frame": int(frames[i + 1]), "ipoc": float(ipoc[i + 1]), "missed": int(missing[i])}
+            for i in gap_at[np.argsort(-missing[gap_at], kind='stable')][:TOP_BURSTS]
+        ]
+        self.resets = int(np.count_nonzero(steps < 0))
+        positive = steps[steps > 0]
+        self.duration_s = float(positive.sum()) * IPOC_UNIT_S
+        # Gigue : distribution des pas entre IPOC successifs (ms), avec leur histogramme
+        self.jitter = compute_tag_stats(positive * IPOC_UNIT_S * 1000)
+
+        # Réponses dont l'IPOC ne renvoie pas celui de la dernière trame reçue
+        for other in ipoc_tags[1:]:
+            other_frames = store.frames(other)
+            previous = np.searchsorted(frames, other_frames, side='right') - 1
+            valid = previous >= 0
+            echoed = ipoc[previous[valid]]
+            self.desync_responses += int(np.count_nonzero(store[other][valid] != echoed))
+
+    def _analyze_delay(self, store, tag):
+        # Le robot compte lui-même les paquets en retard (Delay) : rafales = suites de trames où il est non nul
+        self.delay_tag = tag
+        values = store[tag]
+        frames = store.frames(tag)
+        late = values > 0
+        self.late_frames = int(np.count_nonzero(late))
+        starts, ends = _runs(late)
+        self.bursts = len(starts)
+        lengths = ends - starts
+        order = np.argsort(-lengths, kind='stable')[:TOP_BURSTS]
+        times = frame_times(store)
+        self.top_bursts = [
+            {
+                "frame": int(frames[starts[i]]),
+                "time_s": None if times is None else float(times[frames[starts[i]]]),
+                "frames": int(lengths[i]),
+                "max_delay": float(values[starts[i]:ends[i]].max()),
+            }
+            for i in order
+        ]
+
+    def to_dict(self):
+        return {
+            "ipoc_tag": self.ipoc_tag, "cycle_ms": self.cycle_ms, "cycles": self.cycles,
+            "duration_s": self.duration_s, "missed_cycles": self.missed_cycles, "gaps": self.gaps,
+            "resets": self.resets, "jitter_ms": self.jitter, "desync_responses": self.desync_responses,
+            "delay_tag": self.delay_tag, "late_frames": self.late_frames, "bursts": self.bursts,
+            "top_bursts": self.top_bursts,
+        }
+
+    def summary(self):
+        """Résumé texte du rapport."""
+        if self.cycle_ms is None:
+            lines = ["Aucun IPOC exploitable : analyse des cycles impossible."]
+        else:
+            longest = self.gaps[0]["missed"] if self.gaps else 0
+            lines = [
+                f"Cycle nominal : {self.cycle_ms:g} ms ({self.ipoc_tag}), {self.cycles} cycles sur {self.duration_s:.1f} s",
+                f"Cycles manqués : {self.missed_cycles} ({longest} au plus d'affilée)",
+                f"Redémarrages du compteur : {self.resets}",
+            ]
+            if self.jitter and self.jitter["count"]:
+                lines.append(f"Pas entre IPOC : moyenne {self.jitter['mean']:.3f} ms, écart-type {self.jitter['std']:.3f} ms, "
+                             f"p99 {self.jitter['percentiles']['p99']:g} ms, max {self.jitter['max']:g} ms")
+            lines.append(f"Réponses désynchronisées (IPOC non renvoyé) : {self.desync_responses}")
+        if self.delay_tag is not None:
+            lines.append(f"Trames en retard ({self.delay_tag} > 0) : {self.late_frames} en {self.bursts} rafales")
+            for burst in self.top_bursts[:3]:
+                when = f"{burst['time_s']:.3f} s" if burst["time_s"] is not None else f"trame {burst['frame']}"
+                lines.append(f"  rafale de {burst['frames']} trames à {when} (retard max {burst['max_delay']:g})")
+        return "\n".join(lines)
+
+
+def analyze_timing(store):
+    return TimingReport(store)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from rsi_cache import load_or_parse
+    arg_parser = argparse.ArgumentParser(description="Analyse des cycles RSI d'un log KUKA")
+    arg_parser.add_argument("logfile")
+    arg_parser.add_argument("--json", action="store_true", help="rapport complet au format JSON")
+    args = arg_parser.parse_args()
+    report = analyze_timing(load_or_parse(args.logfile))
+    print(json.dumps(report.to_dict(), indent=1) if args.json else report.summary())
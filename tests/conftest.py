@@ -0,0 +1,16 @@
+import os
+import sys
+import pytest
+
+# Les modules rsi_* sont à la racine du dépôt, sans paquet installé
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rsi_synth
+
+
+@pytest.fixture
+def synthetic_log(tmp_path):
+    """Log RSI synthétique (trames Received/Sent, quelques lignes tronquées) ; renvoie (chemin, trames valides)."""
+    path = tmp_path / "synthetic.log"
+    valid = rsi_synth.generate_log(str(path), 3000, tags=6, malformed_ratio=0.01, seed=1)
+    return str(path), valid
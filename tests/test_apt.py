@@ -0,0 +1,137 @@
+import re
+import numpy as np
+import pytest
+import rsi_apt
+from comparaison import densify_theoretical_path
+from rsi_apt import ARC, LINEAR, RAPID_FEEDRATE, read_apt, rotation_matrix
+from rsi_path import SegmentIndex
+
+LINEAR_PROGRAM = """PARTNO/TEST
+FEDRAT/ 600.0
+GOTO/ 0.0, 0.0, 50.0
+GOTO/ 10.0, 0.0, 50.0, 0.0, 0.0, 1.0
+RAPID
+GOTO/ 10.0, 20.0, 60.0
+FEDRAT/ MMPM, 1500
+GOTO/ 0.0, 20.0, -5.5
+GOTO/ -1.5e1, .5, +3.
+FEDRAT/1200.5
+GOTO/ 7.0, 8.0, 9.0
+"""
+
+
+def read_apt_lines(filepath, offset_translation, offset_rotation_deg):
+    # Lecture ligne par ligne d'origine (référence), pour les programmes sans arc
+    rotation = rotation_matrix(offset_rotation_deg)
+    segments, last, rapid, feedrate = [], None, False, None
+    number = r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+    with open(filepath, 'r') as f:
+        for line in f:
+            if "RAPID" in line:
+                rapid = True
+            elif "FEDRAT" in line:
+                rapid = False
+                match = re.search(rf'FEDRAT\s*/\s*(?:[A-Z]+\s*,\s*)?{number}', line)
+                if match:
+                    feedrate = float(match.group(1))
+            elif "GOTO" in line:
+                match = re.search(rf'GOTO\s*/\s*{number}\s*,\s*{number}\s*,\s*{number}', line)
+                if match:
+                    point = rotation @ np.array([float(m) for m in match.groups()]) + offset_translation
+                    if last is not None:
+                        segments.append((last, point, RAPID_FEEDRATE if rapid else feedrate, rapid))
+                    last = point
+    return segments
+
+
+@pytest.fixture
+def write_apt(tmp_path):
+    def write(text, name="program.apt"):
+        path = tmp_path / name
+        path.write_text(text, encoding="latin-1")
+        return str(path)
+    return write
+
+
+@pytest.mark.parametrize("chunk_chars", [1 << 23, 7])
+def test_linear_program_matches_line_reader(write_apt, monkeypatch, chunk_chars):
+    # Petits blocs : lignes coupées entre deux lectures
+    monkeypatch.setattr(rsi_apt, "READ_CHUNK_CHARS", chunk_chars)
+    filepath = write_apt(LINEAR_PROGRAM)
+    offset, rotation = np.array([5.0, -2.0, 1.0]), (30.0, 10.0, -20.0)
+    path = read_apt(filepath, offset, rotation)
+    expected = read_apt_lines(filepath, offset, rotation)
+    assert len(path) == len(expected) == 5
+    np.testing.assert_allclose(path.starts, [s[0] for s in expected], atol=1e-12)
+    np.testing.assert_allclose(path.ends, [s[1] for s in expected], atol=1e-12)
+    np.testing.assert_array_equal(path.feedrates, [s[2] for s in expected])
+    np.testing.assert_array_equal(path.rapid, [s[3] for s in expected])
+    assert (path.motion == LINEAR).all()
+
+
+def test_unreadable_goto_is_skipped(write_apt):
+    path = read_apt(write_apt("FEDRAT/ 600\nGOTO/ 0, 0, 0\nGOTO/ X, 1, 2\nGOTO/ 1, 0, 0\n"))
+    np.testing.assert_array_equal(path.ends, [[1, 0, 0]])
+
+
+ARC_PROGRAM = """FEDRAT/ MMPM, 1200.0
+GOTO/ 10.0, 0.0, 0.0
+CIRCLE/ 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 10.0, 0.01, 0.5, 12.0, 0.0
+GOTO/ 0.0, 10.0, 0.0
+GOTO/ 0.0, 20.0, 0.0
+CIRCLE/ 0.0, 30.0, 0.0, 0.0, 0.0, -1.0, 10.0
+GOTO/ 10.0, 30.0, 0.0
+INDIRV/ 0.0, 1.0, 0.0
+CIRCLE/ 0.0, 30.0, 0.0, 10.0
+GOTO/ 10.0, 30.0, 5.0
+CIRCLE/ 10.0, 30.0, 5.0, 10.0
+GOTO/ 0.0, 30.0, 5.0
+RAPID
+GOTO/ 10.0, 30.0, 50.0
+"""
+
+
+def test_circle_motions(write_apt):
+    path = read_apt(write_apt(ARC_PROGRAM))
+    # Quart de cercle direct, droite, trois quarts de cercle indirect (CW), hélice complète (INDIRV),
+    # CIRCLE centré sur le point de départ (dégénéré, ligne droite), RAPID
+    np.testing.assert_array_equal(path.motion, [ARC, LINEAR, ARC, ARC, LINEAR, LINEAR])
+    np.testing.assert_allclose(path.lengths, [5 * np.pi, 10, 15 * np.pi, np.hypot(20 * np.pi, 5), 10, np.hypot(10, 45)])
+    np.testing.assert_array_equal(path.feedrates, [1200.0] * 5 + [RAPID_FEEDRATE])
+
+    dense = densify_theoretical_path(path, 0.01)
+    for motion, center in ((0, (0, 0)), (2, (0, 30)), (3, (0, 30))):
+        points = dense[dense.Segment == motion]
+        radius = np.hypot(points.X - center[0], points.Y - center[1])
+        np.testing.assert_allclose(radius, 10.0, atol=1e-9)
+    # Sens indirect : de (0, 20) à (10, 30) en passant par (-10, 30) et (0, 40)
+    clockwise = dense[dense.Segment == 2]
+    assert clockwise.X.min() == pytest.approx(-10, abs=1e-3)
+    assert clockwise.Y.max() == pytest.approx(40, abs=1e-3)
+    helix = dense[dense.Segment == 3]
+    np.testing.assert_allclose(np.diff(helix.Z.values), 5 / len(helix), atol=1e-9)
+
+
+def test_circle_follows_program_rotation(write_apt):
+    filepath = write_apt(ARC_PROGRAM)
+    rotation = rotation_matrix((30, 10, -20))
+    reference = densify_theoretical_path(read_apt(filepath), 0.05)
+    moved = densify_theoretical_path(read_apt(filepath, (5, -2, 1), (30, 10, -20)), 0.05)
+    assert len(moved) == len(reference)
+    np.testing.assert_allclose(moved[['X', 'Y', 'Z']].values,
+                               reference[['X', 'Y', 'Z']].values @ rotation.T + [5, -2, 1], atol=1e-9)
+
+
+@pytest.mark.parametrize("tolerance", [0.1, 0.001])
+def test_chords_stay_within_tolerance(write_apt, tolerance):
+    path = read_apt(write_apt(ARC_PROGRAM))
+    starts, ends, motion = path.chords(tolerance)
+    np.testing.assert_allclose(starts[1:], ends[:-1], atol=1e-12)
+    assert set(np.unique(motion)) == set(range(len(path)))
+    # Points de l'arc comparés à ses cordes : écart au plus la tolérance
+    for arc in path.arc_index:
+        fraction = np.linspace(0, 1, 5000)
+        on_arc = path.arc_points(np.full(len(fraction), arc), fraction)
+        pieces = motion == arc
+        index = SegmentIndex(starts[pieces], ends[pieces])
+        assert index.project(on_arc)["distance"].max() <= tolerance * (1 + 1e-6)
@@ -0,0 +1,44 @@
+import json
+import os
+import numpy as np
+from rsi_batch import load_columns, output_names, run_batch
+from rsi_export import plotly_bundle_name
+
+
+def write_log(path, frames):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(frames):
+            f.write(f'<Rob Type="KUKA"><RIst X="{i * 0.5}"/><IPOC>{1000 + 4 * i}</IPOC></Rob>\n')
+    return os.path.abspath(path)
+
+
+def test_up_to_date_logs_are_skipped(tmp_path):
+    logs = [write_log(str(tmp_path / "logs" / "a.log"), 30), write_log(str(tmp_path / "logs" / "b.log"), 40)]
+    empty = write_log(str(tmp_path / "logs" / "empty.log"), 0)
+    out = str(tmp_path / "out")
+    first = run_batch([str(tmp_path / "logs")], out, jobs=2)
+    assert [first[log]["frames"] for log in logs] == [30, 40]
+    assert first[empty].startswith("erreur")
+    assert os.path.exists(os.path.join(out, plotly_bundle_name()))
+    stats = json.loads((tmp_path / "out" / "b.stats.json").read_text(encoding="utf-8"))
+    assert stats["frame_count"] == 40
+    np.testing.assert_array_equal(load_columns(os.path.join(out, "a.npz"))["Rob/RIst@X"], np.arange(30) * 0.5)
+
+    second = run_batch([str(tmp_path / "logs")], out, jobs=2)
+    assert second[logs[0]] == second[logs[1]] == "à jour"
+    # Le log sans sorties est retenté
+    assert second[empty].startswith("erreur")
+
+    # Log modifié après ses sorties : seul lui est retraité
+    later = os.path.getmtime(os.path.join(out, "a.html")) + 10
+    os.utime(logs[1], (later, later))
+    third = run_batch([str(tmp_path / "logs")], out, jobs=2)
+    assert third[logs[0]] == "à jour" and third[logs[1]]["frames"] == 40
+    forced = run_batch([str(tmp_path / "logs" / "a.log")], out, jobs=1, force=True)
+    assert forced[logs[0]]["frames"] == 30
+
+
+def test_output_names_are_unique():
+    names = output_names(["/x/run.log", "/y/run.log", "/y/other.log"])
+    assert names == {"/x/run.log": "run", "/y/run.log": "run_2", "/y/other.log": "other"}
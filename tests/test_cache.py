@@ -0,0 +1,66 @@
+import os
+import numpy as np
+from rsi_cache import MANIFEST, ParseCache, file_fingerprint, load_or_parse
+from rsi_store import FrameStore
+
+
+def write_log(path, frames, first_ipoc=1000):
+    lines = [f'<Rob Type="KUKA"><RIst X="{i * 0.5}" Y="1.0" Z="2.0"/><IPOC>{first_ipoc + 4 * i}</IPOC></Rob>\n'
+             for i in range(frames)]
+    path.write_text("".join(lines), encoding="utf-8")
+    return str(path)
+
+
+def test_round_trip_uses_memory_maps(tmp_path):
+    log = write_log(tmp_path / "a.log", 50)
+    cache = ParseCache(str(tmp_path / "cache"))
+    parsed = load_or_parse(log, cache=cache)
+    cached = FrameStore()
+    assert cache.load(log, cached)
+    assert cached.frame_count == parsed.frame_count == 50
+    for tag in parsed.keys():
+        np.testing.assert_array_equal(cached[tag], parsed[tag])
+    # Valeurs lues sur place dans les .npy (mmap_mode='r') : vue en lecture seule, sans copie
+    assert not cached["Rob/IPOC"].flags.writeable
+    assert cached.stats == parsed.stats
+    assert cached.parse_stats.from_cache
+
+
+def test_fingerprint_detects_same_size_rewrite(tmp_path):
+    log = write_log(tmp_path / "a.log", 20)
+    before = file_fingerprint(log)
+    st = os.stat(log)
+    # Même taille et même date : seul le contenu change
+    write_log(tmp_path / "a.log", 20, first_ipoc=2000)
+    os.utime(log, ns=(st.st_atime_ns, st.st_mtime_ns))
+    after = file_fingerprint(log)
+    assert (after["size"], after["mtime_ns"]) == (before["size"], before["mtime_ns"])
+    assert after["digest"] != before["digest"]
+
+
+def test_modified_log_invalidates_entry(tmp_path):
+    log = write_log(tmp_path / "a.log", 20)
+    cache = ParseCache(str(tmp_path / "cache"))
+    load_or_parse(log, cache=cache)
+    write_log(tmp_path / "a.log", 30)
+    assert not cache.load(log, FrameStore())
+    assert not os.path.exists(cache._entry_dir(log, np.float64))
+    assert load_or_parse(log, cache=cache).frame_count == 30
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    logs = [write_log(tmp_path / f"{name}.log", 200) for name in "abc"]
+    for i, log in enumerate(logs[:2]):
+        load_or_parse(log, cache=cache)
+        # Dates d'accès explicites : indépendant de la résolution du système de fichiers
+        os.utime(os.path.join(cache._entry_dir(log, np.float64), MANIFEST), (1000 + i, 1000 + i))
+    # "a" relu : il devient le plus récemment utilisé, "b" est évincé en premier
+    assert cache.load(logs[0], FrameStore())
+    entry_size = sum(e.stat().st_size for e in os.scandir(cache._entry_dir(logs[0], np.float64)))
+    cache.max_bytes = int(2.5 * entry_size)
+    load_or_parse(logs[2], cache=cache)
+    assert cache.load(logs[0], FrameStore())
+    assert not os.path.exists(cache._entry_dir(logs[1], np.float64))
+    assert cache.load(logs[2], FrameStore())
+
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+import comparaison
+from comparaison import DEFAULT_MAX_SPEED_MM_S, _max_speed, densify_theoretical_path, trim_rsi_data
+
+
+def densify_loop(path_segments, step_mm):
+    # Densification point par point d'origine, référence des tests d'équivalence
+    dense_points = []
+    for segment in path_segments:
+        start_point, end_point = np.array(segment['start']), np.array(segment['end'])
+        length = np.linalg.norm(end_point - start_point)
+        if length == 0:
+            continue
+        points = np.linspace(start_point, end_point, int(length / step_mm), endpoint=False)
+        for point in points:
+            dense_points.append({'X': point[0], 'Y': point[1], 'Z': point[2],
+                                 'Theoretical_Speed_mm_s': segment['feedrate'] / 60.0})
+    last_seg = path_segments[-1]
+    dense_points.append({'X': last_seg['end'][0], 'Y': last_seg['end'][1], 'Z': last_seg['end'][2],
+                         'Theoretical_Speed_mm_s': last_seg['feedrate'] / 60.0})
+    return pd.DataFrame(dense_points)
+
+
+def random_segments(count, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.cumsum(rng.uniform(-5, 5, (count + 1, 3)), axis=0)
+    # Quelques segments nuls ou plus courts que le pas
+    points[5] = points[4]
+    points[9] = points[8] + 0.01
+    feedrates = rng.choice([600.0, 1200.0, 12000.0], count)
+    return [{"start": points[i].tolist(), "end": points[i + 1].tolist(), "feedrate": feedrates[i]}
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("step_mm, chunk_points", [(0.1, 1_000_000), (0.37, 97), (1.0, 1)])
+def test_densify_matches_point_loop(step_mm, chunk_points):
+    segments = random_segments(40)
+    expected = densify_loop(segments, step_mm)
+    dense = densify_theoretical_path(segments, step_mm, chunk_points=chunk_points)
+    assert len(dense) == len(expected)
+    np.testing.assert_allclose(dense[['X', 'Y', 'Z']].values, expected[['X', 'Y', 'Z']].values, rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(dense['Theoretical_Speed_mm_s'].values, expected['Theoretical_Speed_mm_s'].values)
+    chunks = pd.concat(comparaison.iter_dense_path(segments, step_mm, chunk_points), ignore_index=True)
+    pd.testing.assert_frame_equal(chunks, dense)
+
+
+def test_densify_empty_path():
+    assert densify_theoretical_path([]).empty
+
+
+def test_trim_first_pass_ignores_the_return_to_start():
+    # Aller passant à 0.4 mm du départ (0, 0, 0), retour finissant à 0.1 mm
+    x = np.concatenate((np.linspace(-4.6, 10.4, 16), np.linspace(9.4, 0.1, 10)))
+    rsi_df = pd.DataFrame({'X': x, 'Y': 0.0, 'Z': 0.0})
+    assert trim_rsi_data(rsi_df, (0, 0, 0))['X'].iloc[0] == pytest.approx(0.1)
+    first = trim_rsi_data(rsi_df, (0, 0, 0), first_pass=True)
+    assert first['X'].iloc[0] == pytest.approx(0.4)
+    assert len(first) == 21
+
+
+def test_max_speed_falls_back_on_measures_then_default():
+    assert _max_speed(np.array([np.nan, 10.0, 20.0]), np.array([50.0])) == 20.0
+    assert _max_speed(np.array([np.nan, np.nan]), np.array([np.nan, 5.0, 7.5])) == 7.5
+    assert _max_speed(np.array([np.nan]), np.array([0.0, np.nan])) == DEFAULT_MAX_SPEED_MM_S
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from rsi_downsample import MinMaxPyramid, downsample, lttb, minmax_envelope
+
+
+def test_minmax_envelope_keeps_every_bucket_extreme():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=10_007)
+    indices = minmax_envelope(y, 100)
+    assert np.all(np.diff(indices) > 0)
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert len(indices) <= 2 * 100 + 4
+    bucket = -(-len(y) // 100)
+    for start in range(0, len(y), bucket):
+        block = y[start:start + bucket]
+        assert start + block.argmin() in indices and start + block.argmax() in indices
+
+
+def test_lttb_keeps_end_points_and_count():
+    x = np.arange(5000, dtype=np.float64)
+    y = np.sin(x / 50)
+    y[1234] = 10.0
+    indices = lttb(x, y, 500)
+    assert len(indices) == 500 and indices[0] == 0 and indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
+    # Un pic isolé forme le plus grand triangle de son seau
+    assert 1234 in indices
+
+
+def test_downsample_short_series_and_unknown_method():
+    x, y = np.arange(10), np.arange(10.0)
+    assert downsample(x, y, 20)[1] is y
+    with pytest.raises(ValueError):
+        downsample(np.arange(100), np.arange(100.0), 10, method="mean")
+
+
+def test_pyramid_query_keeps_window_extremes():
+    rng = np.random.default_rng(1)
+    values = np.cumsum(rng.normal(size=200_003))
+    x = np.arange(len(values)) * 0.004
+    pyramid = MinMaxPyramid(x, values)
+    for start, end in ((None, None), (100.0, 500.0), (12.3456, 12.9)):
+        qx, qy, bucket = pyramid.query(start, end, max_points=800)
+        i0, i1 = pyramid.index_range(start, end)
+        assert len(qx) <= 800
+        assert np.all(np.diff(qx) >= 0)
+        # Seaux alignés sur la pyramide : ils peuvent déborder de la fenêtre, jamais en perdre les extrêmes
+        assert qy.min() <= values[i0:i1].min() and qy.max() >= values[i0:i1].max()
+        assert set(qy.tolist()) <= set(values.tolist())
+        if i1 - i0 + 2 <= 800:
+            assert bucket == 1
+            np.testing.assert_array_equal(qy, values[max(i0 - 1, 0):i1 + 1])
+    assert pyramid.query()[1].min() == values.min()
@@ -0,0 +1,102 @@
+import base64
+import json
+import os
+import re
+import zlib
+import numpy as np
+import plotly
+import pytest
+from rsi_downsample import downsample
+from rsi_export import export_to_html_interactif, plotly_bundle_name
+from rsi_store import FrameStore
+
+
+def read_constant(html, name):
+    # Valeur d'une constante injectée dans la page (littéral JSON sur une ligne)
+    match = re.search(rf'^\s*(?:const|let) {name} = (.*);$', html, re.MULTILINE)
+    return json.loads(match.group(1))
+
+
+def decode_blob(spec):
+    # Même décodage que la page : base64, deflate éventuel, tableau typé petit-boutiste
+    raw = base64.b64decode(spec["b64"])
+    if spec["z"]:
+        raw = zlib.decompress(raw)
+    return np.frombuffer(raw, dtype="<" + spec["t"])
+
+
+def make_store(frames=5000):
+    store = FrameStore()
+    rng = np.random.default_rng(0)
+    walk = np.cumsum(rng.normal(size=frames))
+    for i in range(frames):
+        frame = store.new_frame()
+        store.append("Rob/RIst@X", frame, walk[i])
+        if i % 20 == 0:
+            store.append("Rob/Delay@D", frame, i % 3)
+    return store.finalize()
+
+
+def test_long_series_get_an_overview(tmp_path):
+    store = make_store()
+    output = tmp_path / "report.html"
+    export_to_html_interactif(store, str(output), max_points=500, plotly_js="cdn")
+    html = output.read_text(encoding="utf-8")
+    overview_x, overview_y = read_constant(html, "overview_x"), read_constant(html, "overview_y")
+    # Série courte : pas de vue réduite, tracée directement
+    assert list(overview_x) == ["Rob/RIst@X"]
+    values = store["Rob/RIst@X"]
+    expected_x, expected_y = downsample(store.frames("Rob/RIst@X"), values, 500)
+    np.testing.assert_array_equal(overview_x["Rob/RIst@X"], expected_x)
+    np.testing.assert_allclose(overview_y["Rob/RIst@X"], expected_y)
+    assert len(overview_y["Rob/RIst@X"]) <= 500 + 4
+    assert min(overview_y["Rob/RIst@X"]) == values.min() and max(overview_y["Rob/RIst@X"]) == values.max()
+    assert read_constant(html, "MAX_POINTS") == 500
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_binary_blobs_decode_to_the_columns(tmp_path, compress):
+    store = make_store()
+    output = tmp_path / "report.html"
+    export_to_html_interactif(store, str(output), compress=compress, plotly_js="cdn")
+    html = output.read_text(encoding="utf-8")
+    blobs = read_constant(html, "all_blobs")
+    assert read_constant(html, "all_data") == {}
+    assert set(blobs) == {"Rob/RIst@X", "Rob/Delay@D"}
+    for tag, spec in blobs.items():
+        assert spec["v"]["z"] is compress
+        np.testing.assert_array_equal(decode_blob(spec["v"]), store[tag])
+    # Index de trame embarqué seulement pour la colonne à trous
+    assert blobs["Rob/RIst@X"]["f"] is None
+    np.testing.assert_array_equal(decode_blob(blobs["Rob/Delay@D"]["f"]), store.frames("Rob/Delay@D"))
+
+
+def test_json_encoding_embeds_values_as_text(tmp_path):
+    store = make_store(100)
+    output = tmp_path / "report.html"
+    export_to_html_interactif(store, str(output), encoding="json", plotly_js="cdn")
+    html = output.read_text(encoding="utf-8")
+    assert read_constant(html, "all_blobs") == {}
+    np.testing.assert_allclose(read_constant(html, "all_data")["Rob/RIst@X"], store["Rob/RIst@X"])
+    assert read_constant(html, "all_frames")["Rob/Delay@D"] == store.frames("Rob/Delay@D").tolist()
+
+
+def test_report_is_self_contained_by_default(tmp_path):
+    output = tmp_path / "report.html"
+    export_to_html_interactif(make_store(100), str(output))
+    assert os.listdir(tmp_path) == ["report.html"]
+    html = output.read_text(encoding="utf-8")
+    assert "<script src=" not in html
+    assert plotly.offline.get_plotlyjs()[:200] in html
+
+
+def test_directory_mode_shares_a_versioned_bundle(tmp_path):
+    # Bundle d'une autre version déjà présent : ignoré, jamais associé aux nouveaux rapports
+    (tmp_path / "plotly.min.js").write_text("// ancienne version", encoding="utf-8")
+    for name in ("a.html", "b.html"):
+        export_to_html_interactif(make_store(100), str(tmp_path / name), plotly_js="directory")
+        html = (tmp_path / name).read_text(encoding="utf-8")
+        assert f'<script src="{plotly_bundle_name()}"></script>' in html
+    assert plotly_bundle_name() == f"plotly-{plotly.__version__}.min.js"
+    assert sorted(os.listdir(tmp_path)) == ["a.html", "b.html", plotly_bundle_name(), "plotly.min.js"]
+    assert (tmp_path / plotly_bundle_name()).read_text(encoding="utf-8") == plotly.offline.get_plotlyjs()
@@ -0,0 +1,64 @@
+import os
+import numpy as np
+from rsi_parser import LogFollower
+from rsi_store import FrameStore
+
+
+def frame(i):
+    return f'<Rob Type="KUKA"><RIst X="{i}.5" Y="0.0" Z="0.0"/><IPOC>{1000 + 4 * i}</IPOC></Rob>\n'
+
+
+def append(path, text, mode='a'):
+    with open(path, mode, encoding='utf-8', newline='\n') as f:
+        f.write(text)
+
+
+def test_only_complete_lines_are_parsed(tmp_path):
+    path = str(tmp_path / "live.log")
+    append(path, frame(0) + frame(1), 'w')
+    follower = LogFollower(path, FrameStore())
+    assert follower.poll() == 2
+    line = frame(2)
+    # Ligne encore en cours d'écriture : rien n'est lu tant qu'elle n'est pas terminée
+    append(path, line[:30])
+    assert follower.poll() == 0
+    assert follower.offset == 2 * len(frame(0))
+    append(path, line[30:])
+    assert follower.poll() == 1
+    assert follower.poll() == 0
+    np.testing.assert_array_equal(follower.store["Rob/IPOC"], [1000, 1004, 1008])
+    assert follower.store.source_bytes == os.path.getsize(path)
+
+
+def test_truncation_restarts_from_the_beginning(tmp_path):
+    path = str(tmp_path / "live.log")
+    append(path, frame(0) + frame(1) + frame(2), 'w')
+    follower = LogFollower(path, FrameStore())
+    follower.poll()
+    append(path, frame(10), 'w')
+    assert follower.poll() == 1
+    assert follower.rotations == 1
+    np.testing.assert_array_equal(follower.store["Rob/IPOC"], [1000, 1004, 1008, 1040])
+
+
+def test_rotation_is_detected_by_file_identity(tmp_path):
+    path = str(tmp_path / "live.log")
+    append(path, frame(0), 'w')
+    follower = LogFollower(path, FrameStore())
+    follower.poll()
+    os.replace(path, str(tmp_path / "live.log.1"))
+    assert follower.poll() == 0
+    # Nouveau fichier plus long que l'ancien : seule l'identité du fichier révèle la rotation
+    append(path, frame(5) + frame(6), 'w')
+    assert follower.poll() == 2
+    assert follower.rotations == 1
+    np.testing.assert_array_equal(follower.store["Rob/RIst@X"], [0.5, 5.5, 6.5])
+
+
+def test_oversized_line_is_skipped(tmp_path):
+    path = str(tmp_path / "live.log")
+    append(path, "x" * 100 + "\n" + frame(0), 'w')
+    follower = LogFollower(path, FrameStore())
+    assert follower.poll(max_bytes=50) == 0
+    assert follower.offset == 50
+    assert follower.poll() == 1
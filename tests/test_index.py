@@ -0,0 +1,53 @@
+import os
+import numpy as np
+import pytest
+import rsi_parser
+from rsi_cache import ParseCache, load_or_parse
+from rsi_index import load_window
+from rsi_store import FrameStore
+
+
+@pytest.fixture
+def cached_log(synthetic_log, tmp_path):
+    path, _ = synthetic_log
+    cache = ParseCache(str(tmp_path / "cache"))
+    full = load_or_parse(path, cache=cache, every=64)
+    return path, cache, full
+
+
+def test_first_scan_stores_the_index_in_the_cache(cached_log):
+    path, cache, full = cached_log
+    index = cache.load_index(path)
+    assert index is not None and index.frame_count == full.frame_count
+    assert np.all(np.diff(index.frames) >= 64)
+    # Rien à côté du log
+    assert sorted(os.listdir(os.path.dirname(path))) == ["cache", "synthetic.log"]
+
+
+def test_load_window_reads_only_the_window(cached_log, monkeypatch):
+    path, cache, full = cached_log
+
+    def no_full_parse(*args, **kwargs):
+        raise AssertionError("analyse complète inattendue")
+    monkeypatch.setattr(rsi_parser, "parse_log_file", no_full_parse)
+    window = load_window(path, 1000, 1999, cache=cache)
+    assert window.frame_count == 2000
+    for tag in full.keys():
+        frames = full.frames(tag)
+        inside = (frames >= 1000) & (frames <= 1999)
+        np.testing.assert_array_equal(window.frames(tag), frames[inside], err_msg=tag)
+        np.testing.assert_array_equal(window[tag], full[tag][inside], err_msg=tag)
+    # Fenêtre en IPOC, affinée à la trame près
+    ipoc = full["Rob/IPOC"]
+    by_ipoc = load_window(path, start_ipoc=ipoc[500], end_ipoc=ipoc[900], cache=cache)
+    np.testing.assert_array_equal(by_ipoc["Rob/IPOC"], ipoc[(ipoc >= ipoc[500]) & (ipoc <= ipoc[900])])
+
+
+def test_stale_index_is_rebuilt(cached_log):
+    path, cache, _ = cached_log
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('<Rob Type="KUKA"><IPOC>1</IPOC></Rob>\n')
+    assert cache.load_index(path) is None
+    window = load_window(path, cache=cache)
+    assert cache.load_index(path).frame_count == window.frame_count
+    assert load_or_parse(path, FrameStore(), cache=cache).frame_count == window.frame_count
@@ -0,0 +1,84 @@
+import json
+import numpy as np
+import rsi_parser
+from rsi_store import FrameStore
+
+
+def assert_same_store(a, b):
+    assert a.frame_count == b.frame_count
+    assert sorted(a.keys()) == sorted(b.keys())
+    for tag in a.keys():
+        np.testing.assert_array_equal(a.frames(tag), b.frames(tag), err_msg=tag)
+        np.testing.assert_array_equal(a[tag], b[tag], err_msg=tag)
+
+
+def test_fast_parser_matches_elementtree(synthetic_log):
+    path, valid = synthetic_log
+    fast = rsi_parser.parse_log_file(path, fast=True)
+    slow = rsi_parser.parse_log_file(path, fast=False)
+    assert fast.frame_count == valid
+    assert_same_store(fast, slow)
+    assert fast.parse_stats.malformed_lines == slow.parse_stats.malformed_lines > 0
+
+
+def test_parallel_parser_matches_sequential(synthetic_log, monkeypatch):
+    path, _ = synthetic_log
+    sequential = rsi_parser.parse_log_file(path)
+    # Découpage forcé malgré la petite taille du fichier
+    monkeypatch.setattr(rsi_parser, "MIN_PARALLEL_BYTES", 0)
+    parallel = rsi_parser.parse_log_file(path, workers=3)
+    assert_same_store(sequential, parallel)
+    assert parallel.source_bytes == sequential.source_bytes
+
+
+def test_byte_ranges_cover_every_frame_once(synthetic_log):
+    path, valid = synthetic_log
+    bounds = rsi_parser.split_file(path, 4)
+    counts = [rsi_parser.parse_byte_range(path, start, end).frame_count for start, end in bounds]
+    assert sum(counts) == valid
+
+
+def test_parse_stats_merge_shifts_line_numbers():
+    first, second = rsi_parser.ParseStats(), rsi_parser.ParseStats()
+    first.lines, first.bytes, first.template_frames = 10, 1000, 9
+    first.add_malformed(ValueError("tronquée"), "<Rob")
+    first.add_non_numeric("Rob@Type", "KUKA", 9)
+    first.add_time("parse", 0.5)
+    second.lines, second.bytes, second.xml_frames = 4, 300, 3
+    second.add_malformed(ValueError("tronquée"), "<Sen")
+    second.add_non_numeric("Rob@Type", "KUKA", 3)
+    second.add_non_numeric("Sen/EStr", "Info")
+    second.add_time("parse", 0.25)
+    first.merge(second)
+    assert (first.lines, first.bytes, first.frames, first.malformed_lines) == (14, 1300, 12, 2)
+    assert [sample["line"] for sample in first.malformed_samples] == [10, 14]
+    assert first.non_numeric == {"Rob@Type": [12, "KUKA"], "Sen/EStr": [1, "Info"]}
+    assert first.stages == {"parse": 0.75}
+
+
+def test_parse_stats_dict_round_trip(synthetic_log):
+    stats = rsi_parser.parse_log_file(synthetic_log[0]).parse_stats
+    data = json.loads(json.dumps(stats.to_dict()))
+    assert data["frames"] == stats.frames and data["mb_per_s"] > 0
+    restored = rsi_parser.ParseStats.from_dict(data)
+    assert restored.to_dict() == data
+    assert restored.summary() == stats.summary()
+
+
+def test_viewer_export_time_is_kept_in_the_diagnostics(tmp_path):
+    from logviewer import KukaRsiLogViewer
+    store = FrameStore()
+    store.append("Rob/RIst@X", store.new_frame(), 1.0)
+    # Sans fenêtre Tk : seuls les attributs utilisés par l'export
+    viewer = KukaRsiLogViewer.__new__(KukaRsiLogViewer)
+    viewer.data, viewer.view, viewer.max_plot_points = store.finalize(), None, 4000
+    assert store.parse_stats is None
+    viewer.export_to_html_interactif(str(tmp_path / "report.html"))
+    assert "export" in store.parse_stats.stages
+
+
+def test_columns_use_narrowest_exact_dtype(synthetic_log):
+    store = rsi_parser.parse_log_file(synthetic_log[0], FrameStore(adaptive=True))
+    assert store.columns["Rob/Delay@D"].dtype == np.int8
+    assert store.columns["Rob/IPOC"].dtype.kind == 'i'
+    assert store.columns["Rob/B0@a0"].dtype == np.float64
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from rsi_path import TRACK_BACKTRACK_MM, SegmentIndex
+
+
+def brute_force(points, starts, ends):
+    # Distance de chaque point à chaque segment : O(points x segments), référence exacte
+    deltas = ends - starts
+    w = points[:, None, :] - starts[None]
+    lengths2 = np.einsum('ij,ij->i', deltas, deltas)
+    t = np.clip(np.divide(np.einsum('pij,ij->pi', w, deltas), lengths2, out=np.zeros(w.shape[:2]), where=lengths2 > 0), 0, 1)
+    distance = np.linalg.norm(w - t[..., None] * deltas, axis=2)
+    return distance.min(axis=1)
+
+
+@pytest.mark.parametrize("piece_mm", [None, 0.5, 50.0])
+def test_project_matches_brute_force(piece_mm):
+    rng = np.random.default_rng(3)
+    # Segments de longueurs très différentes (le rayon commun des morceaux impose l'élargissement de la recherche)
+    vertices = np.cumsum(rng.normal(0, 1, (300, 3)) * rng.choice([0.05, 1.0, 20.0], (300, 1)), axis=0)
+    vertices[100] = vertices[99]
+    starts, ends = vertices[:-1], vertices[1:]
+    points = vertices[rng.integers(0, 300, 2000)] + rng.normal(0, 5, (2000, 3))
+    index = SegmentIndex(starts, ends, piece_mm=piece_mm)
+    result = index.project(points, chunk_points=333)
+    np.testing.assert_allclose(result["distance"], brute_force(points, starts, ends), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(np.linalg.norm(points - result["foot"], axis=1), result["distance"], atol=1e-9)
+    segment = result["segment"]
+    np.testing.assert_allclose(result["abscissa"], index.abscissa[segment]
+                               + np.linalg.norm(result["foot"] - starts[segment], axis=1), atol=1e-9)
+
+
+def zigzag_pocket(passes=40, width=50.0, spacing=0.4):
+    corners = []
+    for k in range(passes):
+        xs = (0.0, width) if k % 2 == 0 else (width, 0.0)
+        corners += [(xs[0], k * spacing, 0.0), (xs[1], k * spacing, 0.0)]
+    return np.array(corners)
+
+
+def test_track_stays_on_the_measured_pass():
+    rng = np.random.default_rng(0)
+    corners = zigzag_pocket()
+    index = SegmentIndex(corners[:-1], corners[1:])
+    cumulative = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(corners, axis=0), axis=1))))
+    speed, dt = 60.0, 0.004
+    true_abscissa = np.arange(0, cumulative[-1], speed * dt)
+    truth = np.column_stack([np.interp(true_abscissa, cumulative, corners[:, j]) for j in range(3)])
+    # Bruit de mesure comparable à l'écart entre passes
+    measured = truth + rng.normal(scale=0.15, size=truth.shape)
+    times = np.arange(len(measured)) * dt
+
+    free = index.project(measured)
+    tracked = index.track(measured, times, speed)
+    assert (np.abs(free["abscissa"] - true_abscissa) > 2).sum() > 0
+    assert (np.abs(tracked["abscissa"] - true_abscissa) > 2).mean() < 0.01
+    abscissa = tracked["abscissa"]
+    assert (np.maximum.accumulate(abscissa) - abscissa).max() <= TRACK_BACKTRACK_MM + 1e-9
+    assert np.isfinite(tracked["distance"]).all()
+
+    # Mesure rejouée deux fois : le second passage ne revient pas au début du parcours
+    replay = index.track(np.vstack((measured, measured)), np.arange(2 * len(measured)) * dt, speed)["abscissa"]
+    assert (np.maximum.accumulate(replay) - replay).max() <= TRACK_BACKTRACK_MM + 1e-9
+    assert np.isfinite(replay).all()
+
+
+def test_track_distance_is_exact_on_a_single_pass():
+    rng = np.random.default_rng(1)
+    corners = np.array([(0, 0, 0), (100, 0, 0), (100, 100, 0), (0, 100, 10)], dtype=np.float64)
+    index = SegmentIndex(corners[:-1], corners[1:])
+    points = np.column_stack((np.linspace(0, 100, 5000), rng.normal(0, 0.2, 5000), np.zeros(5000)))
+    tracked = index.track(points, np.arange(5000) * 0.004, 100.0)
+    np.testing.assert_allclose(tracked["distance"], index.project(points)["distance"], atol=1e-9)
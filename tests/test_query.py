@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from rsi_query import parse_query, query, run_query, select_tags
+from rsi_store import FrameStore
+
+
+@pytest.fixture
+def store():
+    store = FrameStore()
+    for i in range(20):
+        frame = store.new_frame()
+        store.append("Rob/IPOC", frame, 1000 + 4 * i)
+        store.append("Rob/RIst@X", frame, float(i))
+        store.append("Rob/RIst@Z", frame, 10.0 + (i % 5))
+        store.append("Rob/Delay@D", frame, 1 if i in (3, 4, 12) else 0)
+        if i % 2:
+            # Chemin répété dans une même trame : deux valeurs pour une trame
+            store.append("Rob/Out@v", frame, 1.0)
+            store.append("Rob/Out@v", frame, 2.0)
+    return store.finalize()
+
+
+def test_select_tags_glob_and_regex(store):
+    assert select_tags(store, "Rob/RIst@*") == ["Rob/RIst@X", "Rob/RIst@Z"]
+    assert select_tags(store, ["re:@[XD]$", "Rob/IPOC"]) == ["Rob/Delay@D", "Rob/IPOC", "Rob/RIst@X"]
+
+
+def test_parse_query_accepts_spaces_around_operators():
+    expected = {"tags": ["Rob/RIst@*"], "where": ["Rob/RIst@Z<=12.5", "Rob/Delay@D>0"], "frames": (2, None),
+                "margin": 1}
+    assert parse_query("Rob/RIst@* Rob/RIst@Z <= 12.5 Rob/Delay@D>0 frames=2: margin=1") == expected
+    assert parse_query("Rob/RIst@Z<= 12.5 Rob/Delay@D >0 margin=1 frames=2:")["where"] == expected["where"]
+
+
+def test_frame_and_time_windows(store):
+    result = query(store, tags="Rob/RIst@X", frames=(5, 9))
+    np.testing.assert_array_equal(result.ranges, [[5, 9]])
+    np.testing.assert_array_equal(result.to_store()["Rob/RIst@X"], [5, 6, 7, 8, 9])
+    # 4 ms par trame : [0.010 s, 0.030 s] couvre les trames 3 à 7
+    result = query(store, tags="Rob/RIst@X", time=(0.010, 0.030))
+    np.testing.assert_array_equal(result.ranges, [[3, 7]])
+
+
+def test_predicates_are_combined_and_extended_by_margin(store):
+    result = run_query(store, "Rob/RIst@X Rob/Delay@D>0 Rob/RIst@Z >= 13 margin=1")
+    # Delay > 0 aux trames 3, 4, 12 ; Z >= 13 aux trames 3, 4, 8, 9, 13, 14... : intersection 3, 4
+    np.testing.assert_array_equal(result.ranges, [[2, 5]])
+    assert result.frame_count == 4
+    np.testing.assert_array_equal(result.to_store()["Rob/RIst@X"], [2, 3, 4, 5])
+
+
+def test_repeated_values_in_a_frame_count_once(store):
+    result = run_query(store, "Rob/Out@v Rob/Out@v>0 Rob/RIst@X<6")
+    np.testing.assert_array_equal(result.ranges, [[1, 1], [3, 3], [5, 5]])
+    np.testing.assert_array_equal(result.columns["Rob/Out@v"][2], [1, 2, 1, 2, 1, 2])
+    selection = result.to_store()
+    assert selection.frame_count == 5
+    np.testing.assert_array_equal(selection.frames("Rob/Out@v"), [0, 0, 2, 2, 4, 4])
+
+
+def test_single_range_selection_shares_memory(store):
+    result = query(store, frames=(4, 15))
+    assert np.shares_memory(result.to_store()["Rob/RIst@X"], store["Rob/RIst@X"])
+
+
+def test_unknown_predicate_tag(store):
+    with pytest.raises(KeyError):
+        run_query(store, "Rob/Missing>0")
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from rsi_server import MAX_POINTS_LIMIT, SeriesServer, create_app
+from rsi_store import FrameStore
+
+
+@pytest.fixture
+def client():
+    store = FrameStore()
+    for i in range(20_000):
+        frame = store.new_frame()
+        store.append("Rob/IPOC", frame, 1000 + 4 * i)
+        store.append("Rob/RIst@X", frame, np.nan if i == 5 else np.sin(i / 100))
+    app = create_app(SeriesServer(store, source="test.log"))
+    return app.test_client()
+
+
+def test_api_tags(client):
+    data = client.get("/api/tags").get_json()
+    assert data["source"] == "test.log" and data["frame_count"] == 20_000 and data["x_unit"] == "s"
+    tags = {entry["tag"]: entry for entry in data["tags"]}
+    assert tags["Rob/RIst@X"]["count"] == 20_000
+    assert tags["Rob/RIst@X"]["first_x"] == 0.0 and tags["Rob/RIst@X"]["last_x"] == pytest.approx(19_999 * 0.004)
+
+
+def test_api_stats(client):
+    stats = client.get("/api/stats", query_string={"tag": "Rob/RIst@X"}).get_json()
+    assert stats["count"] == 20_000 and stats["nonfinite_count"] == 1
+    assert set(client.get("/api/stats").get_json()) == {"Rob/IPOC", "Rob/RIst@X"}
+    assert client.get("/api/stats", query_string={"tag": "Rob/Missing"}).status_code == 404
+
+
+def test_api_series(client):
+    response = client.get("/api/series", query_string={"tag": "Rob/RIst@X", "start": 0, "end": 0.1})
+    data = response.get_json()
+    # Fenêtre courte : pleine résolution, un point de part et d'autre ; NaN transmis en null
+    assert data["bucket"] == 1 and len(data["x"]) == 27
+    assert data["y"][5] is None
+    reduced = client.get("/api/series", query_string={"tag": "Rob/RIst@X", "max_points": 500}).get_json()
+    assert len(reduced["x"]) <= 500 and reduced["bucket"] > 1
+    binary = client.get("/api/series", query_string={"tag": "Rob/RIst@X", "max_points": 500, "format": "binary"})
+    n = int(binary.headers["X-Points"])
+    xy = np.frombuffer(binary.data, dtype='<f8')
+    np.testing.assert_array_equal(xy[:n], reduced["x"])
+    assert client.get("/api/series", query_string={"tag": "Rob/RIst@X", "max_points": 1}).status_code == 400
+    big = client.get("/api/series", query_string={"tag": "Rob/RIst@X", "max_points": 10 ** 9}).get_json()
+    assert len(big["x"]) <= MAX_POINTS_LIMIT
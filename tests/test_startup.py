@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import threading
+
+import logviewer
+from logviewer import KukaRsiLogViewer
+
+
+def test_import_does_not_load_heavy_modules():
+    # Processus séparé : les autres tests ont déjà importé NumPy dans celui-ci
+    code = ("import sys, logviewer; "
+            "print(','.join(m for m in ('numpy', 'plotly', 'rsi_store', 'tkinterhtml') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(logviewer.__file__)))
+    assert out.stdout.strip() == ""
+
+
+def test_preload_sets_ready_after_startup_modules():
+    ready = threading.Event()
+    logviewer._preload_modules(ready)
+    assert ready.is_set()
+    for name in logviewer.STARTUP_MODULES + logviewer.PRELOAD_MODULES:
+        assert name in sys.modules
+
+
+class _Button:
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+def test_poll_startup_waits_for_background_import(monkeypatch):
+    # tkinterhtml absent : la création du HtmlFrame demanderait une vraie fenêtre
+    monkeypatch.setitem(sys.modules, "tkinterhtml", None)
+    # Sans fenêtre Tk : after enregistre les rappels au lieu de les planifier
+    viewer = KukaRsiLogViewer.__new__(KukaRsiLogViewer)
+    scheduled = []
+    viewer.after = lambda delay, callback: scheduled.append(callback)
+    viewer.load_button, viewer.html_frame = _Button(), None
+    viewer.startup_ready = threading.Event()
+    viewer._poll_startup()
+    assert scheduled == [viewer._poll_startup]
+    assert "state" not in viewer.load_button.options
+    viewer.startup_ready.set()
+    viewer._poll_startup()
+    assert viewer.html_frame is None
+    assert viewer.load_button.options["state"] == "normal"
+    assert viewer.data.frame_count == 0
+    assert len(scheduled) == 1
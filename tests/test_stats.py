@@ -0,0 +1,29 @@
+import json
+import numpy as np
+from rsi_stats import HISTOGRAM_BINS, MAX_DISTINCT_VALUES, compute_tag_stats
+
+
+def test_statistics_ignore_non_finite_values():
+    values = np.concatenate((np.linspace(0, 10, 1000), [np.nan, np.inf, -np.inf, np.nan]))
+    stats = compute_tag_stats(values)
+    assert stats["count"] == 1004
+    assert stats["nonfinite_count"] == 4
+    # NaN n'est pas compté comme valeur non nulle : part calculée sur les 1000 valeurs finies
+    assert stats["nonzero_ratio"] == 999 / 1000
+    assert (stats["min"], stats["max"]) == (0.0, 10.0)
+    assert stats["mean"] == np.mean(values[:1000])
+    assert stats["histogram"]["kind"] == "bins" and len(stats["histogram"]["y"]) == HISTOGRAM_BINS
+    assert sum(stats["histogram"]["y"]) == 1000
+    json.dumps(stats, allow_nan=False)
+
+
+def test_distinct_values_histogram():
+    stats = compute_tag_stats(np.array([0, 0, 1, 1, 1, 5], dtype=np.int8))
+    assert stats["histogram"] == {"kind": "values", "x": [0, 1, 5], "y": [2, 3, 1], "width": None}
+    assert stats["nonzero_ratio"] == 4 / 6
+    assert compute_tag_stats(np.arange(MAX_DISTINCT_VALUES + 1))["histogram"]["kind"] == "bins"
+
+
+def test_only_non_finite_values():
+    stats = compute_tag_stats(np.array([np.nan, np.inf]))
+    assert stats["nonfinite_count"] == 2 and stats["min"] is None and stats["nonzero_ratio"] is None
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from rsi_store import FrameStore, TagColumn, narrowest_dtype
+
+
+def test_column_gaps_after_compaction():
+    column = TagColumn(chunk_size=3)
+    for frame in range(5):
+        column.append(frame, frame)
+    column.compact()
+    assert column.dense
+    # Un trou dans les trames matérialise l'index, y compris pour la partie déjà compactée
+    column.append(7, 7)
+    column.extend(np.array([9, 10]), np.array([9.5, 10.0]))
+    for frame in (12, 13, 14):
+        column.append(frame, frame)
+    assert not column.dense
+    np.testing.assert_array_equal(column.frames, [0, 1, 2, 3, 4, 7, 9, 10, 12, 13, 14])
+    np.testing.assert_array_equal(column.values, [0, 1, 2, 3, 4, 7, 9.5, 10, 12, 13, 14])
+    assert column.values.dtype == np.float64
+    assert len(column) == 11
+
+
+def test_frame_store_export_and_merge_round_trip():
+    store = FrameStore(chunk_size=4)
+    for i in range(10):
+        frame = store.new_frame()
+        store.append("Rob/IPOC", frame, 1000 + 4 * i)
+        if i % 3 == 0:
+            store.append("Rob/Delay@D", frame, i)
+    store.finalize()
+    columns = store.export_columns()
+    assert columns["Rob/IPOC"][1] is None
+    merged = FrameStore()
+    merged.merge_columns(columns, store.frame_count)
+    merged.merge_columns(columns, store.frame_count)
+    merged.finalize()
+    assert merged.frame_count == 20
+    np.testing.assert_array_equal(merged.frames("Rob/Delay@D"), [0, 3, 6, 9, 10, 13, 16, 19])
+    np.testing.assert_array_equal(merged["Rob/IPOC"], np.tile(1000 + 4 * np.arange(10), 2))
+    assert merged.columns["Rob/IPOC"].dense
+
+
+@pytest.mark.parametrize("values, expected", [
+    ([0, 1, -5], np.int8),
+    ([0, 300], np.int16),
+    ([1.0, 2.0, 70000.0], np.int32),
+    ([2.0 ** 40], np.int64),
+    ([0.5, 1.25], np.float32),
+    ([0.1, 2.0], np.float64),
+    ([np.nan, 1.5], np.float32),
+    ([np.inf, 1.0], np.float32),
+    ([], np.int8),
+])
+def test_narrowest_dtype(values, expected):
+    assert narrowest_dtype(np.array(values, dtype=np.float64)) == expected
+
+
+def test_narrowest_dtype_respects_max_dtype():
+    assert narrowest_dtype(np.array([0.1]), np.float32) == np.float32
+    assert narrowest_dtype(np.array([3.0]), np.float32) == np.int8
+
+
+def test_adaptive_column_widens_without_loss():
+    column = TagColumn(chunk_size=4, adaptive=True)
+    values = [1, 2, 3, 4, 1000, 5, 0.5, 7, 0.1]
+    for frame, value in enumerate(values):
+        column.append(frame, value)
+    column.compact()
+    assert column.dense
+    assert column.dtype == np.float64
+    np.testing.assert_array_equal(column.values, values)
+    np.testing.assert_array_equal(column.frames, np.arange(len(values)))
+
+
+def test_sparse_column_after_compaction():
+    column = TagColumn(chunk_size=3, adaptive=True)
+    for frame in range(5):
+        column.append(frame, frame)
+    column.compact()
+    assert column.dense
+    # Un trou dans les trames matérialise l'index, y compris pour la partie déjà compactée
+    column.append(7, 7)
+    column.extend(np.array([9, 10]), np.array([9.5, 10.0]), narrow=True)
+    for frame in (12, 13, 14):
+        column.append(frame, frame)
+    assert not column.dense
+    np.testing.assert_array_equal(column.frames, [0, 1, 2, 3, 4, 7, 9, 10, 12, 13, 14])
+    np.testing.assert_array_equal(column.values, [0, 1, 2, 3, 4, 7, 9.5, 10, 12, 13, 14])
+    assert column.dtype == np.float32
+    assert len(column) == 11
+
+
+def test_share_frames_deduplicates_identical_indexes():
+    pool = {}
+    columns = []
+    for _ in range(3):
+        column = TagColumn(adaptive=True)
+        column.extend(np.array([2, 5, 6]), np.array([1.0, 2.0, 3.0]))
+        column.compact()
+        column.share_frames(pool)
+        columns.append(column)
+    assert np.shares_memory(columns[1].frames, columns[0].frames)
+    assert not columns[2].frames.flags.writeable
+    # Un ajout après partage ne modifie pas les autres colonnes
+    columns[0].append(8, 4.0)
+    np.testing.assert_array_equal(columns[0].frames, [2, 5, 6, 8])
+    np.testing.assert_array_equal(columns[1].frames, [2, 5, 6])
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import rsi_parser
+from rsi_tcp import TCP_COLUMNS, export_tcp_columns, load_tcp_columns, tcp_columns
+
+
+@pytest.fixture
+def tcp_log(tmp_path):
+    # Déplacement de 1 mm par cycle de 4 ms sur X, avec un cycle sans position
+    lines = []
+    for i in range(200):
+        position = "" if i == 100 else f'<RIst X="{i}.0" Y="5.0" Z="{i % 2}.0"/>'
+        lines.append(f'<Rob Type="KUKA">{position}<IPOC>{1000 + 4 * i}</IPOC></Rob>\n')
+    path = tmp_path / "tcp.log"
+    path.write_text("".join(lines), encoding="utf-8")
+    return rsi_parser.parse_log_file(str(path))
+
+
+def test_export_and_load_round_trip(tcp_log, tmp_path):
+    output = tmp_path / "tcp.npy"
+    n = export_tcp_columns(tcp_log, str(output))
+    assert n == 199
+    array = load_tcp_columns(str(output))
+    assert array.shape == (n, len(TCP_COLUMNS))
+    assert not array.flags.writeable
+    # Rangement par colonne : chaque colonne est relue sans copie
+    assert array.flags.f_contiguous and array[:, 1].flags.c_contiguous
+    for column, expected in zip(array.T, tcp_columns(tcp_log)):
+        np.testing.assert_array_equal(column, expected)
+    np.testing.assert_allclose(array[:3, 0], [0.0, 0.004, 0.008])
+    assert 100.0 not in array[:, 1]
+
+
+def test_speed_from_positions(tcp_log):
+    t, x, y, z, speed = tcp_columns(tcp_log)
+    # Hypoténuse de 1 mm sur X et 1 mm sur Z en 4 ms
+    np.testing.assert_allclose(speed[1:5], np.sqrt(2) / 0.004)
+    assert np.all(speed > 0)
+
+
+def test_load_rejects_other_arrays(tmp_path):
+    path = tmp_path / "other.npy"
+    np.save(path, np.zeros((10, 3)))
+    with pytest.raises(ValueError):
+        load_tcp_columns(str(path))
+
+
+def test_missing_position_tag(tcp_log):
+    with pytest.raises(KeyError):
+        tcp_columns(tcp_log, position_tag="Rob/AIPos")
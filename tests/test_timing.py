@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+import rsi_parser
+from rsi_timing import IPOC_WRAP, analyze_timing, frame_times
+
+
+@pytest.fixture
+def wrapped_log(tmp_path):
+    # 4 ms par cycle, compteur 32 bits qui repasse par zéro, cycles perdus (2 puis 5) et rafales de retard
+    ipoc = IPOC_WRAP - 40
+    lines = []
+    for i in range(100):
+        if i == 30:
+            ipoc += 2 * 4
+        if i == 60:
+            ipoc += 5 * 4
+        delay = 1 if 40 <= i < 43 or i == 70 else 0
+        lines.append(f'<Rob Type="KUKA"><Delay D="{delay}"/><IPOC>{ipoc % IPOC_WRAP}</IPOC></Rob>\n')
+        # Réponse renvoyant l'IPOC reçu, sauf une fois
+        echoed = ipoc % IPOC_WRAP + (4 if i == 50 else 0)
+        lines.append(f'<Sen Type="ImFree"><IPOC>{echoed}</IPOC></Sen>\n')
+        ipoc += 4
+    path = tmp_path / "wrapped.log"
+    path.write_text("".join(lines), encoding="utf-8")
+    return rsi_parser.parse_log_file(str(path))
+
+
+def test_missed_cycles_and_wrap(wrapped_log):
+    report = analyze_timing(wrapped_log)
+    assert report.ipoc_tag == "Rob/IPOC"
+    assert report.cycle_ms == 4.0
+    assert report.cycles == 100
+    # Le repli du compteur n'est ni un redémarrage ni un trou
+    assert report.resets == 0
+    assert report.missed_cycles == 7
+    assert [(gap["frame"], gap["missed"]) for gap in report.gaps] == [(120, 5), (60, 2)]
+    assert report.duration_s == pytest.approx((99 + 7) * 0.004)
+    assert report.jitter["max"] == 24.0
+    assert report.desync_responses == 1
+
+
+def test_delay_bursts(wrapped_log):
+    report = analyze_timing(wrapped_log)
+    assert report.delay_tag == "Rob/Delay@D"
+    assert (report.late_frames, report.bursts) == (4, 2)
+    first = report.top_bursts[0]
+    assert (first["frame"], first["frames"], first["max_delay"]) == (80, 3, 1.0)
+    assert first["time_s"] == pytest.approx((40 + 2) * 0.004)
+    assert "4 en 2 rafales" in report.summary()
+
+
+def test_frame_times_are_continuous_across_the_wrap(wrapped_log):
+    times = frame_times(wrapped_log)
+    assert np.all(np.diff(times) >= 0)
+    rob = times[0::2]
+    np.testing.assert_allclose(np.diff(rob)[[9, 10]], 0.004)
+    assert rob[-1] == pytest.approx((99 + 7) * 0.004)
+    # Réponses au temps de la trame reçue dont elles renvoient l'IPOC (la réponse désynchronisée, un cycle plus tard)
+    np.testing.assert_allclose(times[1::2] - rob, np.where(np.arange(100) == 50, 0.004, 0.0), atol=1e-12)